@@ -0,0 +1,138 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Cold-start and end-to-end benchmark of the CIDR management handlers.
+
+Each (handler, payload size) pair runs in a fresh interpreter against the in-memory backend of
+local_backend.py, and reports the handler import time, the first call latency and the steady-state latency.
+The payload size is the number of CIDRs already allocated in the benchmark region.
+
+Usage:
+    python benchmarks/bench_handlers.py [--sizes 0,100,1000] [--iterations 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+SOURCE_PATH = os.path.join(BASE_PATH, '..', 'cidr_management')
+
+HANDLERS = ('return_all_available', 'get_available_cidr_and_lock', 'assign_cidr')
+TABLE_NAME = 'AllocatedCidrTracking'
+REGION = 'us-west-2'
+ROOT_CIDRS = ['10.0.0.0/14']
+ALLOCATED_PREFIX = 27
+# GSIs of the CIDR table, index name -> (hash, range)
+INDEXES = {'account_alias-index': ('account_alias', 'cidr_block'), 'region_key-index': ('region_key', 'net_start')}
+
+
+def build_items(count):
+    """Allocated /27 CIDRs packed from the start of the first root CIDR"""
+    import ipaddress
+    subnets = ipaddress.IPv4Network(ROOT_CIDRS[0]).subnets(new_prefix=ALLOCATED_PREFIX)
+    items = []
+    for _ in range(count):
+        network = next(subnets)
+        items.append({
+            'cidr_block': network.with_prefixlen,
+            'account_alias': 'BENCH-001',
+            'assigned': True,
+            'locked': True,
+            'region': REGION.upper(),
+            'cloud': 'AWS',
+            'region_key': 'AWS#' + REGION.upper(),
+            'net_start': int(network.network_address),
+            'net_end': int(network.broadcast_address)
+        })
+    return items
+
+
+def build_event(handler_name, iteration):
+    """API Gateway event of the handler, varied by iteration where the handler changes state"""
+    path_params = {'cloud': 'aws', 'region': REGION}
+    if handler_name == 'return_all_available':
+        return {'httpMethod': 'GET', 'pathParameters': path_params,
+                'queryStringParameters': {'size': '/24', 'assigned': 'False', 'locked': 'False'}}
+    if handler_name == 'get_available_cidr_and_lock':
+        return {'httpMethod': 'POST', 'pathParameters': path_params,
+                'body': json.dumps({'size': '/27', 'account_alias': 'bench-001'})}
+    # Alternate assigning and un-assigning the same reserved CIDR
+    path_params = dict(path_params, cidr='10.3.255.224%2F27')
+    return {'httpMethod': 'PUT', 'pathParameters': path_params,
+            'body': json.dumps({'assigned': iteration % 2 == 0})}
+
+
+def run_child(handler_name, size, iterations):
+    """Measure one handler in this interpreter and print the results as JSON"""
+    sys.path.insert(0, SOURCE_PATH)
+    os.environ.setdefault('ALLOCATED_CIDR_DDB_TABLE_NAME', TABLE_NAME)
+    os.environ.setdefault('AWS_DEFAULT_REGION', REGION)
+    # Import time includes boto3, as in the Lambda init phase
+    start = time.perf_counter()
+    module = __import__(handler_name)
+    import_ms = (time.perf_counter() - start) * 1000
+    # Install the local backend after the import, so its own imports are not measured
+    sys.path.insert(0, BASE_PATH)
+    import local_backend
+    items = build_items(size)
+    items.append({'cidr_block': '10.3.255.224/27', 'account_alias': 'BENCH-001', 'assigned': False,
+                  'locked': True, 'region': REGION.upper(), 'cloud': 'AWS', 'region_key': 'AWS#' + REGION.upper(),
+                  'net_start': 168034272, 'net_end': 168034303})
+    local_backend.install(region_params={REGION: {'master-cidr': {'AWS': {'cidrs': ROOT_CIDRS}}}},
+                          items=items, table_name=TABLE_NAME, indexes=INDEXES)
+    # First call
+    start = time.perf_counter()
+    response = module.handler(build_event(handler_name, 0), None)
+    first_ms = (time.perf_counter() - start) * 1000
+    # Steady state
+    latencies = []
+    for iteration in range(1, iterations + 1):
+        start = time.perf_counter()
+        module.handler(build_event(handler_name, iteration), None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(json.dumps({
+        'handler': handler_name,
+        'size': size,
+        'status': response['statusCode'],
+        'import_ms': import_ms,
+        'first_ms': first_ms,
+        'steady_median_ms': statistics.median(latencies),
+        'steady_p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }))
+
+
+def run_parent(sizes, iterations):
+    """Run every handler and payload size in a fresh interpreter and print a report"""
+    print('{:<30} {:>8} {:>6} {:>11} {:>11} {:>13} {:>10}'.format(
+        'handler', 'size', 'status', 'import ms', 'first ms', 'median ms', 'p95 ms'))
+    for handler_name in HANDLERS:
+        for size in sizes:
+            output = subprocess.run([sys.executable, os.path.realpath(__file__), '--child', handler_name,
+                                     '--sizes', str(size), '--iterations', str(iterations)],
+                                    check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            print('{handler:<30} {size:>8} {status:>6} {import_ms:>11.1f} {first_ms:>11.2f} '
+                  '{steady_median_ms:>13.2f} {steady_p95_ms:>10.2f}'.format(**result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='0,100,1000', help='comma separated counts of allocated CIDRs')
+    parser.add_argument('--iterations', type=int, default=10, help='steady-state calls per measurement')
+    parser.add_argument('--child', metavar='HANDLER', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if args.child:
+        run_child(args.child, sizes[0], args.iterations)
+    else:
+        run_parent(sizes, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
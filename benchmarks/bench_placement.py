@@ -0,0 +1,112 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Placement policy simulation.
+
+Replays the same seeded mix of reserve and release requests against each placement policy of
+cidr_allocator.py, and reports the reject rate, the request of the first reject, the final utilization and
+fragmentation, the number of requests of the largest size still placeable, and the mean placement time.
+Fragmentation is the share of the free addresses outside the largest free aligned block. Once the root CIDRs
+are nearly full, a policy which packs more addresses can reject more requests, so compare reject rates
+together with the utilization.
+
+Usage:
+    python benchmarks/bench_placement.py [--requests 5000] [--release-rate 0.3] [--seed 1]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(BASE_PATH, '..', 'cidr_management'))
+
+from utils import cidr_allocator  # noqa: E402
+
+ROOT_CIDRS = ['10.0.0.0/12', '10.32.0.0/14']
+# Requested prefix and weight of the request mix
+REQUEST_MIX = {27: 30, 26: 15, 24: 25, 22: 15, 20: 8, 19: 4, 18: 2, 17: 1}
+
+
+def build_requests(count, release_rate, seed):
+    """Seeded list of ('reserve', prefix) and ('release', index of the live allocation) requests"""
+    generator = random.Random(seed)
+    prefixes = list(REQUEST_MIX)
+    weights = [REQUEST_MIX[prefix] for prefix in prefixes]
+    requests = []
+    for _ in range(count):
+        if generator.random() < release_rate:
+            requests.append(('release', generator.random()))
+        else:
+            requests.append(('reserve', generator.choices(prefixes, weights)[0]))
+    return requests
+
+
+def count_free_blocks(used, prefix):
+    """Number of free aligned blocks of a prefix, the requests of that size which could still be placed"""
+    block_size = 2 ** (32 - prefix)
+    count = 0
+    for root_start, root_end in cidr_allocator.root_ranges(ROOT_CIDRS, prefix):
+        for start, end in used.free_ranges(root_start, root_end):
+            count += max(0, (end + 1) // block_size - cidr_allocator.align_up(start, block_size) // block_size)
+    return count
+
+
+def simulate(policy, requests):
+    """Replay the requests against a policy and return its statistics"""
+    # Integer ranges of the live allocations
+    allocated = []
+    reserves = rejects = 0
+    first_reject = None
+    cursors = {}
+    placement_seconds = 0.0
+    for kind, value in requests:
+        if kind == 'release':
+            if allocated:
+                allocated.pop(int(value * len(allocated)))
+            continue
+        reserves += 1
+        used = cidr_allocator.UsedRanges(ranges=allocated)
+        start = time.perf_counter()
+        network = cidr_allocator.place(policy, ROOT_CIDRS, used, value, cursors.get(value))
+        placement_seconds += time.perf_counter() - start
+        if network is None:
+            rejects += 1
+            first_reject = first_reject or reserves
+            continue
+        allocated.append((int(network.network_address), int(network.broadcast_address)))
+        cursors[value] = cidr_allocator.next_cursor(network)
+    used = cidr_allocator.UsedRanges(ranges=allocated)
+    return {
+        'policy': policy,
+        'reserves': reserves,
+        'reject_rate': rejects / reserves if reserves else 0.0,
+        'first_reject': first_reject or '-',
+        'utilization': sum(end - start + 1 for start, end in used.ranges) / sum(
+            end - start + 1 for start, end in cidr_allocator.root_ranges(ROOT_CIDRS, 32)),
+        'fragmentation': cidr_allocator.fragmentation(ROOT_CIDRS, used),
+        'free_largest': count_free_blocks(used, min(REQUEST_MIX)),
+        'placement_us': placement_seconds / reserves * 1e6 if reserves else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000, help='number of replayed requests')
+    parser.add_argument('--release-rate', type=float, default=0.3, help='share of release requests')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the request mix')
+    args = parser.parse_args()
+    requests = build_requests(args.requests, args.release_rate, args.seed)
+    print('{:<10} {:>9} {:>12} {:>13} {:>12} {:>14} {:>9} {:>13}'.format(
+        'policy', 'reserves', 'reject rate', 'first reject', 'utilization', 'fragmentation',
+        'free /{}'.format(min(REQUEST_MIX)), 'placement us'))
+    for policy in cidr_allocator.POLICIES:
+        result = simulate(policy, requests)
+        print('{policy:<10} {reserves:>9} {reject_rate:>12.2%} {first_reject:>13} {utilization:>12.2%} '
+              '{fragmentation:>14.2%} {free_largest:>9} {placement_us:>13.1f}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
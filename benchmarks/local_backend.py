@@ -0,0 +1,273 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""In-memory stand-in for the DynamoDB and SSM APIs used by the CIDR management handlers"""
+import re
+import json
+import math
+import copy
+import decimal
+from botocore.exceptions import ClientError
+
+# Approximate item size used to compute consumed capacity
+ITEM_SIZE_BYTES = 200
+# Items returned per scan/query page, standing in for the 1 MB page limit
+PAGE_SIZE = 1000
+# Actions of an update expression and their clauses
+UPDATE_CLAUSE_PATTERN = re.compile(r'(SET|REMOVE|ADD)\s+(.*?)(?=\s+(?:SET|REMOVE|ADD)\s|$)', re.IGNORECASE | re.DOTALL)
+
+
+class ConditionalCheckFailedException(ClientError):
+    """Raised like botocore when a condition expression fails"""
+
+    def __init__(self, operation_name='PutItem'):
+        super().__init__({'Error': {'Code': 'ConditionalCheckFailedException',
+                                    'Message': 'The conditional request failed'}}, operation_name)
+
+
+class ParameterNotFound(Exception):
+    """Raised like the SSM ParameterNotFound error"""
+
+
+class _Exceptions(object):
+    ParameterNotFound = ParameterNotFound
+    ConditionalCheckFailedException = ConditionalCheckFailedException
+
+
+def evaluate(condition, item):
+    """
+    Evaluate a boto3 condition object against an item
+
+    Args:
+        condition: boto3.dynamodb.conditions condition
+        item: item dict
+
+    Returns: bool
+    """
+    if condition is None:
+        return True
+    name = type(condition).__name__
+    values = condition.get_expression()['values']
+    if name == 'And':
+        return evaluate(values[0], item) and evaluate(values[1], item)
+    if name == 'Or':
+        return evaluate(values[0], item) or evaluate(values[1], item)
+    if name == 'Not':
+        return not evaluate(values[0], item)
+    attr = values[0].name
+    if name == 'AttributeExists':
+        return attr in item
+    if name == 'AttributeNotExists':
+        return attr not in item
+    if attr not in item:
+        return False
+    value = item[attr]
+    if name == 'Equals':
+        return value == values[1]
+    if name == 'NotEquals':
+        return value != values[1]
+    if name == 'LessThan':
+        return value < values[1]
+    if name == 'LessThanEquals':
+        return value <= values[1]
+    if name == 'GreaterThan':
+        return value > values[1]
+    if name == 'GreaterThanEquals':
+        return value >= values[1]
+    if name == 'Between':
+        return values[1] <= value <= values[2]
+    if name == 'BeginsWith':
+        return str(value).startswith(values[1])
+    if name == 'In':
+        return value in values[1]
+    raise NotImplementedError(name)
+
+
+def _capacity(table_name, units):
+    return {'TableName': table_name, 'CapacityUnits': float(units)}
+
+
+def _read_units(item_count):
+    return math.ceil(max(item_count, 1) * ITEM_SIZE_BYTES / 4096.0) * 0.5
+
+
+class LocalTable(object):
+    """In-memory DynamoDB table with a hash key and optional global secondary indexes"""
+
+    def __init__(self, name, hash_key='cidr_block', indexes=None):
+        self.name = name
+        self.hash_key = hash_key
+        # Index name -> (hash attribute, range attribute or None)
+        self.indexes = indexes or {}
+        self.items = {}
+
+    def _key(self, key):
+        return key[self.hash_key]
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        current = self.items.get(Item[self.hash_key], {})
+        if not evaluate(ConditionExpression, current):
+            raise ConditionalCheckFailedException()
+        self.items[Item[self.hash_key]] = copy.deepcopy(Item)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}, 'ConsumedCapacity': _capacity(self.name, 1)}
+
+    def get_item(self, Key, **kwargs):
+        response = {'ResponseMetadata': {'HTTPStatusCode': 200}, 'ConsumedCapacity': _capacity(self.name, 0.5)}
+        if self._key(Key) in self.items:
+            response['Item'] = copy.deepcopy(self.items[self._key(Key)])
+        return response
+
+    def delete_item(self, Key, ConditionExpression=None, ReturnValues=None, **kwargs):
+        current = self.items.get(self._key(Key), {})
+        if not evaluate(ConditionExpression, current):
+            raise ConditionalCheckFailedException()
+        removed = self.items.pop(self._key(Key), None)
+        response = {'ResponseMetadata': {'HTTPStatusCode': 200}, 'ConsumedCapacity': _capacity(self.name, 1)}
+        if ReturnValues == 'ALL_OLD' and removed:
+            response['Attributes'] = removed
+        return response
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeValues=None,
+                    ExpressionAttributeNames=None, ReturnValues=None, **kwargs):
+        current = self.items.get(self._key(Key), {})
+        if not evaluate(ConditionExpression, current):
+            raise ConditionalCheckFailedException()
+        item = copy.deepcopy(current) if current else dict(Key)
+        _apply_update(item, UpdateExpression, ExpressionAttributeValues or {}, ExpressionAttributeNames or {})
+        self.items[self._key(Key)] = item
+        response = {'ResponseMetadata': {'HTTPStatusCode': 200}, 'ConsumedCapacity': _capacity(self.name, 1)}
+        if ReturnValues:
+            response['Attributes'] = copy.deepcopy(item)
+        return response
+
+    def scan(self, FilterExpression=None, ProjectionExpression=None, ExclusiveStartKey=None, Limit=None,
+             Segment=0, TotalSegments=1, **kwargs):
+        keys = sorted(self.items)
+        keys = [key for index, key in enumerate(keys) if index % TotalSegments == Segment]
+        return self._page([self.items[key] for key in keys], FilterExpression, ProjectionExpression,
+                          ExclusiveStartKey, Limit, lambda item: item[self.hash_key])
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None, ProjectionExpression=None,
+              ExclusiveStartKey=None, Limit=None, ScanIndexForward=True, **kwargs):
+        hash_attr, range_attr = self.indexes[IndexName] if IndexName else (self.hash_key, None)
+        candidates = [item for item in self.items.values()
+                      if hash_attr in item and (range_attr is None or range_attr in item)
+                      and evaluate(KeyConditionExpression, item)]
+        candidates.sort(key=lambda item: (item.get(range_attr, 0) if range_attr else 0, item[self.hash_key]),
+                        reverse=not ScanIndexForward)
+        return self._page(candidates, FilterExpression, ProjectionExpression, ExclusiveStartKey, Limit,
+                          lambda item: item[self.hash_key])
+
+    def _page(self, items, filter_expression, projection_expression, exclusive_start_key, limit, key_of):
+        start = 0
+        if exclusive_start_key:
+            keys = [key_of(item) for item in items]
+            start = keys.index(exclusive_start_key[self.hash_key]) + 1
+        page_size = min(limit or PAGE_SIZE, PAGE_SIZE)
+        page = items[start:start + page_size]
+        matched = [item for item in page if evaluate(filter_expression, item)]
+        if projection_expression:
+            attributes = [attribute.strip() for attribute in projection_expression.split(',')]
+            matched = [{key: item[key] for key in attributes if key in item} for item in matched]
+        response = {
+            'Items': copy.deepcopy(matched),
+            'Count': len(matched),
+            'ScannedCount': len(page),
+            'ConsumedCapacity': _capacity(self.name, _read_units(len(page))),
+            'ResponseMetadata': {'HTTPStatusCode': 200}
+        }
+        if start + page_size < len(items):
+            response['LastEvaluatedKey'] = {self.hash_key: key_of(page[-1])}
+        return response
+
+
+def _apply_update(item, expression, values, names):
+    """Apply a SET/REMOVE/ADD update expression with placeholder values to an item"""
+    for action, body in UPDATE_CLAUSE_PATTERN.findall(expression):
+        for clause in [clause.strip() for clause in body.split(',') if clause.strip()]:
+            if action.upper() == 'SET':
+                attribute, value = [part.strip() for part in clause.split('=', 1)]
+                item[names.get(attribute, attribute)] = values[value]
+            elif action.upper() == 'REMOVE':
+                item.pop(names.get(clause, clause), None)
+            else:
+                attribute, value = clause.split()
+                attribute = names.get(attribute, attribute)
+                item[attribute] = item.get(attribute, 0) + values[value]
+
+
+class LocalDynamoDB(object):
+    """In-memory stand-in for the boto3 DynamoDB service resource"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def create_table(self, name, **kwargs):
+        self.tables[name] = LocalTable(name, **kwargs)
+        return self.tables[name]
+
+    def Table(self, name):
+        if name not in self.tables:
+            self.create_table(name)
+        return self.tables[name]
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        for table_name, requests in RequestItems.items():
+            table = self.Table(table_name)
+            for request in requests:
+                if 'PutRequest' in request:
+                    table.put_item(Item=request['PutRequest']['Item'])
+                else:
+                    table.delete_item(Key=request['DeleteRequest']['Key'])
+        return {'UnprocessedItems': {}, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+class LocalSSM(object):
+    """In-memory stand-in for the boto3 SSM client"""
+    exceptions = _Exceptions
+
+    def __init__(self):
+        self.parameters = {}
+
+    def put_parameter(self, Name, Value, **kwargs):
+        version = self.parameters.get(Name, {}).get('Version', 0) + 1
+        self.parameters[Name] = {'Name': Name, 'Value': Value, 'Version': version, 'Type': 'String'}
+        return {'Version': version}
+
+    def get_parameter(self, Name, **kwargs):
+        if Name not in self.parameters:
+            raise ParameterNotFound(Name)
+        return {'Parameter': dict(self.parameters[Name])}
+
+    def get_parameters_by_path(self, Path, NextToken=None, MaxResults=10, **kwargs):
+        names = sorted(name for name in self.parameters if name.startswith(Path.rstrip('/') + '/'))
+        start = int(NextToken or 0)
+        response = {'Parameters': [dict(self.parameters[name]) for name in names[start:start + MaxResults]]}
+        if start + MaxResults < len(names):
+            response['NextToken'] = str(start + MaxResults)
+        return response
+
+
+def install(region_params=None, items=None, table_name='AllocatedCidrTracking', indexes=None):
+    """
+    Install the local backend in the shared client cache of the handlers
+
+    Args:
+        region_params: dict of region -> region param value
+        items: items loaded into the CIDR table
+        table_name: CIDR table name
+        indexes: global secondary indexes of the CIDR table, index name -> (hash, range)
+
+    Returns: (LocalDynamoDB, LocalSSM)
+    """
+    from utils import aws_clients
+    dynamodb = LocalDynamoDB()
+    table = dynamodb.create_table(table_name, indexes=indexes)
+    for item in items or []:
+        table.items[item['cidr_block']] = json.loads(json.dumps(item), parse_float=decimal.Decimal)
+    ssm = LocalSSM()
+    for region, value in (region_params or {}).items():
+        ssm.put_parameter(Name='/vpcx/aws/regions/{}'.format(region), Value=json.dumps(value))
+    aws_clients._RESOURCES['dynamodb'] = dynamodb
+    aws_clients._CLIENTS['ssm'] = ssm
+    return dynamodb, ssm
@@ -5,21 +5,25 @@
 import os
 import logging
 import traceback
-from utils import cidr_lookups
+from utils import cidr_lookups, capacity, profiling
+from utils.logging_utils import summarize_event
 from utils.cidr_lookups import InputValidationError, InvalidCloudProviderError
 
 # Initialize Logger
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # CIDR DDB Table
 ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
 
 
+@profiling.profiled
 def handler(event, context):
     """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
     try:
-        LOGGER.info('Received CIDR flag request event: %s', event)
+        LOGGER.info('Received CIDR flag request event: %s', summarize_event(event))
         try:
             # Extract and validate request params
             request_params = cidr_lookups.extract_put_request_params(event)
@@ -44,3 +48,6 @@ def handler(event, context):
             'statusCode': 500,
             'body': str(error)
         }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
@@ -0,0 +1,106 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Lambda function to check external CIDR blocks against allocations and root CIDRs.
+
+Allocations are read from the container's allocation snapshot, which is up to ALLOCATION_CACHE_TTL seconds old.
+The response reports the age of the snapshot, and "fresh": true in the request scans the table instead.
+"""
+import os
+import json
+import time
+import logging
+import traceback
+from utils import cidr_lookups, cidr_ranges, allocation_cache, capacity, profiling
+from utils.cidr_lookups import InputValidationError, InvalidCloudProviderError, MissingRegionError
+from utils.logging_utils import summarize_event
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDR DDB Table
+ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received CIDR overlap check event: %s', summarize_event(event))
+        try:
+            # Extract and validate request params
+            request_params = cidr_lookups.extract_overlap_request_params(event)
+        except InputValidationError as err:
+            LOGGER.error(err)
+            return {
+                'statusCode': 400,
+                'body': str(err.message)
+            }
+        # Unpack params
+        cidrs = request_params.get('cidrs')
+        region = request_params.get('region')
+        cloud_provider = request_params.get('cloud_provider')
+        # Retrieve root CIDRs of the requested region, or of all regions
+        try:
+            if region:
+                root_cidrs = {region: cidr_lookups.retrieve_region_cidr(region, cloud_provider)}
+            else:
+                root_cidrs = {region_name: param.get('master-cidr', {}).get(cloud_provider, {}).get('cidrs', [])
+                              for region_name, param in cidr_lookups.retrieve_all_region_params().items()}
+        except InvalidCloudProviderError:
+            return {
+                'statusCode': 400,
+                'body': "Invalid cloud provider."
+            }
+        except MissingRegionError:
+            return {
+                'statusCode': 404,
+                'body': "No root CIDR list found for the specified region."
+            }
+        # Retrieve allocations from the cached snapshot, or from a new scan for fresh checks
+        snapshot = allocation_cache.get_snapshot(cloud_provider, ALLOCATED_CIDR_DDB_TABLE_NAME,
+                                                 fresh=request_params.get('fresh'))
+        allocations = snapshot['items']
+        if region:
+            allocations = [item for item in allocations if item.get('region') == region.upper()]
+        # Check all CIDRs in a single sweep
+        references = [(item['cidr_block'], {
+            'type': 'allocation',
+            'cidr_block': item['cidr_block'],
+            'account_alias': item.get('account_alias'),
+            'region': item.get('region')
+        }) for item in allocations]
+        references.extend((root_cidr, {
+            'type': 'root_pool',
+            'cidr_block': root_cidr,
+            'region': region_name
+        }) for region_name, region_root_cidrs in root_cidrs.items() for root_cidr in region_root_cidrs)
+        overlaps = cidr_ranges.find_overlaps([(cidr, cidr) for cidr in cidrs], references)
+        LOGGER.info("Found %s conflicts for %s CIDRs against %s allocations and root CIDRs", len(overlaps),
+                    len(cidrs), len(references))
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'checked': len(cidrs),
+                'conflicts': [dict(reference, cidr=cidr) for cidr, reference in overlaps],
+                # Seconds since the allocations were read, CIDRs reserved since then are not checked
+                'snapshot_age': round(time.time() - snapshot['created'], 3)
+            })
+        }
+    except capacity.ReadBudgetExceededError as error:
+        LOGGER.error("Error: %s", error.message)
+        return capacity.budget_exceeded_response(error)
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
@@ -3,23 +3,30 @@
 
 """Lambda function to reserve available CIDR blocks"""
 import os
+import json
 import logging
 import traceback
-from utils import cidr_lookups, cidr_lock
+from utils import cidr_lookups, cidr_lock, cidr_allocator, slab_pools, placement_preview, capacity, profiling
+from utils.logging_utils import summarize_event, summarize_list
 from utils.cidr_lookups import InputValidationError, NoValidSubnetError, InvalidCloudProviderError, MissingRegionError
 
 # Initialize Logger
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # CIDR DDB Table
 ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
 
 
+@profiling.profiled
 def handler(event, context):
     """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    # Set while this request holds the CIDR table lock, dry runs and idempotent replays never take it
+    lock_held = False
     try:
-        LOGGER.info('Received CIDR reserve request event: %s', event)
+        LOGGER.info('Received CIDR reserve request event: %s', summarize_event(event))
         try:
             # Extract and validate request params
             request_params = cidr_lookups.extract_post_request_params(event)
@@ -34,17 +41,51 @@ def handler(event, context):
         cidr_size = request_params.get('size')
         region = request_params.get('region')
         cloud_provider = request_params.get('cloud_provider')
-        LOGGER.info("Request info: subnet size {}, region {}, account_alias {}, cloud {}"
-                    .format(cidr_size, region, region, account_alias, cloud_provider))
+        affinity = request_params.get('affinity')
+        LOGGER.info("Request info: subnet size %s, region %s, account_alias %s, cloud %s, affinity %s",
+                    cidr_size, region, account_alias, cloud_provider, affinity)
+        # Dry runs are served from the cached allocation snapshot, without the table lock or any write
+        if request_params.get('dry_run'):
+            try:
+                placements = placement_preview.preview_placements(region, cloud_provider,
+                                                                  request_params.get('sizes'), account_alias,
+                                                                  affinity, ALLOCATED_CIDR_DDB_TABLE_NAME)
+            except InvalidCloudProviderError:
+                return {
+                    'statusCode': 400,
+                    'body': "Invalid cloud provider."
+                }
+            except MissingRegionError:
+                return {
+                    'statusCode': 404,
+                    'body': "No root CIDR list found for the specified region."
+                }
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'dry_run': True,
+                    'region': region,
+                    'placements': placements
+                })
+            }
+        # A retried request returns the CIDR reserved by the original request, without the lock or a scan
+        idempotency_key = request_params.get('idempotency_key')
+        if idempotency_key:
+            response = cidr_lookups.retrieve_idempotent_reservation(idempotency_key, account_alias, cidr_size,
+                                                                    region, cloud_provider,
+                                                                    ALLOCATED_CIDR_DDB_TABLE_NAME)
+            if response is not None:
+                return response
         # Get CIDR lock
         try:
             cidr_lock.sync_obtain_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
         except cidr_lock.FailedToGetLockException:
-            LOGGER.exception("Returning after failed to get lock:{}".format(cidr_lock.FailedToGetLockException))
+            LOGGER.exception("Returning after failed to get lock.")
             return {
                 'statusCode': 500,
                 'body': "Failed to get CIDR table lock."
             }
+        lock_held = True
         # Retrieve regions CIDR list
         try:
             region_cidr_list = cidr_lookups.retrieve_region_cidr(region, cloud_provider)
@@ -63,15 +104,72 @@ def handler(event, context):
                 'body': "No root CIDR list found for the specified region."
             }
         LOGGER.info("Retrieved region CIDR list: %s", region_cidr_list)
+        # Retrieve size-class slabs of the region, from the cached region param
+        size_classes = slab_pools.size_classes(cidr_lookups.retrieve_region_param(region), cloud_provider)
+        locked_cidr_list = None
+        if affinity:
+            locked_cidr_list = cidr_lookups.retrieve_used_cidrs(region, False, False, cloud_provider.lower(),
+                                                                ALLOCATED_CIDR_DDB_TABLE_NAME)
+            # Slabs of other size classes are only allocated at their size
+            other_slab_cidr_list = [cidr for prefix, class_cidrs in size_classes.items()
+                                    if prefix != int(cidr_size) for cidr in class_cidrs]
+            # Place next to the account's CIDRs, queried from the account GSI
+            account_cidr_list = cidr_lookups.retrieve_account_cidrs(account_alias, cloud_provider, region,
+                                                                    ALLOCATED_CIDR_DDB_TABLE_NAME)
+            available_cidr = cidr_allocator.affinity(region_cidr_list,
+                                                     cidr_allocator.UsedRanges(locked_cidr_list + other_slab_cidr_list),
+                                                     cidr_size, account_cidr_list)
+            if available_cidr is not None:
+                LOGGER.info('Allocating CIDR block %s next to account CIDRs in %s', available_cidr, region)
+                response = cidr_lookups.reserve_cidr(available_cidr, region,
+                                                     account_alias, cloud_provider,
+                                                     ALLOCATED_CIDR_DDB_TABLE_NAME,
+                                                     idempotency_key=idempotency_key,
+                                                     check_neighbors=False)
+                if response['statusCode'] == 200:
+                    LOGGER.info('CIDR allocation status: %s', response)
+                    # Clear CIDR lock
+                    cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+                    return response
+            LOGGER.info('No free CIDR block next to the CIDRs of %s, falling back to %s', account_alias,
+                        cidr_lookups.ALLOCATION_POLICY)
+        if int(cidr_size) in size_classes:
+            stack_key = slab_pools.stack_key(cloud_provider, region, cidr_size)
+            # Build the free stack of the size class from a table scan, once per SLAB_STACK_TTL
+            if not slab_pools.has_free_stack(stack_key):
+                # Reuse the CIDRs already scanned for affinity placement
+                if locked_cidr_list is None:
+                    locked_cidr_list = cidr_lookups.retrieve_used_cidrs(region, False, False, cloud_provider.lower(),
+                                                                        ALLOCATED_CIDR_DDB_TABLE_NAME)
+                slab_pools.build_free_stack(stack_key, size_classes[int(cidr_size)], locked_cidr_list)
+            # Pop and reserve a free block of the slab
+            response = slab_pools.reserve_from_stack(stack_key, account_alias, ALLOCATED_CIDR_DDB_TABLE_NAME,
+                                                     idempotency_key=idempotency_key)
+            if response is not None:
+                LOGGER.info('CIDR allocation status: %s', response)
+                # Clear CIDR lock
+                cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+                return response
         # Retrieve allocated VPC CIDRs in region
-        locked_cidr_list = cidr_lookups.retrieve_used_cidrs(region, False, False, cloud_provider.lower(),
-                                                            ALLOCATED_CIDR_DDB_TABLE_NAME)
-        LOGGER.info('Retrieve locked CIDR blocks in %s: %s', region, locked_cidr_list)
+        if locked_cidr_list is None:
+            locked_cidr_list = cidr_lookups.retrieve_used_cidrs(region, False, False, cloud_provider.lower(),
+                                                                ALLOCATED_CIDR_DDB_TABLE_NAME)
+        LOGGER.info('Retrieve locked CIDR blocks in %s: %s', region, summarize_list(locked_cidr_list))
+        # Slabs are only allocated at their size class, the general allocator treats them as used
+        slab_cidr_list = [cidr for class_cidrs in size_classes.values() for cidr in class_cidrs]
+        # Resume next-fit placement from the cursor of the region and size
+        policy = cidr_lookups.ALLOCATION_POLICY
+        cursor = None
+        if policy == cidr_allocator.NEXT_FIT:
+            cursor = cidr_lookups.retrieve_allocation_cursor(region, cloud_provider, cidr_size,
+                                                             ALLOCATED_CIDR_DDB_TABLE_NAME)
         # Find the next available CIDR, if one exists
         try:
             available_cidr = cidr_lookups.find_available_cidr(region_cidr_list,
-                                                              locked_cidr_list,
-                                                              cidr_size)
+                                                              locked_cidr_list + slab_cidr_list,
+                                                              cidr_size,
+                                                              policy=policy,
+                                                              cursor=cursor)
         except NoValidSubnetError as e:
             traceback.print_exc()
             LOGGER.info("No valid subnet found: %s", str(e))
@@ -81,21 +179,38 @@ def handler(event, context):
                 'statusCode': 404,
                 'body': "No CIDR blocks of appropriate size found."
             }
-        # Reserve CIDR
+        # Reserve CIDR, picked from the scan under the lock, so the neighbor check of the region GSI is skipped
         LOGGER.info('Allocating CIDR block %s in %s', available_cidr, region)
         response = cidr_lookups.reserve_cidr(available_cidr, region,
                                              account_alias, cloud_provider,
-                                             ALLOCATED_CIDR_DDB_TABLE_NAME)
+                                             ALLOCATED_CIDR_DDB_TABLE_NAME,
+                                             idempotency_key=idempotency_key,
+                                             check_neighbors=False)
         LOGGER.info('CIDR allocation status: %s', response)
+        # Move the cursor past the reserved CIDR
+        if policy == cidr_allocator.NEXT_FIT and response['statusCode'] == 200:
+            cidr_lookups.save_allocation_cursor(region, cloud_provider, cidr_size,
+                                                cidr_allocator.next_cursor(available_cidr),
+                                                ALLOCATED_CIDR_DDB_TABLE_NAME)
         # Clear CIDR lock
         cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
         return response
+    except capacity.ReadBudgetExceededError as error:
+        LOGGER.error("Error: %s", error.message)
+        # Clear CIDR lock, only if this request took it
+        if lock_held:
+            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        return capacity.budget_exceeded_response(error)
     except Exception as error:
         traceback.print_exc()
         LOGGER.error("Error: %s", str(error))
-        # Clear CIDR lock
-        cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        # Clear CIDR lock, only if this request took it
+        if lock_held:
+            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
         return {
             'statusCode': 500,
             'body': str(error)
         }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
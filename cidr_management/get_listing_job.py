@@ -0,0 +1,80 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function to return the status and result chunks of an asynchronous listing job"""
+import os
+import json
+import logging
+import traceback
+from utils import cidr_lookups, listing_jobs, capacity, profiling
+from utils.cidr_lookups import InputValidationError
+from utils.logging_utils import summarize_event
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received listing job request event: %s', summarize_event(event))
+        try:
+            # Extract and validate request params
+            request_params = cidr_lookups.extract_job_request_params(event)
+        except InputValidationError as err:
+            LOGGER.error(err)
+            return {
+                'statusCode': 400,
+                'body': str(err.message)
+            }
+        # Unpack params
+        job_id = request_params.get('job_id')
+        chunk = request_params.get('chunk')
+        # Read job status
+        status = listing_jobs.get_status(job_id)
+        if status is None:
+            return {
+                'statusCode': 404,
+                'body': "Job not found."
+            }
+        # Without a chunk, return the status
+        if chunk is None:
+            return {
+                'statusCode': 200,
+                'body': json.dumps(status)
+            }
+        # Chunks are only served once the whole listing is written
+        if status['status'] != listing_jobs.SUCCEEDED:
+            return {
+                'statusCode': 409,
+                'body': "Job has not succeeded, status {}.".format(status['status'])
+            }
+        cidrs = listing_jobs.get_chunk(job_id, chunk) if chunk < status['chunks'] else None
+        if cidrs is None:
+            return {
+                'statusCode': 404,
+                'body': "Chunk not found."
+            }
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'job_id': job_id,
+                'chunk': chunk,
+                'cidrs': cidrs,
+                'next_chunk': chunk + 1 if chunk + 1 < status['chunks'] else None
+            })
+        }
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
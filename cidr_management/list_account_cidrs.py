@@ -0,0 +1,73 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function to list the CIDR blocks of an account"""
+import os
+import json
+import logging
+import traceback
+from utils import cidr_lookups, capacity, profiling
+from utils.cidr_lookups import InputValidationError
+from utils.logging_utils import summarize_event
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDR DDB Table
+ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received account CIDRs request event: %s', summarize_event(event))
+        try:
+            # Extract and validate request params
+            request_params = cidr_lookups.extract_account_request_params(event)
+        except InputValidationError as err:
+            LOGGER.error(err)
+            return {
+                'statusCode': 400,
+                'body': str(err.message)
+            }
+        # Unpack params
+        account_alias = request_params.get('account_alias')
+        # Query one page of the account GSI
+        items, last_key = cidr_lookups.retrieve_account_allocations(account_alias,
+                                                                    ALLOCATED_CIDR_DDB_TABLE_NAME,
+                                                                    request_params.get('cloud_provider'),
+                                                                    request_params.get('region'),
+                                                                    request_params.get('limit'),
+                                                                    request_params.get('exclusive_start_key'))
+        LOGGER.info("Returning %s CIDRs of account %s", len(items), account_alias)
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'account_alias': account_alias.upper(),
+                'cidrs': [{
+                    'cidr_block': item.get('cidr_block'),
+                    'region': item.get('region'),
+                    'cloud': item.get('cloud'),
+                    'locked': item.get('locked'),
+                    'assigned': item.get('assigned')
+                } for item in items],
+                'next_token': cidr_lookups.encode_next_token(last_key)
+            })
+        }
+    except capacity.ReadBudgetExceededError as error:
+        LOGGER.error("Error: %s", error.message)
+        return capacity.budget_exceeded_response(error)
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
@@ -0,0 +1,46 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function computing the listing of an asynchronous listing job"""
+import os
+import json
+import logging
+import traceback
+from utils import listing_jobs, capacity, profiling
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDR DDB Table
+ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received listing job event: %s', event)
+        status = listing_jobs.run_job(event['job_id'], ALLOCATED_CIDR_DDB_TABLE_NAME)
+        return {
+            'statusCode': 200,
+            'body': json.dumps(status)
+        }
+    except listing_jobs.JobNotFoundError as error:
+        LOGGER.error("Error: %s", error.message)
+        return {
+            'statusCode': 404,
+            'body': error.message
+        }
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
@@ -0,0 +1,73 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function to find the allocation owning an IP address or CIDR block"""
+import os
+import json
+import logging
+import traceback
+from utils import cidr_lookups, allocation_cache, capacity, profiling
+from utils.cidr_lookups import InputValidationError
+from utils.logging_utils import summarize_event
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDR DDB Table
+ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received CIDR lookup request event: %s', summarize_event(event))
+        try:
+            # Extract and validate request params
+            request_params = cidr_lookups.extract_lookup_request_params(event)
+        except InputValidationError as err:
+            LOGGER.error(err)
+            return {
+                'statusCode': 400,
+                'body': str(err.message)
+            }
+        # Unpack params
+        ip = request_params.get('ip')
+        cloud_provider = request_params.get('cloud_provider')
+        # Find the most specific allocation containing the IP, from the cached snapshot
+        owner_trie = allocation_cache.get_owner_trie(cloud_provider, ALLOCATED_CIDR_DDB_TABLE_NAME)
+        match = owner_trie.longest_match(ip)
+        if match is None:
+            return {
+                'statusCode': 404,
+                'body': "No allocation found for the specified IP."
+            }
+        allocation = match[1]
+        LOGGER.info("IP %s is owned by %s", ip, allocation.get('cidr_block'))
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'cidr_block': allocation.get('cidr_block'),
+                'account_alias': allocation.get('account_alias'),
+                'region': allocation.get('region'),
+                'cloud': allocation.get('cloud'),
+                'locked': allocation.get('locked'),
+                'assigned': allocation.get('assigned')
+            })
+        }
+    except capacity.ReadBudgetExceededError as error:
+        LOGGER.error("Error: %s", error.message)
+        return capacity.budget_exceeded_response(error)
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
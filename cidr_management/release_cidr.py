@@ -0,0 +1,51 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function to release CIDR blocks"""
+import os
+import logging
+import traceback
+from utils import cidr_lookups, capacity, profiling
+from utils.logging_utils import summarize_event
+from utils.cidr_lookups import InputValidationError
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDR DDB Table
+ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
+
+
+@profiling.profiled
+def handler(event, context):
+    """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    try:
+        LOGGER.info('Received CIDR release request event: %s', summarize_event(event))
+        try:
+            # Extract and validate request params
+            request_params = cidr_lookups.extract_delete_request_params(event)
+        except InputValidationError as err:
+            LOGGER.error(err)
+            return {
+                'statusCode': 400,
+                'body':  str(err.message)
+            }
+        # Unpack params
+        cidr_block = request_params.get('cidr_block')
+        cloud_provider = request_params.get('cloud_provider')
+        region = request_params.get('region')
+        # Delete and archive CIDR
+        return cidr_lookups.release_cidr(cidr_block, cloud_provider, region, ALLOCATED_CIDR_DDB_TABLE_NAME)
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 500,
+            'body': str(error)
+        }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
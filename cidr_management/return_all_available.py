@@ -7,21 +7,27 @@ import os
 import json
 import traceback
 import logging
-from utils import cidr_lookups, cidr_lock
+from utils import cidr_lookups, cidr_lock, capacity, profiling, listing_jobs, cidr_ranges, http_encoding
+from utils.logging_utils import summarize_event, summarize_list
 from utils.cidr_lookups import InputValidationError, InvalidCloudProviderError, MissingRegionError
 
 # Initialize Logger
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # CIDR DDB Table
 ALLOCATED_CIDR_DDB_TABLE_NAME = os.environ['ALLOCATED_CIDR_DDB_TABLE_NAME']
 
 
+@profiling.profiled
 def handler(event, context):
     """Lambda handler"""
+    # Reset consumed capacity counters for this request
+    capacity.reset()
+    # Set while this request holds the CIDR table lock
+    lock_held = False
     try:
-        LOGGER.info('Received CIDR return available event: %s', event)
+        LOGGER.info('Received CIDR return available event: %s', summarize_event(event))
         try:
 
             # Extract and validate request params
@@ -38,77 +44,105 @@ def handler(event, context):
         is_assigned = request_params.get('assigned')
         is_locked = request_params.get('locked')
         cloud_provider = request_params.get('cloud_provider')
-        LOGGER.info("Request info: subnet size {}, region {}, assigned {}, locked {}, cloud {}"
-                    .format(subnet_prefix, region, is_assigned, is_locked, cloud_provider))
-        # Get CIDR lock
-        try:
-            cidr_lock.sync_obtain_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
-        except cidr_lock.FailedToGetLockException:
-            return {
-                'statusCode': 500,
-                'body': "Failed to get CIDR table lock."
-            }
-        # Retrieve top-level CIDRs for a region
+        LOGGER.info("Request info: subnet size %s, region %s, assigned %s, locked %s, cloud %s",
+                    subnet_prefix, region, is_assigned, is_locked, cloud_provider)
+        # Retrieve top-level CIDRs for a region, the param store read does not need the table lock
         try:
             region_cidr_list = cidr_lookups.retrieve_region_cidr(region, cloud_provider)
         except InvalidCloudProviderError:
-            # Clear CIDR lock
-            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
             return {
                 'statusCode': 400,
                 'body': "Invalid cloud provider."
             }
         except MissingRegionError:
-            # Clear CIDR lock
-            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
             return {
                 'statusCode': 404,
                 'body': "No root CIDR list found for the specified region."
             }
         LOGGER.info("Retrieved region CIDR list: %s", region_cidr_list)
+        # Start a listing job and return its id, the listing is computed by the listing job worker
+        if request_params.get('async'):
+            status = listing_jobs.start_job(request_params, ALLOCATED_CIDR_DDB_TABLE_NAME)
+            return {
+                'statusCode': 202,
+                'body': json.dumps({
+                    'job_id': status['job_id'],
+                    'status': status['status']
+                })
+            }
+        # Tag the listing with the allocation and param versions, read before the CIDRs
+        etag = cidr_lookups.listing_etag(region, cloud_provider, request_params, ALLOCATED_CIDR_DDB_TABLE_NAME)
+        if cidr_lookups.etag_matches(etag, request_params.get('if_none_match')):
+            LOGGER.info("Listing of %s not modified, ETag %s", region, etag)
+            return {
+                'statusCode': 304,
+                'headers': {'ETag': etag, 'Vary': 'Accept-Encoding'},
+                'body': ''
+            }
+        # Get CIDR lock
+        try:
+            cidr_lock.sync_obtain_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        except cidr_lock.FailedToGetLockException:
+            return {
+                'statusCode': 500,
+                'body': "Failed to get CIDR table lock."
+            }
+        lock_held = True
         # Retrieve list of CIDRs that are already allocated
         used_cidr_list = cidr_lookups.retrieve_used_cidrs(region, is_locked, is_assigned,
                                                           cloud_provider.lower(), ALLOCATED_CIDR_DDB_TABLE_NAME)
-        LOGGER.info('Retrieve used CIDR blocks in %s: %s', region, used_cidr_list)
+        LOGGER.info('Retrieve used CIDR blocks in %s: %s', region, summarize_list(used_cidr_list))
+        # Clear CIDR lock, the listing is computed from the used CIDRs
+        cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        lock_held = False
+        # Responses vary with the format and the accepted encodings
+        headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+        as_runs = request_params.get('format') == 'runs'
         # If requested locked or assigned CIDRs, return this list
         if is_locked:
-            # Clear CIDR lock
-            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+            listing = {"runs": cidr_ranges.cidr_runs(used_cidr_list)} if as_runs else {"cidrs": used_cidr_list}
+            return http_encoding.json_response(200, listing, headers, request_params.get('gzip'))
+        # If requested all CIDRs as runs, find the runs of consecutive available CIDRs
+        if as_runs:
+            runs = cidr_lookups.list_available_cidr_runs(region_cidr_list, used_cidr_list, subnet_prefix)
+            LOGGER.info('Available CIDR runs in %s: %s', region, summarize_list(runs))
+            if runs:
+                return http_encoding.json_response(200, {"runs": runs}, headers, request_params.get('gzip'))
             return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    "cidrs": used_cidr_list
-                })
+                'statusCode': 404,
+                'body': "No CIDR blocks of appropriate size found."
             }
         # If requested all CIDRs, find all all available in region
         allocated_cidr_list = cidr_lookups.list_all_available_cidr(region_cidr_list,
                                                                    used_cidr_list,
                                                                    subnet_prefix)
-        LOGGER.info('All available CIDRs in %s: %s', region, allocated_cidr_list)
+        LOGGER.info('All available CIDRs in %s: %s', region, summarize_list(allocated_cidr_list))
         # If requested all available CIDRs, return this list
         if allocated_cidr_list:
-            # Clear CIDR lock
-            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    "cidrs": allocated_cidr_list
-                })
-            }
+            return http_encoding.json_response(200, {"cidrs": allocated_cidr_list}, headers,
+                                               request_params.get('gzip'))
         # If none found, return empty
         else:
-            # Clear CIDR lock
-            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
             return {
                     'statusCode': 404,
                     'body': "No CIDR blocks of appropriate size found."
             }
+    except capacity.ReadBudgetExceededError as error:
+        LOGGER.error("Error: %s", error.message)
+        # Clear CIDR lock
+        if lock_held:
+            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        return capacity.budget_exceeded_response(error)
     except Exception as error:
         traceback.print_exc()
         LOGGER.error("Error: %s", str(error))
         # Clear CIDR lock
-        cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
+        if lock_held:
+            cidr_lock.clear_table_lock(ALLOCATED_CIDR_DDB_TABLE_NAME)
         return {
             'statusCode': 500,
             'body': str(error)
         }
+    finally:
+        # Report capacity consumed by this request
+        capacity.report()
@@ -0,0 +1,77 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Lambda function routing CIDR API requests to the CIDR management handlers"""
+import os
+import logging
+import traceback
+from utils import aws_clients, cidr_lookups
+import return_all_available
+import get_available_cidr_and_lock
+import assign_cidr
+import release_cidr
+import lookup_cidr_owner
+import check_cidr_overlaps
+import list_account_cidrs
+import get_listing_job
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Create clients and load region params during the Lambda init phase
+WARMUP_ON_INIT = os.environ.get('WARMUP_ON_INIT', 'True').upper() == 'TRUE'
+# Comma separated regions whose params are loaded during the init phase
+WARMUP_REGIONS = [region.strip() for region in os.environ.get('WARMUP_REGIONS', '').split(',') if region.strip()]
+
+# Handler of each API Gateway (method, resource)
+ROUTES = {
+    ('GET', '/v1/clouds/{cloud}/regions/{region}/cidrs'): return_all_available.handler,
+    ('POST', '/v1/clouds/{cloud}/regions/{region}/cidrs'): get_available_cidr_and_lock.handler,
+    ('PUT', '/v1/clouds/{cloud}/regions/{region}/cidrs/{cidr}'): assign_cidr.handler,
+    ('DELETE', '/v1/clouds/{cloud}/regions/{region}/cidrs/{cidr}'): release_cidr.handler,
+    ('GET', '/v1/clouds/{cloud}/lookup'): lookup_cidr_owner.handler,
+    ('POST', '/v1/clouds/{cloud}/overlaps'): check_cidr_overlaps.handler,
+    ('GET', '/v1/accounts/{alias}/cidrs'): list_account_cidrs.handler,
+    ('GET', '/v1/jobs/{job_id}'): get_listing_job.handler
+}
+
+
+def warm_up():
+    """
+    Create the AWS clients and load the region params of WARMUP_REGIONS
+
+    Returns: None
+    """
+    try:
+        aws_clients.warm_up()
+        for region in WARMUP_REGIONS:
+            cidr_lookups.retrieve_region_param(region)
+        LOGGER.info("Warmed up clients and params of regions %s", WARMUP_REGIONS)
+    except Exception as error:
+        # A failed warmup only costs the first request the time to create the clients
+        LOGGER.warning("Warmup failed: %s", str(error))
+
+
+if WARMUP_ON_INIT:
+    warm_up()
+
+
+def handler(event, context):
+    """Lambda handler"""
+    try:
+        route = ROUTES.get((event.get('httpMethod'), event.get('resource')))
+    except Exception as error:
+        traceback.print_exc()
+        LOGGER.error("Error: %s", str(error))
+        return {
+            'statusCode': 400,
+            'body': "Invalid request."
+        }
+    if route is None:
+        LOGGER.error("No route for %s %s", event.get('httpMethod'), event.get('resource'))
+        return {
+            'statusCode': 404,
+            'body': "Route not found."
+        }
+    return route(event, context)
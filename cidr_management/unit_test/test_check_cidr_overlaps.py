@@ -0,0 +1,116 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for overlap check function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+MOCK_ALLOCATIONS = [
+    {'cidr_block': '10.1.0.0/24', 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS',
+     'locked': True, 'assigned': True},
+    {'cidr_block': '10.2.0.0/24', 'account_alias': 'ITX-002', 'region': 'US-EAST-1', 'cloud': 'AWS',
+     'locked': True, 'assigned': True}
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_allocation_cache():
+    from utils import allocation_cache
+    allocation_cache.clear_cache()
+    yield
+    allocation_cache.clear_cache()
+
+
+def mock_event(body):
+    return {
+        'pathParameters': {'cloud': 'aws'},
+        'body': json.dumps(body)
+    }
+
+
+# test statusCode=200, conflicts across all regions
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+def test_handler_all_regions(mock_retrieve_all_region_params, mock_retrieve_allocations):
+    # Import
+    from cidr_management import check_cidr_overlaps
+    # Setup mock behavior
+    mock_retrieve_allocations.return_value = MOCK_ALLOCATIONS
+    mock_retrieve_all_region_params.return_value = {
+        'us-west-2': {'master-cidr': {'AWS': {'cidrs': ['10.1.0.0/16']}}},
+        'us-east-1': {'master-cidr': {'AWS': {'cidrs': ['10.2.0.0/16']}}}
+    }
+    # Call method
+    result = check_cidr_overlaps.handler(mock_event({'cidrs': ['10.1.0.128/25', '192.168.0.0/16']}), None)
+    assert result['statusCode'] == 200
+    body = json.loads(result['body'])
+    assert body['checked'] == 2
+    assert sorted((conflict['type'], conflict['cidr_block']) for conflict in body['conflicts']) == \
+        [('allocation', '10.1.0.0/24'), ('root_pool', '10.1.0.0/16')]
+    assert all(conflict['cidr'] == '10.1.0.128/25' for conflict in body['conflicts'])
+    assert 0 <= body['snapshot_age'] < 60
+
+
+# test statusCode=200, a fresh check scans the table instead of reusing the cached snapshot
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_fresh(mock_retrieve_region_cidr, mock_retrieve_allocations):
+    # Import
+    from cidr_management import check_cidr_overlaps
+    # Setup mock behavior
+    mock_retrieve_allocations.return_value = MOCK_ALLOCATIONS
+    mock_retrieve_region_cidr.return_value = ['10.2.0.0/16']
+    event = mock_event({'cidrs': ['10.2.0.0/24'], 'region': 'us-east-1'})
+    # Call method
+    assert check_cidr_overlaps.handler(event, None)['statusCode'] == 200
+    assert check_cidr_overlaps.handler(event, None)['statusCode'] == 200
+    assert mock_retrieve_allocations.call_count == 1
+    result = check_cidr_overlaps.handler(mock_event({'cidrs': ['10.2.0.0/24'], 'region': 'us-east-1',
+                                                     'fresh': True}), None)
+    assert mock_retrieve_allocations.call_count == 2
+    assert json.loads(result['body'])['snapshot_age'] < 1
+
+
+# test statusCode=200, conflicts in a single region
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_single_region(mock_retrieve_region_cidr, mock_retrieve_allocations):
+    # Import
+    from cidr_management import check_cidr_overlaps
+    # Setup mock behavior
+    mock_retrieve_allocations.return_value = MOCK_ALLOCATIONS
+    mock_retrieve_region_cidr.return_value = ['10.2.0.0/16']
+    # Call method
+    result = check_cidr_overlaps.handler(mock_event({'cidrs': ['10.0.0.0/8'], 'region': 'us-east-1'}), None)
+    assert result['statusCode'] == 200
+    conflicts = json.loads(result['body'])['conflicts']
+    assert sorted(conflict['cidr_block'] for conflict in conflicts) == ['10.2.0.0/16', '10.2.0.0/24']
+
+
+# test statusCode=400, invalid CIDR
+def test_handler_bad_request():
+    # Import
+    from cidr_management import check_cidr_overlaps
+    # Call method
+    result = check_cidr_overlaps.handler(mock_event({'cidrs': ['10.0.0.0/33']}), None)
+    assert result['statusCode'] == 400
+    assert result['body'] == 'Invalid CIDR block 10.0.0.0/33.'
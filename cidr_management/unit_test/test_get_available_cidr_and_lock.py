@@ -79,3 +79,259 @@ def test_handler_no_root_cidr(mock_retrieve_region_cidr,
     result = get_available_cidr_and_lock.handler(None, None)
     assert result['statusCode'] == 404
     assert result['body'] == 'No root CIDR list found for the specified region.'
+
+
+# test statusCode=200, next-fit placement resumes from and moves the cursor
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+@patch('utils.cidr_lookups.retrieve_region_param')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_allocation_cursor')
+@patch('utils.cidr_lookups.save_allocation_cursor')
+@patch('utils.cidr_lookups.reserve_cidr')
+def test_handler_next_fit(mock_reserve_cidr, mock_save_allocation_cursor, mock_retrieve_allocation_cursor,
+                          mock_retrieve_used_cidrs, mock_retrieve_region_param, mock_retrieve_region_cidr,
+                          mock_extract_post_request_params):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    import ipaddress
+    # Setup mock behavior
+    mock_retrieve_region_param.return_value = {}
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001',
+                                                     'region': 'us-west-2', 'cloud_provider': 'AWS'}
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/16']
+    mock_retrieve_used_cidrs.return_value = ['10.0.0.0/24', '10.0.5.0/24']
+    mock_retrieve_allocation_cursor.return_value = int(ipaddress.IPv4Address('10.0.5.0'))
+    mock_reserve_cidr.return_value = {'statusCode': 200, 'body': '10.0.6.0/24'}
+    # Call method
+    with mock.patch('utils.cidr_lookups.ALLOCATION_POLICY', 'next-fit'):
+        result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 200
+    assert mock_reserve_cidr.call_args[0][0] == ipaddress.IPv4Network('10.0.6.0/24')
+    mock_save_allocation_cursor.assert_called_once_with('us-west-2', 'AWS', '24',
+                                                        int(ipaddress.IPv4Address('10.0.7.0')), 'mock')
+
+
+# test statusCode=200, size classes pop from their slab and other sizes skip the slabs
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+@patch('utils.cidr_lookups.retrieve_region_param')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.reserve_cidr')
+def test_handler_size_class_slab(mock_reserve_cidr, mock_retrieve_used_cidrs, mock_retrieve_region_param,
+                                 mock_retrieve_region_cidr, mock_extract_post_request_params):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    from utils import slab_pools
+    import ipaddress
+    slab_pools.clear_cache()
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001',
+                                                     'region': 'us-west-2', 'cloud_provider': 'AWS'}
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/16']
+    mock_retrieve_region_param.return_value = {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16']}},
+                                               'size-classes': {'AWS': {'24': {'cidrs': ['10.0.0.0/22']}}}}
+    mock_retrieve_used_cidrs.return_value = ['10.0.0.0/24']
+    # The first free block was reserved by another container since the stack was built
+    mock_reserve_cidr.side_effect = [{'statusCode': 400, 'body': 'CIDR block already exists.'},
+                                     {'statusCode': 200, 'body': '10.0.2.0/24'},
+                                     {'statusCode': 200, 'body': '10.0.3.0/24'}]
+    # Call method
+    assert get_available_cidr_and_lock.handler(None, None)['statusCode'] == 200
+    assert get_available_cidr_and_lock.handler(None, None)['statusCode'] == 200
+    # The free stack is built from a single scan
+    assert mock_retrieve_used_cidrs.call_count == 1
+    assert [call[0][0] for call in mock_reserve_cidr.call_args_list] == [
+        ipaddress.IPv4Network('10.0.1.0/24'), ipaddress.IPv4Network('10.0.2.0/24'),
+        ipaddress.IPv4Network('10.0.3.0/24')]
+    # Sizes without a size class are placed outside the slabs
+    mock_reserve_cidr.side_effect = None
+    mock_reserve_cidr.return_value = {'statusCode': 200, 'body': '10.0.4.0/22'}
+    mock_extract_post_request_params.return_value = dict(mock_extract_post_request_params.return_value, size='22')
+    assert get_available_cidr_and_lock.handler(None, None)['statusCode'] == 200
+    assert mock_reserve_cidr.call_args[0][0] == ipaddress.IPv4Network('10.0.4.0/22')
+    slab_pools.clear_cache()
+
+
+# test statusCode=200, affinity places the CIDR next to the account's CIDRs
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+@patch('utils.cidr_lookups.retrieve_region_param')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_account_cidrs')
+@patch('utils.cidr_lookups.reserve_cidr')
+def test_handler_affinity(mock_reserve_cidr, mock_retrieve_account_cidrs, mock_retrieve_used_cidrs,
+                          mock_retrieve_region_param, mock_retrieve_region_cidr, mock_extract_post_request_params):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    import ipaddress
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001', 'affinity': True,
+                                                     'region': 'us-west-2', 'cloud_provider': 'AWS'}
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/16']
+    mock_retrieve_region_param.return_value = {}
+    mock_retrieve_used_cidrs.return_value = ['10.0.0.0/24', '10.0.8.0/24']
+    mock_retrieve_account_cidrs.return_value = ['10.0.8.0/24']
+    mock_reserve_cidr.return_value = {'statusCode': 200, 'body': '10.0.9.0/24'}
+    # Call method
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 200
+    assert mock_reserve_cidr.call_args[0][0] == ipaddress.IPv4Network('10.0.9.0/24')
+    # Candidates picked from the region scan skip the neighbor check
+    assert mock_reserve_cidr.call_args[1]['check_neighbors'] is False
+    # Without account CIDRs nearby, the placement policy is used
+    mock_retrieve_account_cidrs.return_value = []
+    get_available_cidr_and_lock.handler(None, None)
+    assert mock_reserve_cidr.call_args[0][0] == ipaddress.IPv4Network('10.0.1.0/24')
+
+
+# test statusCode=200, affinity without account CIDRs falls back to the slab, reusing the affinity scan
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+@patch('utils.cidr_lookups.retrieve_region_param')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_account_cidrs')
+@patch('utils.cidr_lookups.reserve_cidr')
+def test_handler_affinity_slab_fallback(mock_reserve_cidr, mock_retrieve_account_cidrs, mock_retrieve_used_cidrs,
+                                        mock_retrieve_region_param, mock_retrieve_region_cidr,
+                                        mock_extract_post_request_params):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    from utils import slab_pools
+    import ipaddress
+    slab_pools.clear_cache()
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001', 'affinity': True,
+                                                     'region': 'us-west-2', 'cloud_provider': 'AWS'}
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/16']
+    mock_retrieve_region_param.return_value = {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16']}},
+                                               'size-classes': {'AWS': {'24': {'cidrs': ['10.0.0.0/22']}}}}
+    mock_retrieve_used_cidrs.return_value = ['10.0.0.0/24']
+    mock_retrieve_account_cidrs.return_value = []
+    mock_reserve_cidr.return_value = {'statusCode': 200, 'body': '10.0.1.0/24'}
+    # Call method
+    assert get_available_cidr_and_lock.handler(None, None)['statusCode'] == 200
+    # The free stack is built from the CIDRs scanned for affinity placement
+    assert mock_retrieve_used_cidrs.call_count == 1
+    assert mock_reserve_cidr.call_args[0][0] == ipaddress.IPv4Network('10.0.1.0/24')
+    slab_pools.clear_cache()
+
+
+# test statusCode=200, dry run places a set of CIDRs from the allocation snapshot without locking or writing
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+@patch('utils.cidr_lookups.retrieve_region_param')
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('utils.cidr_lookups.reserve_cidr')
+def test_handler_dry_run(mock_reserve_cidr, mock_retrieve_allocations, mock_retrieve_region_param,
+                         mock_retrieve_region_cidr, mock_extract_post_request_params, mock_obtain_table_lock):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    from utils import allocation_cache
+    import json
+    allocation_cache.clear_cache()
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'sizes': ['24', '24', '20', '16'],
+                                                     'account_alias': 'itx-001', 'affinity': False,
+                                                     'dry_run': True, 'region': 'us-west-2',
+                                                     'cloud_provider': 'AWS'}
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/16']
+    mock_retrieve_region_param.return_value = {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16']}},
+                                               'size-classes': {'AWS': {'24': {'cidrs': ['10.0.0.0/23']}}}}
+    mock_retrieve_allocations.return_value = [
+        {'cidr_block': '10.0.0.0/24', 'account_alias': 'ITX-002', 'region': 'US-WEST-2', 'cloud': 'AWS',
+         'locked': True, 'assigned': True},
+        {'cidr_block': '10.0.16.0/20', 'account_alias': 'ITX-002', 'region': 'US-WEST-2', 'cloud': 'AWS',
+         'locked': True, 'assigned': True}
+    ]
+    # Call method
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 200
+    body = json.loads(result['body'])
+    assert body['dry_run'] is True
+    # The second /24 falls back to the root CIDRs once the slab is full, outside the slab
+    assert body['placements'] == [
+        {'size': '/24', 'cidr': '10.0.1.0/24', 'placement': 'size-class'},
+        {'size': '/24', 'cidr': '10.0.2.0/24', 'placement': 'first-fit'},
+        {'size': '/20', 'cidr': '10.0.32.0/20', 'placement': 'first-fit'},
+        {'size': '/16', 'cidr': None, 'placement': None}
+    ]
+    mock_obtain_table_lock.assert_not_called()
+    mock_reserve_cidr.assert_not_called()
+    allocation_cache.clear_cache()
+
+
+# test statusCode=503, a failed dry run does not clear the lock of a concurrent reserve
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.placement_preview.preview_placements')
+def test_handler_dry_run_error_keeps_lock(mock_preview_placements, mock_extract_post_request_params,
+                                          mock_obtain_table_lock, mock_clear_table_lock):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    from utils import capacity
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'sizes': ['24'], 'account_alias': 'itx-001',
+                                                     'affinity': False, 'dry_run': True, 'region': 'us-west-2',
+                                                     'cloud_provider': 'AWS'}
+    mock_preview_placements.side_effect = capacity.ReadBudgetExceededError()
+    # Call method
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 503
+    mock_obtain_table_lock.assert_not_called()
+    mock_clear_table_lock.assert_not_called()
+
+
+# test statusCode=200, a retried request returns the CIDR of the original request without the lock
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.reserve_cidr')
+@patch('boto3.resource')
+def test_handler_idempotent_retry(mock_ddb_resource, mock_reserve_cidr, mock_extract_post_request_params,
+                                  mock_obtain_table_lock):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    import time
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001', 'affinity': False,
+                                                     'idempotency_key': 'A9321', 'region': 'us-west-2',
+                                                     'cloud_provider': 'AWS'}
+    mock_table = mock_ddb_resource().Table.return_value
+    items = {
+        'IDEMPOTENCY#ITX-001#A9321': {
+            'cidr_block': 'IDEMPOTENCY#ITX-001#A9321', 'reserved_cidr': '10.0.1.0/24', 'subnet_prefix': 24,
+            'request_region': 'US-WEST-2', 'request_cloud': 'AWS', 'lock_date': 'Mon Oct 19 10:00:00 2026',
+            'lock_expiration': int(time.time()) + 60},
+        '10.0.1.0/24': {'cidr_block': '10.0.1.0/24', 'account_alias': 'ITX-001', 'locked': True,
+                        'lock_date': 'Mon Oct 19 10:00:00 2026'}
+    }
+    mock_table.get_item.side_effect = lambda **kwargs: {'Item': items.get(kwargs['Key']['cidr_block'])}
+    # Call method
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 200
+    assert result['body'] == '10.0.1.0/24'
+    assert mock_table.get_item.call_args_list[0][1]['Key'] == {'cidr_block': 'IDEMPOTENCY#ITX-001#A9321'}
+    mock_obtain_table_lock.assert_not_called()
+    mock_reserve_cidr.assert_not_called()
+    # The same key with another size is rejected
+    mock_extract_post_request_params.return_value['size'] = '20'
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result['statusCode'] == 409
+
+
+# test statusCode=500, a failed idempotency lookup does not clear the lock of a concurrent reserve
+@patch('utils.cidr_lookups.extract_post_request_params')
+@patch('utils.cidr_lookups.retrieve_idempotent_reservation')
+def test_handler_idempotent_retry_error_keeps_lock(mock_retrieve_idempotent_reservation,
+                                                   mock_extract_post_request_params, mock_obtain_table_lock,
+                                                   mock_clear_table_lock):
+    # Import
+    from cidr_management import get_available_cidr_and_lock
+    # Setup mock behavior
+    mock_extract_post_request_params.return_value = {'size': '24', 'account_alias': 'itx-001', 'affinity': False,
+                                                     'idempotency_key': 'A9321', 'region': 'us-west-2',
+                                                     'cloud_provider': 'AWS'}
+    mock_retrieve_idempotent_reservation.side_effect = RuntimeError('Throttled')
+    # Call method
+    result = get_available_cidr_and_lock.handler(None, None)
+    assert result == {'statusCode': 500, 'body': 'Throttled'}
+    mock_obtain_table_lock.assert_not_called()
+    mock_clear_table_lock.assert_not_called()
@@ -0,0 +1,87 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for listing job status function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+JOB_ID = '0123456789abcdef0123456789abcdef'
+
+
+@pytest.fixture(autouse=True)
+def job_store_path(tmp_path):
+    with mock.patch('utils.job_store.JOB_STORE_URI', 'file://' + str(tmp_path)):
+        yield tmp_path
+
+
+def mock_event(job_id=JOB_ID, chunk=None):
+    return {
+        'pathParameters': {'job_id': job_id},
+        'queryStringParameters': {'chunk': str(chunk)} if chunk is not None else None
+    }
+
+
+def write_job(status, chunks=()):
+    from utils import job_store
+    store = job_store.get_job_store()
+    job_store.put_json(store, job_store.status_key(JOB_ID), dict(status, job_id=JOB_ID))
+    for number, chunk in enumerate(chunks):
+        job_store.put_json(store, job_store.chunk_key(JOB_ID, number), chunk)
+
+
+# test statusCode=200, returns the job status
+def test_handler_returns_status():
+    # Import
+    from cidr_management import get_listing_job
+    # Setup mocks
+    write_job({'status': 'running'})
+    # Call method
+    result = get_listing_job.handler(mock_event(), None)
+    assert result['statusCode'] == 200
+    assert json.loads(result['body']) == {'job_id': JOB_ID, 'status': 'running'}
+
+
+# test statusCode=200, returns the chunks of a succeeded job
+def test_handler_returns_chunks():
+    # Import
+    from cidr_management import get_listing_job
+    # Setup mocks
+    write_job({'status': 'succeeded', 'chunks': 2, 'cidrs': 3}, [['10.0.0.0/24', '10.0.1.0/24'], ['10.0.2.0/24']])
+    # Call method
+    first = json.loads(get_listing_job.handler(mock_event(chunk=0), None)['body'])
+    last = json.loads(get_listing_job.handler(mock_event(chunk=1), None)['body'])
+    assert first == {'job_id': JOB_ID, 'chunk': 0, 'cidrs': ['10.0.0.0/24', '10.0.1.0/24'], 'next_chunk': 1}
+    assert last == {'job_id': JOB_ID, 'chunk': 1, 'cidrs': ['10.0.2.0/24'], 'next_chunk': None}
+    assert get_listing_job.handler(mock_event(chunk=2), None)['statusCode'] == 404
+
+
+# test statusCode=409, chunks of an unfinished job
+def test_handler_job_not_finished():
+    # Import
+    from cidr_management import get_listing_job
+    # Setup mocks
+    write_job({'status': 'running'})
+    # Call method
+    result = get_listing_job.handler(mock_event(chunk=0), None)
+    assert result['statusCode'] == 409
+
+
+# test statusCode=404 and 400, unknown and malformed job ids
+def test_handler_invalid_job():
+    # Import
+    from cidr_management import get_listing_job
+    # Call method
+    assert get_listing_job.handler(mock_event(), None)['statusCode'] == 404
+    result = get_listing_job.handler(mock_event(job_id='../../etc'), None)
+    assert result['statusCode'] == 400
+    assert result['body'] == 'Invalid job id.'
+    assert get_listing_job.handler(mock_event(chunk='x'), None)['statusCode'] == 400
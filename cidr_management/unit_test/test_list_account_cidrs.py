@@ -0,0 +1,85 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for account CIDRs listing function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+class MockBoto3Table(object):
+    """Used to mock boto3 DDB calls, pages of two items"""
+
+    ITEMS = [
+        {'cidr_block': '10.0.{}.0/24'.format(index), 'account_alias': 'ITX-001', 'region': 'US-WEST-2',
+         'cloud': 'AWS', 'locked': True, 'assigned': True} for index in range(3)
+    ]
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start = [item['cidr_block'] for item in self.ITEMS].index(kwargs['ExclusiveStartKey']['cidr_block']) + 1
+        items = self.ITEMS[start:start + kwargs['Limit']]
+        response = {'Items': items}
+        if start + kwargs['Limit'] < len(self.ITEMS):
+            response['LastEvaluatedKey'] = {'cidr_block': items[-1]['cidr_block'], 'account_alias': 'ITX-001'}
+        return response
+
+
+def mock_event(query_string_params):
+    return {
+        'pathParameters': {'alias': 'itx-001'},
+        'queryStringParameters': query_string_params
+    }
+
+
+# test statusCode=200, pages through the account GSI
+@patch('boto3.resource')
+def test_handler_pages(mock_ddb_resource):
+    # Import
+    from cidr_management import list_account_cidrs
+    # Setup mock behavior
+    mock_table = MockBoto3Table()
+    mock_ddb_resource().Table.return_value = mock_table
+    # Call method
+    result = list_account_cidrs.handler(mock_event({'limit': '2'}), None)
+    assert result['statusCode'] == 200
+    body = json.loads(result['body'])
+    assert [cidr['cidr_block'] for cidr in body['cidrs']] == ['10.0.0.0/24', '10.0.1.0/24']
+    assert mock_table.queries[0]['IndexName'] == 'account_alias-index'
+    result = list_account_cidrs.handler(mock_event({'limit': '2', 'next_token': body['next_token']}), None)
+    body = json.loads(result['body'])
+    assert [cidr['cidr_block'] for cidr in body['cidrs']] == ['10.0.2.0/24']
+    assert body['next_token'] is None
+
+
+# test statusCode=400, invalid paging token
+def test_handler_bad_request():
+    # Import
+    from cidr_management import list_account_cidrs
+    # Call method
+    result = list_account_cidrs.handler(mock_event({'next_token': 'not-a-token'}), None)
+    assert result['statusCode'] == 400
+    assert result['body'] == 'Invalid next token.'
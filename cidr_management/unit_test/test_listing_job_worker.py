@@ -0,0 +1,52 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for listing job worker function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+# test statusCode=200, returns the final job status
+@patch('utils.listing_jobs.run_job')
+def test_handler_runs_job(mock_run_job):
+    # Import
+    from cidr_management import listing_job_worker
+    # Setup mocks
+    mock_run_job.return_value = {'job_id': 'abc', 'status': 'succeeded', 'chunks': 1, 'cidrs': 4}
+    # Call method
+    result = listing_job_worker.handler({'job_id': 'abc'}, None)
+    assert result['statusCode'] == 200
+    assert json.loads(result['body'])['status'] == 'succeeded'
+    assert mock_run_job.call_args[0] == ('abc', 'mock')
+
+
+# test statusCode=404 and 500, unknown job and failed listing
+@patch('utils.listing_jobs.run_job')
+def test_handler_errors(mock_run_job):
+    # Import
+    from cidr_management import listing_job_worker
+    from utils.listing_jobs import JobNotFoundError
+    # Setup mocks
+    mock_run_job.side_effect = [JobNotFoundError(), Exception('Mock exception')]
+    # Call method
+    assert listing_job_worker.handler({'job_id': 'abc'}, None)['statusCode'] == 404
+    assert listing_job_worker.handler({'job_id': 'abc'}, None)['statusCode'] == 500
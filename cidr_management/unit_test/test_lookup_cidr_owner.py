@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for lookup function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+MOCK_ALLOCATIONS = [
+    {'cidr_block': '10.1.0.0/24', 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS',
+     'locked': True, 'assigned': True},
+    {'cidr_block': '10.1.1.0/27', 'account_alias': 'ITX-002', 'region': 'US-WEST-2', 'cloud': 'AWS',
+     'locked': True, 'assigned': False}
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_allocation_cache():
+    from utils import allocation_cache
+    allocation_cache.clear_cache()
+    yield
+    allocation_cache.clear_cache()
+
+
+def mock_event(ip):
+    return {
+        'pathParameters': {'cloud': 'aws'},
+        'queryStringParameters': {'ip': ip}
+    }
+
+
+# test statusCode=200, returns owning allocation
+@patch('utils.cidr_lookups.retrieve_allocations')
+def test_handler_lookup_owner(mock_retrieve_allocations):
+    # Import
+    from cidr_management import lookup_cidr_owner
+    # Setup mock behavior
+    mock_retrieve_allocations.return_value = MOCK_ALLOCATIONS
+    # Call method
+    result = lookup_cidr_owner.handler(mock_event('10.1.1.5'), None)
+    assert result['statusCode'] == 200
+    assert json.loads(result['body'])['account_alias'] == 'ITX-002'
+    # Second lookup is served from the cached snapshot
+    result = lookup_cidr_owner.handler(mock_event('10.1.0.0%2F25'), None)
+    assert json.loads(result['body'])['cidr_block'] == '10.1.0.0/24'
+    assert mock_retrieve_allocations.call_count == 1
+
+
+# test statusCode=404, IP not allocated
+@patch('utils.cidr_lookups.retrieve_allocations')
+def test_handler_lookup_not_found(mock_retrieve_allocations):
+    # Import
+    from cidr_management import lookup_cidr_owner
+    # Setup mock behavior
+    mock_retrieve_allocations.return_value = MOCK_ALLOCATIONS
+    # Call method
+    result = lookup_cidr_owner.handler(mock_event('10.2.0.1'), None)
+    assert result['statusCode'] == 404
+
+
+# test statusCode=400, invalid IP
+def test_handler_lookup_bad_request():
+    # Import
+    from cidr_management import lookup_cidr_owner
+    # Call method
+    result = lookup_cidr_owner.handler(mock_event('10.2.0.300'), None)
+    assert result['statusCode'] == 400
+    assert result['body'] == 'Invalid IP address or CIDR block.'
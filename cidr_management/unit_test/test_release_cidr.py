@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for CIDR release function"""
+import os
+from unittest import mock
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+MOCK_ITEM = {'cidr_block': '10.0.1.0/24', 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS',
+             'locked': True, 'assigned': True, 'lock_date': 'Mon Oct 12 10:00:00 2026'}
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+class MockBoto3Client(object):
+    """Used to mock boto3 DDB client calls"""
+
+    def __init__(self, cancelled=False):
+        self.cancelled = cancelled
+        self.transactions = []
+
+    def transact_write_items(self, **kwargs):
+        self.transactions.append(kwargs['TransactItems'])
+        if self.cancelled:
+            raise ClientError({'Error': {'Code': 'TransactionCanceledException'}}, 'TransactWriteItems')
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+def mock_event(cidr):
+    return {
+        'pathParameters': {'cloud': 'aws', 'region': 'us-west-2', 'cidr': cidr}
+    }
+
+
+# test statusCode=200, deletes and archives the CIDR in one transaction
+@patch('boto3.client')
+@patch('boto3.resource')
+def test_handler(mock_ddb_resource, mock_ddb_client):
+    # Import
+    from cidr_management import release_cidr
+    # Setup mock behavior
+    mock_ddb_resource().Table.return_value.get_item.return_value = {'Item': dict(MOCK_ITEM)}
+    mock_client = MockBoto3Client()
+    mock_ddb_client.return_value = mock_client
+    # Call method
+    result = release_cidr.handler(mock_event('10.0.1.0%2F24'), None)
+    assert result['statusCode'] == 200
+    delete, put = mock_client.transactions[0]
+    assert delete['Delete']['Key'] == {'cidr_block': {'S': '10.0.1.0/24'}}
+    assert delete['Delete']['ExpressionAttributeValues'][':assigned'] == {'BOOL': True}
+    assert put['Put']['TableName'] == 'AllocatedCidrArchive'
+    assert put['Put']['Item']['release_reason'] == {'S': 'released'}
+    assert 'released_at' in put['Put']['Item']
+
+
+# test statusCode=400, CIDR changed since it was read
+@patch('boto3.client')
+@patch('boto3.resource')
+def test_handler_changed(mock_ddb_resource, mock_ddb_client):
+    # Import
+    from cidr_management import release_cidr
+    # Setup mock behavior
+    mock_ddb_resource().Table.return_value.get_item.return_value = {'Item': dict(MOCK_ITEM)}
+    mock_ddb_client.return_value = MockBoto3Client(cancelled=True)
+    # Call method
+    result = release_cidr.handler(mock_event('10.0.1.0%2F24'), None)
+    assert result['statusCode'] == 400
+
+
+# test statusCode=404, CIDR of another region
+@patch('boto3.resource')
+def test_handler_not_found(mock_ddb_resource):
+    # Import
+    from cidr_management import release_cidr
+    # Setup mock behavior
+    mock_ddb_resource().Table.return_value.get_item.return_value = {'Item': dict(MOCK_ITEM, region='US-EAST-1')}
+    # Call method
+    result = release_cidr.handler(mock_event('10.0.1.0%2F24'), None)
+    assert result['statusCode'] == 404
+
+
+# test statusCode=400, invalid CIDR block
+def test_handler_bad_request():
+    # Import
+    from cidr_management import release_cidr
+    # Call method
+    result = release_cidr.handler(mock_event('LOCKED'), None)
+    assert result['statusCode'] == 400
+    assert result['body'] == 'Invalid CIDR block.'
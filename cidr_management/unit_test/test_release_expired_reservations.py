@@ -0,0 +1,106 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for expired reservations sweeper function"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock"
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+def mock_item(cidr_block):
+    return {'cidr_block': cidr_block, 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS',
+            'locked': True, 'assigned': False, 'lease_expiration': 1000}
+
+
+class MockBoto3Table(object):
+    """Used to mock boto3 DDB calls, two pages of expired reservations"""
+
+    def __init__(self):
+        self.scans = []
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        return {}
+
+    def scan(self, **kwargs):
+        self.scans.append(kwargs)
+        if 'ExclusiveStartKey' not in kwargs:
+            return {'Items': [mock_item('10.0.0.0/24'), mock_item('10.0.1.0/24')],
+                    'LastEvaluatedKey': {'cidr_block': '10.0.1.0/24'}}
+        return {'Items': [mock_item('10.0.2.0/24')]}
+
+
+class MockBoto3Client(object):
+    """Used to mock boto3 DDB client calls, 10.0.1.0/24 was assigned since the scan"""
+
+    def __init__(self):
+        self.transactions = []
+
+    def transact_write_items(self, **kwargs):
+        self.transactions.append(kwargs['TransactItems'])
+        if kwargs['TransactItems'][0]['Delete']['Key']['cidr_block']['S'] == '10.0.1.0/24':
+            raise ClientError({'Error': {'Code': 'TransactionCanceledException'},
+                               'CancellationReasons': [{'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]},
+                              'TransactWriteItems')
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+# test statusCode=200, releases the expired reservations still unassigned
+@patch('boto3.client')
+@patch('boto3.resource')
+def test_handler(mock_ddb_resource, mock_ddb_client):
+    # Import
+    from cidr_management import release_expired_reservations
+    # Setup mock behavior
+    mock_table = MockBoto3Table()
+    mock_client = MockBoto3Client()
+    mock_ddb_resource().Table.return_value = mock_table
+    mock_ddb_client.return_value = mock_client
+    # Call method
+    result = release_expired_reservations.handler({}, None)
+    assert result['statusCode'] == 200
+    assert json.loads(result['body']) == {'expired': 3, 'released': 2}
+    assert len(mock_table.scans) == 2
+    deletes = [transaction[0]['Delete'] for transaction in mock_client.transactions]
+    assert sorted(delete['Key']['cidr_block']['S'] for delete in deletes) == [
+        '10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24']
+    assert deletes[0]['ConditionExpression'] == 'assigned = :false_val AND lease_expiration < :now_val'
+    # Released reservations are archived with their release reason
+    archived = mock_client.transactions[0][1]['Put']
+    assert archived['TableName'] == 'AllocatedCidrArchive'
+    assert archived['Item']['release_reason'] == {'S': 'lease-expired'}
+    assert archived['Item']['account_alias'] == {'S': 'ITX-001'}
+    # The allocation version of the region is bumped once
+    assert [update['Key'] for update in mock_table.updates] == [{'cidr_block': 'VERSION#AWS#US-WEST-2'}]
+
+
+# test statusCode=500, scan failure
+@patch('boto3.resource')
+def test_handler_error(mock_ddb_resource):
+    # Import
+    from cidr_management import release_expired_reservations
+    # Setup mock behavior
+    mock_ddb_resource().Table.return_value.scan.side_effect = Exception('scan failed')
+    # Call method
+    result = release_expired_reservations.handler({}, None)
+    assert result['statusCode'] == 500
@@ -48,6 +48,13 @@ def mock_clear_table_lock():
         yield mock_clear_table_lock
 
 
+@pytest.fixture(autouse=True)
+def mock_listing_etag():
+    with mock.patch('utils.cidr_lookups.listing_etag') as mock_etag:
+        mock_etag.return_value = '"7.3.abcdef01"'
+        yield mock_etag
+
+
 # test statusCode=404, No root CIDR list found
 @patch('utils.cidr_lookups.extract_request_params')
 @patch('utils.cidr_lookups.retrieve_region_cidr')
@@ -159,3 +166,128 @@ def test_handler_return_exception(mock_retrieve_region_cidr,
     # Call method
     result = return_all_available.handler(None, None)
     assert result['statusCode'] == 500
+
+
+# test statusCode=503, read budget exhausted while scanning used CIDRs
+@patch('utils.cidr_lookups.extract_request_params')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_read_budget_exceeded(mock_retrieve_region_cidr,
+                                      mock_retrieve_used_cidrs,
+                                      mock_extract_request_params,
+                                      mock_clear_table_lock):
+    # Import
+    from cidr_management import return_all_available
+    from utils.capacity import ReadBudgetExceededError
+    mock_retrieve_used_cidrs.side_effect = ReadBudgetExceededError(retry_after=7)
+    mock_extract_request_params.return_value = {
+        'region': 'us-west-2',
+        'assigned': False,
+        'locked': False,
+        'size': 27,
+        'cloud_provider': 'AWS'
+    }
+    mock_retrieve_region_cidr.return_value = ["10.1.0.0/16"]
+    # Call method
+    result = return_all_available.handler(None, None)
+    assert result['statusCode'] == 503
+    assert result['headers']['Retry-After'] == '7'
+    assert mock_clear_table_lock.called
+
+
+# test statusCode=202, async listing returns the job id, the job runs inline without a worker function
+@patch('utils.cidr_lookups.extract_request_params')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_async_listing(mock_retrieve_region_cidr,
+                               mock_retrieve_used_cidrs,
+                               mock_extract_request_params,
+                               tmp_path):
+    # Import
+    import json
+    from cidr_management import return_all_available
+    from utils import job_store, listing_jobs
+    mock_retrieve_used_cidrs.return_value = ['10.1.0.0/25']
+    mock_extract_request_params.return_value = {
+        'region': 'us-west-2',
+        'assigned': False,
+        'locked': False,
+        'size': '26',
+        'cloud_provider': 'AWS',
+        'async': True
+    }
+    mock_retrieve_region_cidr.return_value = ["10.1.0.0/24"]
+    # Call method
+    with patch('utils.job_store.JOB_STORE_URI', 'file://' + str(tmp_path)), \
+            patch('utils.listing_jobs.LISTING_JOB_FUNCTION_NAME', ''):
+        result = return_all_available.handler(None, None)
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 202
+        assert body['status'] == 'succeeded'
+        assert listing_jobs.get_chunk(body['job_id'], 0) == ['10.1.0.128/26', '10.1.0.192/26']
+
+
+# test statusCode=304, the listing has not changed since the client's ETag
+@patch('utils.cidr_lookups.extract_request_params')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_not_modified(mock_retrieve_region_cidr,
+                              mock_retrieve_used_cidrs,
+                              mock_extract_request_params,
+                              mock_obtain_table_lock):
+    # Import
+    from cidr_management import return_all_available
+    mock_extract_request_params.return_value = {
+        'region': 'us-west-2',
+        'assigned': False,
+        'locked': False,
+        'size': '26',
+        'cloud_provider': 'AWS',
+        'if_none_match': ['"7.3.abcdef01"']
+    }
+    mock_retrieve_region_cidr.return_value = ["10.1.0.0/24"]
+    mock_retrieve_used_cidrs.return_value = []
+    # Call method
+    result = return_all_available.handler(None, None)
+    assert result['statusCode'] == 304
+    assert result['headers'] == {'ETag': '"7.3.abcdef01"', 'Vary': 'Accept-Encoding'}
+    assert not mock_obtain_table_lock.called
+    assert not mock_retrieve_used_cidrs.called
+    # A stale ETag returns the listing with the current one
+    mock_extract_request_params.return_value['if_none_match'] = ['"6.3.abcdef01"']
+    result = return_all_available.handler(None, None)
+    assert result['statusCode'] == 200
+    assert result['headers']['ETag'] == '"7.3.abcdef01"'
+
+
+# test statusCode=200, available CIDRs as gzip compressed runs
+@patch('utils.cidr_lookups.extract_request_params')
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_handler_gzip_runs(mock_retrieve_region_cidr,
+                           mock_retrieve_used_cidrs,
+                           mock_extract_request_params):
+    # Import
+    import gzip
+    import json
+    import base64
+    from cidr_management import return_all_available
+    mock_extract_request_params.return_value = {
+        'region': 'us-west-2',
+        'assigned': False,
+        'locked': False,
+        'size': '27',
+        'cloud_provider': 'AWS',
+        'format': 'runs',
+        'gzip': True
+    }
+    mock_retrieve_region_cidr.return_value = ["10.1.0.0/16", "10.2.0.0/16"]
+    mock_retrieve_used_cidrs.return_value = ['10.1.4.0/22']
+    # Call method
+    with patch('utils.http_encoding.RESPONSE_GZIP_MIN_BYTES', 0):
+        result = return_all_available.handler(None, None)
+    assert result['statusCode'] == 200
+    assert result['isBase64Encoded']
+    assert result['headers']['Content-Encoding'] == 'gzip'
+    body = json.loads(gzip.decompress(base64.b64decode(result['body'])))
+    assert body == {'runs': [['10.1.0.0', 27, 32], ['10.1.8.0', 27, 1984], ['10.2.0.0', 27, 2048]]}
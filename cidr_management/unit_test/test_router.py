@@ -0,0 +1,78 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for router function"""
+import os
+import re
+import subprocess
+from unittest import mock
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+MOCK_ENV_VARS = {
+    "ALLOCATED_CIDR_DDB_TABLE_NAME": "mock",
+    "WARMUP_ON_INIT": "False"
+}
+
+# Maximum import time of the handlers and their utils, relative to the import time of the AWS SDK. boto3 is
+# imported during the init phase on purpose, so the clients are created before the first request
+IMPORT_TIME_RATIO = float(os.environ.get('IMPORT_TIME_RATIO', 0.5))
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    with mock.patch.dict(os.environ, MOCK_ENV_VARS):
+        yield
+
+
+# test requests are dispatched on method and resource
+def test_handler_dispatches_route():
+    # Import
+    import router
+    # Setup mock behavior
+    mock_handler = mock.Mock(return_value={'statusCode': 200})
+    route = ('POST', '/v1/clouds/{cloud}/regions/{region}/cidrs')
+    event = {'httpMethod': route[0], 'resource': route[1]}
+    # Call method
+    with mock.patch.dict(router.ROUTES, {route: mock_handler}):
+        result = router.handler(event, None)
+    assert result['statusCode'] == 200
+    mock_handler.assert_called_once_with(event, None)
+
+
+# test statusCode=404, unknown route
+def test_handler_route_not_found():
+    # Import
+    import router
+    # Call method
+    result = router.handler({'httpMethod': 'PATCH', 'resource': '/v1/unknown'}, None)
+    assert result['statusCode'] == 404
+
+
+# test statusCode=400, event without method
+def test_handler_invalid_event():
+    # Import
+    import router
+    # Call method
+    result = router.handler(None, None)
+    assert result['statusCode'] == 400
+
+
+# test the handlers add little import time to the AWS SDK, measured with -X importtime
+def test_import_time_budget():
+    # Setup
+    env = dict(os.environ, AWS_DEFAULT_REGION='us-east-1', WARMUP_ON_INIT='False')
+    # Call method, in a fresh interpreter so no module is already imported
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import router'],
+                            cwd=os.path.join(BASE_PATH, '..'), env=env, check=True, stderr=subprocess.PIPE).stderr
+    # Cumulative microseconds of each module, utils.aws_clients imports boto3
+    cumulative = {name: int(micros) for micros, name in
+                  re.findall(r'^import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)$', output.decode(), re.MULTILINE)}
+    sdk_time = cumulative['utils.aws_clients']
+    handler_time = cumulative['router'] - sdk_time
+    assert handler_time < sdk_time * IMPORT_TIME_RATIO
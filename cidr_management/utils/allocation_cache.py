@@ -0,0 +1,74 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Per-container cache of allocation snapshots and the structures built from them"""
+import os
+import time
+import logging
+from utils import cidr_lookups
+from utils.cidr_trie import CidrTrie
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Seconds an allocation snapshot is served from the container cache
+ALLOCATION_CACHE_TTL = int(os.environ.get('ALLOCATION_CACHE_TTL', 60))
+
+# Cached snapshots, keyed by cloud provider
+_SNAPSHOTS = {}
+
+
+def get_snapshot(cloud_provider, ddb_table, fresh=False):
+    """
+    Return all allocations of a cloud provider, scanning the table when the cached snapshot expired
+
+    Args:
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+        fresh: scan the table even if the cached snapshot has not expired
+
+    Returns: dict with the allocation items, the time of the scan and the structures built from them
+    """
+    cloud_provider = cloud_provider.upper()
+    snapshot = _SNAPSHOTS.get(cloud_provider)
+    if snapshot and snapshot['expiry'] > time.time() and not fresh:
+        return snapshot
+    items = cidr_lookups.retrieve_allocations(cloud_provider, ddb_table)
+    snapshot = {
+        'created': time.time(),
+        'expiry': time.time() + ALLOCATION_CACHE_TTL,
+        'items': items
+    }
+    _SNAPSHOTS[cloud_provider] = snapshot
+    return snapshot
+
+
+def get_owner_trie(cloud_provider, ddb_table):
+    """
+    Return a radix trie of all allocations of a cloud provider, built once per snapshot
+
+    Args:
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: CidrTrie of allocation items
+    """
+    snapshot = get_snapshot(cloud_provider, ddb_table)
+    if 'owner_trie' not in snapshot:
+        start = time.time()
+        trie = CidrTrie()
+        for item in snapshot['items']:
+            trie.insert(item['cidr_block'], item)
+        snapshot['owner_trie'] = trie
+        LOGGER.info("Built owner trie of %s allocations in %.3f seconds", len(trie), time.time() - start)
+    return snapshot['owner_trie']
+
+
+def clear_cache():
+    """
+    Drop all cached snapshots
+
+    Returns: None
+    """
+    _SNAPSHOTS.clear()
@@ -0,0 +1,79 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""boto3 clients and resources shared by all requests of a container"""
+import os
+import logging
+import boto3
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Services created during the Lambda init phase
+WARMUP_SERVICES = ('dynamodb', 'ssm')
+
+# Cached clients and resources, keyed by service name
+_CLIENTS = {}
+_RESOURCES = {}
+
+
+def get_client(service):
+    """
+    Return the boto3 client of a service, creating it on first use
+
+    Args:
+        service: AWS service name
+
+    Returns: boto3 client
+    """
+    if service not in _CLIENTS:
+        _CLIENTS[service] = boto3.client(service)
+    return _CLIENTS[service]
+
+
+def get_resource(service):
+    """
+    Return the boto3 resource of a service, creating it on first use
+
+    Args:
+        service: AWS service name
+
+    Returns: boto3 resource
+    """
+    if service not in _RESOURCES:
+        _RESOURCES[service] = boto3.resource(service)
+    return _RESOURCES[service]
+
+
+def get_table(table_name):
+    """
+    Return a DynamoDB table of the shared DynamoDB resource
+
+    Args:
+        table_name: DynamoDB table name
+
+    Returns: boto3 DynamoDB Table
+    """
+    return get_resource('dynamodb').Table(table_name)
+
+
+def warm_up():
+    """
+    Create the clients and resources used by the handlers, so the first request does not pay for it
+
+    Returns: None
+    """
+    get_resource('dynamodb')
+    for service in WARMUP_SERVICES:
+        get_client(service)
+
+
+def clear_cache():
+    """
+    Drop all cached clients and resources
+
+    Returns: None
+    """
+    _CLIENTS.clear()
+    _RESOURCES.clear()
@@ -0,0 +1,132 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Backfill of the attributes of CIDR items reserved before the region GSI and reservation leases existed.
+
+Adds region_key, net_start and net_end to every locked CIDR item which lacks them, so that the neighbor
+overlap check of reserve_cidr sees them. Run once from the cidr_management directory after deploying the GSI:
+
+    python -m utils.backfill_ranges --table AllocatedCidrTracking
+
+With --leases, starts a lease of RESERVATION_LEASE_SECONDS from now on every locked, unassigned CIDR item
+without one, so the lease sweeper releases the reservations abandoned before leases existed:
+
+    python -m utils.backfill_ranges --table AllocatedCidrTracking --leases
+"""
+import sys
+import time
+import logging
+import argparse
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from utils import cidr_lookups, aws_clients
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+
+
+def backfill_range_attributes(ddb_table):
+    """
+    Add the range attributes to all CIDR items lacking them
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: number of updated items
+    """
+    table = aws_clients.get_table(ddb_table)
+    scan_kwargs = {
+        'FilterExpression': (Attr('region').exists() & Attr('cloud').exists() & Attr('locked').eq(True) &
+                             Attr('net_start').not_exists()),
+        'ProjectionExpression': 'cidr_block, #region, cloud',
+        'ExpressionAttributeNames': {'#region': 'region'}
+    }
+    updated = 0
+    while True:
+        resp = table.scan(**scan_kwargs)
+        for item in resp['Items']:
+            attributes = cidr_lookups.range_attributes(item['cidr_block'], item['region'], item['cloud'])
+            try:
+                table.update_item(
+                    Key={'cidr_block': item['cidr_block']},
+                    UpdateExpression='SET region_key = :region_key, net_start = :net_start, net_end = :net_end',
+                    ExpressionAttributeValues={':' + name: value for name, value in attributes.items()},
+                    # Skip items released since the scan
+                    ConditionExpression=Attr('cidr_block').exists() & Attr('locked').eq(True)
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise e
+        if 'LastEvaluatedKey' not in resp:
+            break
+        scan_kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+    LOGGER.info("Backfilled range attributes of %s items", updated)
+    return updated
+
+
+def backfill_lease_expirations(ddb_table, now=None):
+    """
+    Start a lease on all locked, unassigned CIDR items lacking one. The lease runs from now rather than from
+    the reservation, so owners of old reservations get a full lease to assign them before they are released
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+        now: current epoch seconds, the current time when omitted
+
+    Returns: number of updated items
+    """
+    table = aws_clients.get_table(ddb_table)
+    lease_expiration = int(now or time.time()) + cidr_lookups.RESERVATION_LEASE_SECONDS
+    unleased = Attr('locked').eq(True) & Attr('assigned').eq(False) & Attr('lease_expiration').not_exists()
+    scan_kwargs = {
+        'FilterExpression': Attr('region').exists() & unleased,
+        'ProjectionExpression': 'cidr_block'
+    }
+    updated = 0
+    while True:
+        resp = table.scan(**scan_kwargs)
+        for item in resp['Items']:
+            try:
+                table.update_item(
+                    Key={'cidr_block': item['cidr_block']},
+                    UpdateExpression='SET lease_expiration = :lease_expiration',
+                    ExpressionAttributeValues={':lease_expiration': lease_expiration},
+                    # Skip items released, assigned or leased since the scan
+                    ConditionExpression=Attr('cidr_block').exists() & unleased
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise e
+        if 'LastEvaluatedKey' not in resp:
+            break
+        scan_kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+    LOGGER.info("Backfilled leases of %s items, expiring at %s", updated, lease_expiration)
+    return updated
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code
+    """
+    parser = argparse.ArgumentParser(description='Backfill the range attributes or leases of the CIDR items.')
+    parser.add_argument('--table', default='AllocatedCidrTracking', help='CIDR table name')
+    parser.add_argument('--leases', action='store_true',
+                        help='start a lease on locked, unassigned CIDRs without one, instead of the range attributes')
+    args = parser.parse_args(argv)
+    if args.leases:
+        print('Updated {} items.'.format(backfill_lease_expirations(args.table)))
+    else:
+        print('Updated {} items.'.format(backfill_range_attributes(args.table)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,477 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Bulk import of existing VPC CIDRs into the CIDR table, e.g. when adopting a region.
+
+Reads a JSONL or CSV file, one row at a time. JSONL rows are either CIDR rows or VPCs as returned by
+describe_vpcs, a single VPC or a {"Vpcs": [...]} page per line; each associated CIDR of a VPC is imported,
+owned by its OwnerId. CSV files have a header with the columns cidr_block, account_alias, region, cloud and
+assigned; region and cloud default to the command line values.
+
+All rows are validated against the root CIDRs of the region params and the allocations in the table in one
+sort-and-sweep. A row is rejected if it is outside the root CIDRs of its region, overlaps an allocation or
+overlaps an earlier row. Rows already in the table with the same owner are skipped. The table lock is held from
+the scan of the allocations until all rows are written, so reserve requests can not allocate a planned CIDR in
+between, and wait or fail with "Failed to get CIDR table lock." while the import runs. The lock is renewed as
+batches complete, and the import stops if it was lost. Accepted rows are written
+with conditional puts across a thread pool, so a CIDR written to the table since the scan is never overwritten
+and its row is rejected. Throttled puts are retried with exponential backoff. The last file line of which all
+rows were written is saved to a checkpoint file, and a rerun resumes after it.
+
+Run from the cidr_management directory:
+
+    python -m utils.bulk_import --file vpcs.jsonl --region us-west-2 --checkpoint vpcs.checkpoint
+    python -m utils.bulk_import --file cidrs.csv --dry-run
+"""
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from utils import cidr_lookups, cidr_ranges, capacity, aws_clients, pool_validator, cidr_lock
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+
+# Worker threads writing batches
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 8))
+# Items written by a worker thread per batch
+BATCH_WRITE_SIZE = 25
+# Retries of a throttled put, and the delay before the first retry in seconds
+IMPORT_MAX_RETRIES = int(os.environ.get('IMPORT_MAX_RETRIES', 8))
+IMPORT_RETRY_DELAY = float(os.environ.get('IMPORT_RETRY_DELAY', 0.05))
+# Seconds before the expiry of the table lock from which it is renewed
+LOCK_RENEW_MARGIN = 30
+# Error codes of a throttled put
+THROTTLING_CODES = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+
+
+def read_rows(path):
+    """
+    Stream the rows of a JSONL or CSV file
+
+    Args:
+        path: file path, read as CSV if it ends with .csv
+
+    Returns: generator of (line number, row dict)
+    """
+    with open(path, newline='') as source:
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(source, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError:
+                        yield line_number, None
+
+
+def parse_row(row, default_region, default_cloud):
+    """
+    Convert a CIDR row or a describe_vpcs VPC to import entries
+
+    Args:
+        row: row dict
+        default_region: region of rows without one
+        default_cloud: cloud provider of rows without one
+
+    Returns: list of entry dicts with cidr_block, account_alias, region, cloud and assigned
+    """
+    if not isinstance(row, dict):
+        raise ImportRowError('Invalid row.')
+    # describe_vpcs page
+    if 'Vpcs' in row:
+        return [entry for vpc in row['Vpcs'] for entry in parse_row(vpc, default_region, default_cloud)]
+    region = row.get('region') or default_region
+    cloud_provider = row.get('cloud') or default_cloud
+    if not region:
+        raise ImportRowError('Missing region.')
+    if 'CidrBlock' in row:
+        # describe_vpcs VPC, imported with all its associated CIDRs
+        cidr_list = [association['CidrBlock'] for association in row.get('CidrBlockAssociationSet', [])
+                     if association.get('CidrBlockState', {}).get('State', 'associated') == 'associated']
+        cidr_list = cidr_list or [row['CidrBlock']]
+        account_alias = row.get('account_alias') or row.get('OwnerId')
+        assigned = True
+    else:
+        cidr_list = [row.get('cidr_block')]
+        account_alias = row.get('account_alias')
+        try:
+            assigned = cidr_lookups.str_to_bool(str(row.get('assigned', True)))
+        except cidr_lookups.InputValidationError:
+            raise ImportRowError('Invalid assigned flag.')
+    if not account_alias:
+        raise ImportRowError('Missing account alias.')
+    entries = []
+    for cidr in cidr_list:
+        try:
+            network = ipaddress.IPv4Network(str(cidr).strip())
+        except ValueError:
+            raise ImportRowError('Invalid CIDR block {}.'.format(cidr))
+        entries.append({
+            'cidr_block': network.with_prefixlen,
+            'account_alias': str(account_alias).upper(),
+            'region': region.upper(),
+            'cloud': cloud_provider.upper(),
+            'assigned': assigned
+        })
+    return entries
+
+
+def load_entries(path, default_region=None, default_cloud='AWS', after_line=0):
+    """
+    Read and parse the rows of an import file
+
+    Args:
+        path: file path
+        default_region: region of rows without one
+        default_cloud: cloud provider of rows without one
+        after_line: skip the lines up to and including this one, already imported
+
+    Returns: (list of entries with their line number, list of rejected rows)
+    """
+    entries = []
+    rejected = []
+    for line_number, row in read_rows(path):
+        if line_number <= after_line:
+            continue
+        try:
+            entries.extend(dict(entry, line=line_number) for entry in parse_row(row, default_region, default_cloud))
+        except ImportRowError as error:
+            rejected.append({'line': line_number, 'reason': error.message})
+    return entries, rejected
+
+
+def plan_import(entries, region_params, allocations):
+    """
+    Validate the entries against the root CIDRs and the allocations in one sort-and-sweep. Invalid root CIDRs
+    are skipped with a warning, rows inside them are rejected as outside the root CIDRs
+
+    Args:
+        entries: import entries with their line number
+        region_params: dict of region to parsed region param value
+        allocations: allocation items of the cloud providers of the entries
+
+    Returns: (entries to write in line order, rejected entries, number of entries already in the table)
+    """
+    intervals = [cidr_ranges.to_range(cidr) + ('root', {'region': region, 'cloud': cloud_provider, 'cidr': cidr})
+                 for region, cloud_provider, cidr in pool_validator.valid_root_pools(region_params)]
+    intervals.extend(cidr_ranges.to_range(item['cidr_block']) + ('allocated', item) for item in allocations)
+    intervals.extend(cidr_ranges.to_range(entry['cidr_block']) + ('import', entry) for entry in entries)
+    # Intervals are tuples of (start, end, group, payload), keep the group of each payload by identity
+    groups = {id(payload): (start, end, group) for start, end, group, payload in intervals}
+    in_root = set()
+    reasons = {}
+    existing = set()
+    for first, second in cidr_ranges.sweep_overlaps(intervals):
+        for entry, other in ((first, second), (second, first)):
+            if groups[id(entry)][2] != 'import':
+                continue
+            start, end, _ = groups[id(entry)]
+            other_start, other_end, other_group = groups[id(other)]
+            if other_group == 'root':
+                if other['region'].upper() == entry['region'] and other['cloud'] == entry['cloud'] and \
+                        other_start <= start and end <= other_end:
+                    in_root.add(id(entry))
+            elif other_group == 'allocated':
+                if other.get('cloud') != entry['cloud']:
+                    continue
+                if other['cidr_block'] == entry['cidr_block'] and \
+                        other.get('account_alias') == entry['account_alias'] and \
+                        other.get('region') == entry['region']:
+                    existing.add(id(entry))
+                else:
+                    reasons.setdefault(id(entry), 'Overlaps allocated CIDR {}.'.format(other['cidr_block']))
+            elif other['cloud'] == entry['cloud'] and other['line'] < entry['line']:
+                # Keep the earlier row of two overlapping rows
+                reasons.setdefault(id(entry), 'Overlaps {} of line {}.'.format(other['cidr_block'], other['line']))
+    accepted = []
+    rejected = []
+    for entry in entries:
+        if id(entry) in existing:
+            continue
+        reason = reasons.get(id(entry))
+        if reason is None and id(entry) not in in_root:
+            reason = 'Outside the root CIDRs of region {}.'.format(entry['region'])
+        if reason:
+            rejected.append({'line': entry['line'], 'cidr_block': entry['cidr_block'], 'reason': reason})
+        else:
+            accepted.append(entry)
+    accepted.sort(key=lambda entry: entry['line'])
+    return accepted, rejected, len(existing)
+
+
+def build_item(entry):
+    """
+    CIDR table item of an import entry
+
+    Args:
+        entry: import entry
+
+    Returns: item dict
+    """
+    item = dict({
+        'cidr_block': entry['cidr_block'],
+        'account_alias': entry['account_alias'],
+        'lock_date': time.ctime(),
+        'assigned': entry['assigned'],
+        'locked': True,
+        'region': entry['region'],
+        'cloud': entry['cloud']
+    }, **cidr_lookups.range_attributes(entry['cidr_block'], entry['region'], entry['cloud']))
+    # Unassigned imports are released by the sweeper unless they get assigned
+    if not entry['assigned']:
+        item['lease_expiration'] = int(time.time()) + cidr_lookups.RESERVATION_LEASE_SECONDS
+    return item
+
+
+def write_batch(items, ddb_table):
+    """
+    Write a batch of items, each with a put conditional on the CIDR not being in the table, retrying throttled
+    puts with exponential backoff. Uses the thread-safe DynamoDB client, so batches can be written from worker
+    threads.
+
+    Args:
+        items: up to BATCH_WRITE_SIZE items
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: (list of DynamoDB responses, list of items still throttled after all retries,
+              list of items whose CIDR was written to the table since the import was planned)
+    """
+    serializer = TypeSerializer()
+    ddb_client = aws_clients.get_client('dynamodb')
+    responses = []
+    unprocessed = []
+    conflicts = []
+    for item in items:
+        for attempt in range(IMPORT_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(IMPORT_RETRY_DELAY * 2 ** (attempt - 1))
+            try:
+                responses.append(ddb_client.put_item(
+                    TableName=ddb_table,
+                    Item={name: serializer.serialize(value) for name, value in item.items()},
+                    ConditionExpression='attribute_not_exists(cidr_block)',
+                    ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+                ))
+                break
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'ConditionalCheckFailedException':
+                    conflicts.append(item)
+                    break
+                if code not in THROTTLING_CODES:
+                    raise e
+        else:
+            unprocessed.append(item)
+    return responses, unprocessed, conflicts
+
+
+def load_checkpoint(path):
+    """Last imported line of a checkpoint file, 0 when there is none"""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)['line']
+
+
+def save_checkpoint(path, line_number):
+    """Save the last imported line to a checkpoint file, replacing it atomically"""
+    if not path:
+        return
+    with open(path + '.tmp', 'w') as checkpoint_file:
+        json.dump({'line': line_number}, checkpoint_file)
+    os.replace(path + '.tmp', path)
+
+
+def renew_lock(ddb_table, lock_expiry):
+    """
+    Renew the table lock when it is close to its expiry
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+        lock_expiry: expiry time of the held table lock, None when no lock is held
+
+    Returns: expiry time of the lock, raises LockLostException when the lock is no longer held
+    """
+    if lock_expiry is None or time.time() < lock_expiry - LOCK_RENEW_MARGIN:
+        return lock_expiry
+    return cidr_lock.renew_table_lock(ddb_table, lock_expiry)
+
+
+def write_entries(entries, ddb_table, workers=None, checkpoint_path=None, lock_expiry=None):
+    """
+    Write the entries in batches across a thread pool, advancing the checkpoint as batches complete
+
+    Args:
+        entries: entries to write, in line order
+        ddb_table: DynamoDB table used to store CIDR blocks
+        workers: worker threads, IMPORT_WORKERS when omitted
+        checkpoint_path: checkpoint file, no checkpoint when omitted
+        lock_expiry: expiry time of the held table lock, renewed as batches complete
+
+    Returns: (number of written items, number of failed items, list of entries whose CIDR was written to the
+              table since the import was planned)
+    """
+    batches = [entries[index:index + BATCH_WRITE_SIZE] for index in range(0, len(entries), BATCH_WRITE_SIZE)]
+    written = failed = 0
+    conflicts = []
+    done = set()
+    next_batch = 0
+    # Planning may have taken most of the lock's lifetime
+    lock_expiry = renew_lock(ddb_table, lock_expiry)
+    with ThreadPoolExecutor(max_workers=workers or IMPORT_WORKERS) as executor:
+        futures = {executor.submit(write_batch, [build_item(entry) for entry in batch], ddb_table): index
+                   for index, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                lock_expiry = renew_lock(ddb_table, lock_expiry)
+            except cidr_lock.LockLostException:
+                # Reserve requests may be allocating CIDRs again, stop before the batches not started yet
+                for pending in futures:
+                    pending.cancel()
+                LOGGER.error("Lost the table lock after %s batches, stopping the import", len(done))
+                raise
+            responses, unprocessed, conflicted = future.result()
+            # Capacity counters are only updated from this thread
+            for response in responses:
+                capacity.record(response, write=True)
+            written += len(responses)
+            failed += len(unprocessed)
+            conflicted = {item['cidr_block'] for item in conflicted}
+            conflicts.extend(entry for entry in batches[index] if entry['cidr_block'] in conflicted)
+            if unprocessed:
+                LOGGER.error("%s items of batch %s were not written", len(unprocessed), index)
+                continue
+            done.add(index)
+            # The checkpoint only moves past batches of which all earlier batches were written
+            advanced = False
+            while next_batch in done:
+                next_batch += 1
+                advanced = True
+            if advanced:
+                line_number = batches[next_batch - 1][-1]['line']
+                # A line of many VPCs may continue in the next batch
+                if next_batch < len(batches) and batches[next_batch][0]['line'] == line_number:
+                    line_number -= 1
+                save_checkpoint(checkpoint_path, line_number)
+    LOGGER.info("Wrote %s items, %s failed, %s conflicts", written, failed, len(conflicts))
+    return written, failed, conflicts
+
+
+def run_import(path, ddb_table, default_region=None, default_cloud='AWS', workers=None, checkpoint_path=None,
+               dry_run=False):
+    """
+    Import a file of CIDRs
+
+    Args:
+        path: JSONL or CSV file
+        ddb_table: DynamoDB table used to store CIDR blocks
+        default_region: region of rows without one
+        default_cloud: cloud provider of rows without one
+        workers: worker threads, IMPORT_WORKERS when omitted
+        checkpoint_path: checkpoint file, no checkpoint when omitted
+        dry_run: validate the file without writing
+
+    Returns: summary dict, with the rejected rows
+    """
+    after_line = load_checkpoint(checkpoint_path)
+    entries, rejected = load_entries(path, default_region, default_cloud, after_line)
+    written = failed = 0
+    # Reserve requests must not allocate CIDRs between the scan and the writes
+    lock_expiry = None
+    if not dry_run:
+        lock_expiry = cidr_lock.sync_obtain_table_lock(ddb_table)
+    try:
+        allocations = []
+        for cloud_provider in sorted({entry['cloud'] for entry in entries}):
+            allocations.extend(cidr_lookups.retrieve_allocations(cloud_provider, ddb_table))
+        accepted, conflicts, existing = plan_import(entries, cidr_lookups.retrieve_all_region_params(),
+                                                    allocations)
+        rejected.extend(conflicts)
+        if not dry_run and accepted:
+            try:
+                written, failed, conflicts = write_entries(accepted, ddb_table, workers, checkpoint_path,
+                                                           lock_expiry)
+            except cidr_lock.LockLostException:
+                # The lock may be held by another request now
+                lock_expiry = None
+                raise
+            rejected.extend({'line': entry['line'], 'cidr_block': entry['cidr_block'],
+                             'reason': 'Written to the table since the import was planned.'} for entry in conflicts)
+            # Imported CIDRs change the listings of their regions
+            for region, cloud_provider in sorted({(entry['region'], entry['cloud']) for entry in accepted}):
+                cidr_lookups.bump_allocation_version(region, cloud_provider, ddb_table)
+    finally:
+        if lock_expiry is not None:
+            # Clear CIDR lock
+            cidr_lock.clear_table_lock(ddb_table)
+    return {
+        'resumed_after_line': after_line,
+        'entries': len(entries),
+        'accepted': len(accepted),
+        'existing': existing,
+        'written': written,
+        'failed': failed,
+        'rejected': sorted(rejected, key=lambda row: row['line'])
+    }
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code, 1 when rows were rejected or not written
+    """
+    parser = argparse.ArgumentParser(description='Import existing VPC CIDRs into the CIDR table.')
+    parser.add_argument('--file', required=True, help='JSONL or CSV file')
+    parser.add_argument('--region', help='region of rows without one')
+    parser.add_argument('--cloud', default='aws', help='cloud provider of rows without one')
+    parser.add_argument('--table', default=os.environ.get('ALLOCATED_CIDR_DDB_TABLE_NAME', 'AllocatedCidrTracking'))
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS)
+    parser.add_argument('--checkpoint', help='checkpoint file, a rerun resumes after the last imported line')
+    parser.add_argument('--dry-run', action='store_true', help='validate the file without writing')
+    args = parser.parse_args(argv)
+    try:
+        summary = run_import(args.file, args.table, args.region, args.cloud, args.workers, args.checkpoint,
+                             args.dry_run)
+    except cidr_lock.LockLostException as error:
+        print('{} Rerun with the same checkpoint file to resume.'.format(error.message))
+        return 1
+    for row in summary['rejected']:
+        print('Line {}: {} {}'.format(row['line'], row.get('cidr_block', ''), row['reason']))
+    print('Read {entries} CIDRs after line {resumed_after_line}: {accepted} accepted, {existing} already imported, '
+          '{written} written, {failed} failed, {rejected_count} rejected.'.format(
+              rejected_count=len(summary['rejected']), **summary))
+    return 1 if summary['rejected'] or summary['failed'] else 0
+
+
+class ImportRowError(Exception):
+    """
+    Exception raised for rows of an import file which can not be imported
+
+    Attributes:
+        message -- Description of the error
+    """
+
+    def __init__(self, message="Invalid row."):
+        self.message = message
+        super().__init__(self.message)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
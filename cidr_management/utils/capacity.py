@@ -0,0 +1,129 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Track DynamoDB consumed capacity per request and guard the read budget"""
+import os
+import logging
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Value passed as ReturnConsumedCapacity on every DynamoDB call
+RETURN_CONSUMED_CAPACITY = 'TOTAL'
+
+# Read capacity units a single request may consume. 0 disables the guard
+READ_CAPACITY_BUDGET = float(os.environ.get('READ_CAPACITY_BUDGET', 0))
+# Seconds a client is asked to wait when the read budget is exhausted
+READ_BUDGET_RETRY_AFTER = int(os.environ.get('READ_BUDGET_RETRY_AFTER', 5))
+
+# Capacity consumed by the current request
+_CONSUMED = {
+    'read': 0.0,
+    'write': 0.0,
+    'last_read': 0.0
+}
+
+
+def reset():
+    """
+    Reset the capacity counters at the start of a request
+
+    Returns: None
+    """
+    _CONSUMED['read'] = 0.0
+    _CONSUMED['write'] = 0.0
+    _CONSUMED['last_read'] = 0.0
+
+
+def record(response, write=False):
+    """
+    Add the consumed capacity of a DynamoDB response to the request counters
+
+    Args:
+        response: DynamoDB response called with ReturnConsumedCapacity
+        write: True if the call was a write operation
+
+    Returns: None
+    """
+    consumed = response.get('ConsumedCapacity') if isinstance(response, dict) else None
+    # Batch and transaction calls return one entry per table
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    read_units = 0.0
+    write_units = 0.0
+    for entry in consumed or []:
+        # Explicit read/write units are only returned for some operations, otherwise use the total
+        if 'ReadCapacityUnits' in entry or 'WriteCapacityUnits' in entry:
+            read_units += float(entry.get('ReadCapacityUnits', 0))
+            write_units += float(entry.get('WriteCapacityUnits', 0))
+        elif write:
+            write_units += float(entry.get('CapacityUnits', 0))
+        else:
+            read_units += float(entry.get('CapacityUnits', 0))
+    _CONSUMED['read'] += read_units
+    _CONSUMED['write'] += write_units
+    if read_units:
+        _CONSUMED['last_read'] = read_units
+
+
+def check_read_budget():
+    """
+    Ensure the next read will not exceed the request read budget. The cost of the next read is
+    estimated from the cost of the previous one, e.g. the previous page of a scan.
+
+    Returns: None
+    """
+    if READ_CAPACITY_BUDGET <= 0:
+        return
+    if _CONSUMED['read'] + _CONSUMED['last_read'] > READ_CAPACITY_BUDGET:
+        LOGGER.warning("Read budget of %s RCU exceeded, %s RCU consumed.", READ_CAPACITY_BUDGET, _CONSUMED['read'])
+        raise ReadBudgetExceededError(retry_after=READ_BUDGET_RETRY_AFTER)
+
+
+def report():
+    """
+    Log the capacity consumed by the current request
+
+    Returns: dict of consumed read and write capacity units
+    """
+    consumed = {
+        'read_capacity_units': _CONSUMED['read'],
+        'write_capacity_units': _CONSUMED['write']
+    }
+    LOGGER.info("Consumed capacity: %s RCU, %s WCU", consumed['read_capacity_units'],
+                consumed['write_capacity_units'])
+    return consumed
+
+
+def budget_exceeded_response(error):
+    """
+    Build the response returned when the read budget is exhausted
+
+    Args:
+        error: ReadBudgetExceededError
+
+    Returns: API response
+    """
+    return {
+        'statusCode': 503,
+        'headers': {
+            'Retry-After': str(error.retry_after)
+        },
+        'body': error.message
+    }
+
+
+class ReadBudgetExceededError(Exception):
+    """
+    Exception raised when a request would exceed its read capacity budget
+
+    Attributes:
+        message -- Description of the error
+        retry_after -- Seconds the client should wait before retrying
+    """
+
+    def __init__(self, message="Read capacity budget exceeded.", retry_after=READ_BUDGET_RETRY_AFTER):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
@@ -0,0 +1,206 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Offline capacity planning, replaying a forecast of reserve requests against an allocation snapshot.
+
+Loads the locked CIDRs of each region from a snapshot written by utils.snapshot_export, and the root CIDRs and
+size-class slabs from a file of region params, or from param store when no file is given. The CIDR table is
+never read. Each period of the forecast, e.g. a quarter, the requests are placed with the same logic as the
+reserve endpoint: size-class requests in their slabs first, then with the placement policy in the root CIDRs,
+slabs excluded. The report lists the first period of each region with a rejected request, and the first period
+each requested size ran out. Regions are simulated in parallel across processes.
+
+Run from the cidr_management directory:
+
+    python -m utils.capacity_planner --snapshot allocations.bin --params region-params.json \\
+        --forecast 200x/24,40x/20 --periods 12 --period-name quarter
+
+The params file holds the value of each region param keyed by region, e.g. {"us-west-2": {"master-cidr": ...}}.
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import cidr_allocator, cidr_ranges, cidr_lookups, slab_pools, snapshot_export
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+
+# Worker processes, 0 uses one per CPU and 1 simulates serially
+PLANNER_WORKERS = int(os.environ.get('PLANNER_WORKERS', 0))
+
+# Forecast of one period, e.g. 200x/24,40x/20
+FORECAST_PATTERN = re.compile(r'^\s*(\d+)\s*[x×*]\s*/?(\d+)\s*$')
+
+
+def parse_forecast(forecast):
+    """
+    Parse the requests of one forecast period
+
+    Args:
+        forecast: comma separated count x size, e.g. 200x/24,40x/20
+
+    Returns: list of (count, prefix), in forecast order
+    """
+    requests = []
+    for part in forecast.split(','):
+        match = FORECAST_PATTERN.match(part)
+        if not match or not 0 < int(match.group(2)) <= 32:
+            raise ValueError('Invalid forecast {}, expected e.g. 200x/24,40x/20.'.format(part.strip()))
+        requests.append((int(match.group(1)), int(match.group(2))))
+    return requests
+
+
+def load_region_ranges(snapshot_path, cloud_provider='AWS'):
+    """
+    Read the locked CIDRs of all regions of a cloud provider from a snapshot, in one pass
+
+    Args:
+        snapshot_path: snapshot file
+        cloud_provider: cloud provider
+
+    Returns: dict of upper case region to list of (start, end)
+    """
+    cloud_provider = cloud_provider.upper()
+    region_ranges = {}
+    for item in snapshot_export.read_snapshot(snapshot_path):
+        if item.get('locked') and item['cloud'] == cloud_provider:
+            region_ranges.setdefault(item['region'], []).append(cidr_ranges.to_range(item['cidr_block']))
+    return region_ranges
+
+
+def simulate_region(task):
+    """
+    Replay the forecast against one region, run by a worker process
+
+    Args:
+        task: (region, root CIDRs, dict of prefix to slab CIDRs, used ranges, forecast, periods, policy)
+
+    Returns: dict with the first period with a reject, the first period each size ran out, and the utilization
+    """
+    region, root_cidr_list, size_classes, ranges, forecast, periods, policy = task
+    used = cidr_allocator.UsedRanges(ranges=ranges)
+    # Slabs are only allocated at their size class, the general allocator treats them as used
+    general = cidr_allocator.UsedRanges(ranges=list(ranges) + [
+        cidr_ranges.to_range(cidr) for class_cidrs in size_classes.values() for cidr in class_cidrs])
+    cursors = {}
+    exhausted = {}
+    placed = rejected = 0
+    for period in range(1, periods + 1):
+        for count, prefix in forecast:
+            for _ in range(count):
+                network = None
+                if prefix in size_classes:
+                    network = cidr_allocator.first_fit(size_classes[prefix], used, prefix)
+                if network is None:
+                    network = cidr_allocator.place(policy, root_cidr_list, general, prefix, cursors.get(prefix))
+                    if network is not None:
+                        cursors[prefix] = cidr_allocator.next_cursor(network)
+                if network is None:
+                    rejected += 1
+                    exhausted.setdefault(prefix, period)
+                    continue
+                placed += 1
+                start, end = cidr_ranges.to_range(network)
+                used.add(start, end)
+                general.add(start, end)
+    roots = cidr_allocator.root_ranges(root_cidr_list, 32)
+    total = sum(end - start + 1 for start, end in roots)
+    free = sum(end - start + 1 for root_start, root_end in roots
+               for start, end in used.free_ranges(root_start, root_end))
+    return {
+        'region': region,
+        'placed': placed,
+        'rejected': rejected,
+        'first_reject': min(exhausted.values()) if exhausted else None,
+        'exhausted': {prefix: period for prefix, period in sorted(exhausted.items())},
+        'utilization': 1 - free / total if total else 0.0
+    }
+
+
+def plan(region_params, region_ranges, forecast, periods, policy=cidr_allocator.FIRST_FIT, cloud_provider='AWS',
+         workers=None):
+    """
+    Replay a forecast against all regions of the region params
+
+    Args:
+        region_params: dict of region to parsed region param value
+        region_ranges: dict of upper case region to the used ranges of the snapshot
+        forecast: list of (count, prefix) requested each period
+        periods: number of periods
+        policy: placement policy, one of cidr_allocator.POLICIES
+        cloud_provider: cloud provider
+        workers: worker processes, PLANNER_WORKERS when omitted
+
+    Returns: list of region results, in region order
+    """
+    tasks = []
+    for region, param_value in sorted(region_params.items()):
+        root_cidr_list = param_value.get('master-cidr', {}).get(cloud_provider.upper(), {}).get('cidrs', [])
+        if root_cidr_list:
+            tasks.append((region, root_cidr_list, slab_pools.size_classes(param_value, cloud_provider),
+                          region_ranges.get(region.upper(), []), forecast, periods, policy))
+    workers = PLANNER_WORKERS if workers is None else workers
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(simulate_region, tasks, chunksize=1))
+        except (OSError, NotImplementedError, BrokenProcessPool) as error:
+            LOGGER.warning("Process pool unavailable, simulating serially: %s", str(error))
+    return [simulate_region(task) for task in tasks]
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code, 1 when a region runs out within the forecast
+    """
+    parser = argparse.ArgumentParser(description='Replay a forecast of reserve requests against a snapshot.')
+    parser.add_argument('--snapshot', required=True, help='snapshot file written by utils.snapshot_export')
+    parser.add_argument('--params', help='JSON file of the region params, read from param store when omitted')
+    parser.add_argument('--forecast', required=True, help='requests of each period, e.g. 200x/24,40x/20')
+    parser.add_argument('--periods', type=int, default=8)
+    parser.add_argument('--period-name', default='period')
+    parser.add_argument('--policy', choices=cidr_allocator.POLICIES, default=cidr_lookups.ALLOCATION_POLICY)
+    parser.add_argument('--cloud', default='aws')
+    parser.add_argument('--workers', type=int, default=PLANNER_WORKERS)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+    try:
+        forecast = parse_forecast(args.forecast)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.params:
+        with open(args.params) as params_file:
+            region_params = json.load(params_file)
+    else:
+        region_params = cidr_lookups.retrieve_all_region_params()
+    results = plan(region_params, load_region_ranges(args.snapshot, args.cloud), forecast, args.periods,
+                   args.policy, args.cloud, args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            if result['first_reject'] is None:
+                outcome = 'fits all {} {}s'.format(args.periods, args.period_name)
+            else:
+                outcome = 'runs out in {} {}'.format(args.period_name, result['first_reject'])
+                outcome += ' (' + ', '.join('/{} in {} {}'.format(prefix, args.period_name, period)
+                                            for prefix, period in result['exhausted'].items()) + ')'
+            print('{region}: {outcome}, {placed} placed, {rejected} rejected, {utilization:.1%} utilized'.format(
+                outcome=outcome, **result))
+    return 1 if any(result['first_reject'] is not None for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Placement policies finding a free CIDR block in the root CIDRs of a region"""
+import os
+import bisect
+import ipaddress
+from utils import cidr_ranges
+
+# Placement policies
+FIRST_FIT = 'first-fit'
+NEXT_FIT = 'next-fit'
+BEST_FIT = 'best-fit'
+BUDDY = 'buddy'
+POLICIES = (FIRST_FIT, NEXT_FIT, BEST_FIT, BUDDY)
+
+# Levels above an account CIDR searched for a block which summarizes with it
+AFFINITY_MAX_LEVELS = int(os.environ.get('AFFINITY_MAX_LEVELS', 2))
+
+
+class UsedRanges(object):
+    """Sorted, disjoint integer ranges of the CIDRs in use, searchable by address"""
+
+    def __init__(self, allocated_cidr_list=(), ranges=()):
+        self.ranges = cidr_ranges.merge_ranges(
+            [cidr_ranges.to_range(cidr) for cidr in allocated_cidr_list] + list(ranges))
+        self.ends = [end for _, end in self.ranges]
+
+    def first_free_block(self, start, end, block_size):
+        """
+        Find the first free block of a given size in an address range
+
+        Args:
+            start: first address of the range, aligned to block_size
+            end: last address of the range, inclusive
+            block_size: number of addresses of the block
+
+        Returns: first address of the block, or None if the range has no free block
+        """
+        # First used range which ends at or after start
+        index = bisect.bisect_left(self.ends, start)
+        while start + block_size - 1 <= end:
+            if index == len(self.ranges) or self.ranges[index][0] > start + block_size - 1:
+                return start
+            # Skip past the used range, to the next aligned block
+            start = align_up(self.ranges[index][1] + 1, block_size)
+            index += 1
+        return None
+
+    def free_ranges(self, start, end):
+        """
+        List the free ranges of an address range
+
+        Args:
+            start: first address of the range
+            end: last address of the range, inclusive
+
+        Returns: list of (start, end), both inclusive
+        """
+        free = []
+        index = bisect.bisect_left(self.ends, start)
+        while start <= end:
+            if index == len(self.ranges) or self.ranges[index][0] > end:
+                free.append((start, end))
+                break
+            if self.ranges[index][0] > start:
+                free.append((start, self.ranges[index][0] - 1))
+            start = self.ranges[index][1] + 1
+            index += 1
+        return free
+
+    def add(self, start, end):
+        """Mark an address range, both ends inclusive, as used, merging it with the ranges it overlaps or touches"""
+        first = bisect.bisect_left(self.ends, start - 1)
+        last = first
+        while last < len(self.ranges) and self.ranges[last][0] <= end + 1:
+            start = min(start, self.ranges[last][0])
+            end = max(end, self.ranges[last][1])
+            last += 1
+        self.ranges[first:last] = [(start, end)]
+        self.ends[first:last] = [end]
+
+    def overlaps(self, start, end):
+        """True if any address of the range, both ends inclusive, is in use"""
+        index = bisect.bisect_left(self.ends, start)
+        return index < len(self.ranges) and self.ranges[index][0] <= end
+
+
+def align_up(address, block_size):
+    """Round an address up to the next multiple of block_size"""
+    return -(-address // block_size) * block_size
+
+
+def root_ranges(root_cidr_list, subnet_prefix):
+    """
+    Integer ranges of the root CIDRs large enough for the requested size, in list order
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        subnet_prefix: requested CIDR size
+
+    Returns: list of (start, end)
+    """
+    return [cidr_ranges.to_range(cidr) for cidr in root_cidr_list
+            if ipaddress.IPv4Network(cidr).prefixlen <= int(subnet_prefix)]
+
+
+def first_fit(root_cidr_list, used, subnet_prefix):
+    """
+    Find the lowest free block of the first root CIDR which has one
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: IPv4Network, or None if no block is free
+    """
+    block_size = 2 ** (32 - int(subnet_prefix))
+    for start, end in root_ranges(root_cidr_list, subnet_prefix):
+        block = used.first_free_block(start, end, block_size)
+        if block is not None:
+            return ipaddress.IPv4Network((block, int(subnet_prefix)))
+    return None
+
+
+def next_fit(root_cidr_list, used, subnet_prefix, cursor=None):
+    """
+    Find the first free block at or after the cursor, wrapping around to the start of the first root CIDR
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+        cursor: address following the previous block placed for this size, None to start from the first root
+
+    Returns: IPv4Network, or None if no block is free
+    """
+    block_size = 2 ** (32 - int(subnet_prefix))
+    roots = root_ranges(root_cidr_list, subnet_prefix)
+    # Root CIDR holding the cursor, or ending right before it. A cursor outside all roots, e.g. after the
+    # root list changed, starts over from the first root
+    cursor_root = None
+    if cursor is not None:
+        cursor_root = next((index for index, (start, end) in enumerate(roots) if start <= cursor <= end + 1), None)
+    if cursor_root is None:
+        return first_fit(root_cidr_list, used, subnet_prefix)
+    # Search from the cursor to the end of its root, then the following roots, then wrap around
+    cursor = align_up(cursor, block_size)
+    search = [(cursor, roots[cursor_root][1])]
+    search.extend(roots[cursor_root + 1:])
+    search.extend(roots[:cursor_root])
+    search.append((roots[cursor_root][0], cursor - 1))
+    for start, end in search:
+        block = used.first_free_block(start, end, block_size)
+        if block is not None:
+            return ipaddress.IPv4Network((block, int(subnet_prefix)))
+    return None
+
+
+def best_fit(root_cidr_list, used, subnet_prefix):
+    """
+    Place the block in the smallest free range it fits in, leaving larger free ranges whole
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: IPv4Network, or None if no block is free
+    """
+    block_size = 2 ** (32 - int(subnet_prefix))
+    best = None
+    for root_start, root_end in root_ranges(root_cidr_list, subnet_prefix):
+        for start, end in used.free_ranges(root_start, root_end):
+            block = align_up(start, block_size)
+            # Keep the first of equally small ranges, in root list order
+            if block + block_size - 1 <= end and (best is None or end - start < best[0]):
+                best = (end - start, block)
+    return ipaddress.IPv4Network((best[1], int(subnet_prefix))) if best else None
+
+
+def buddy(root_cidr_list, used, subnet_prefix):
+    """
+    Place the block at the start of the smallest free aligned block it fits in, splitting it like a buddy
+    allocator, so that the largest aligned free blocks stay whole
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: IPv4Network, or None if no block is free
+    """
+    best = None
+    for root_start, root_end in root_ranges(root_cidr_list, subnet_prefix):
+        for start, end in used.free_ranges(root_start, root_end):
+            # Decompose the free range into maximal aligned blocks
+            for block in ipaddress.summarize_address_range(ipaddress.IPv4Address(start),
+                                                           ipaddress.IPv4Address(end)):
+                # Keep the first of equally small blocks, in root list order
+                if int(subnet_prefix) >= block.prefixlen and (best is None or block.prefixlen > best.prefixlen):
+                    best = block
+                    # An exact fit can not be beaten
+                    if block.prefixlen == int(subnet_prefix):
+                        return block
+    return ipaddress.IPv4Network((int(best.network_address), int(subnet_prefix))) if best else None
+
+
+def affinity(root_cidr_list, used, subnet_prefix, account_cidr_list, max_levels=AFFINITY_MAX_LEVELS):
+    """
+    Find a free block sharing the smallest possible supernet with one of an account's CIDRs, e.g. the buddy
+    of an account CIDR of the same size, so that the account's routes can be summarized
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+        account_cidr_list: CIDRs of the account in region
+        max_levels: levels above the smaller of the account CIDR and the requested size searched
+
+    Returns: IPv4Network, or None if no free block is close to the account's CIDRs
+    """
+    block_size = 2 ** (32 - int(subnet_prefix))
+    roots = root_ranges(root_cidr_list, subnet_prefix)
+    best = None
+    for cidr in account_cidr_list:
+        network = ipaddress.IPv4Network(cidr)
+        lowest = min(network.prefixlen, int(subnet_prefix))
+        for supernet_prefix in range(lowest - 1, max(lowest - 1 - max_levels, -1), -1):
+            # A larger supernet can not beat the best block found so far
+            if best is not None and supernet_prefix <= best[0]:
+                break
+            start, end = cidr_ranges.to_range(network.supernet(new_prefix=supernet_prefix))
+            # Larger supernets are not in a root CIDR either
+            if not any(root_start <= start and end <= root_end for root_start, root_end in roots):
+                break
+            block = used.first_free_block(start, end, block_size)
+            if block is not None:
+                best = (supernet_prefix, block)
+                break
+    return ipaddress.IPv4Network((best[1], int(subnet_prefix))) if best else None
+
+
+def place(policy, root_cidr_list, used, subnet_prefix, cursor=None):
+    """
+    Find a free block with a placement policy
+
+    Args:
+        policy: placement policy, one of POLICIES
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+        cursor: next-fit cursor of the region and size
+
+    Returns: IPv4Network, or None if no block is free
+    """
+    if policy == NEXT_FIT:
+        return next_fit(root_cidr_list, used, subnet_prefix, cursor)
+    if policy == BEST_FIT:
+        return best_fit(root_cidr_list, used, subnet_prefix)
+    if policy == BUDDY:
+        return buddy(root_cidr_list, used, subnet_prefix)
+    return first_fit(root_cidr_list, used, subnet_prefix)
+
+
+def fragmentation(root_cidr_list, used, subnet_prefix=32):
+    """
+    Share of the free addresses outside the largest free aligned block, 0 when all free space is one block
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: smallest CIDR size considered
+
+    Returns: float between 0 and 1
+    """
+    total = 0
+    largest = 0
+    for root_start, root_end in root_ranges(root_cidr_list, subnet_prefix):
+        for start, end in used.free_ranges(root_start, root_end):
+            total += end - start + 1
+            for block in ipaddress.summarize_address_range(ipaddress.IPv4Address(start),
+                                                           ipaddress.IPv4Address(end)):
+                largest = max(largest, block.num_addresses)
+    return 1 - largest / total if total else 0.0
+
+
+def next_cursor(network):
+    """Cursor following a placed block"""
+    return int(network.broadcast_address) + 1
@@ -2,19 +2,22 @@
 # SPDX-License-Identifier: MIT-0
 
 """Lock CIDR table to prevent concurrency issues"""
+import os
 import logging
 import time
-import boto3
 from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
+from utils import capacity, aws_clients
 
 
 # Initialize Logger
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Define constant for locked key in DDB
 LOCKED_KEY = 'LOCKED'
+# Seconds after which a lock auto-expires, unless renewed
+LOCK_TTL_SECONDS = 60
 
 
 def sync_obtain_table_lock(lock_table_name):
@@ -24,26 +27,27 @@ def sync_obtain_table_lock(lock_table_name):
     Args:
         lock_table_name: table name used for DynamoDB locks on CIDR table
 
-    Returns: bool (locked)
+    Returns: expiry time of the lock, also its token for renew_table_lock
     """
     LOGGER.info("Attempting to obtain CIDR table lock")
-    # Initialize boto client
-    ddb_resource = boto3.resource('dynamodb')
-    ddb_table = ddb_resource.Table(lock_table_name)
+    # Get shared DynamoDB table
+    ddb_table = aws_clients.get_table(lock_table_name)
     # Get lock
     lock_obtained = False
     backoff = 5
     while not lock_obtained:
         # Define expiry time for lock.  After 60 seconds, lock auto-expires
-        expiry_time = int(time.time()) + 60
+        expiry_time = int(time.time()) + LOCK_TTL_SECONDS
         try:
-            ddb_table.put_item(
+            response = ddb_table.put_item(
                 Item={
                     'cidr_block': LOCKED_KEY,
                     'lock_expiration': expiry_time
                 },
-                ConditionExpression=Attr("cidr_block").not_exists()
+                ConditionExpression=Attr("cidr_block").not_exists(),
+                ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
             )
+            capacity.record(response, write=True)
             lock_obtained = True
             LOGGER.info('Lock obtained.  Expiry time %s', str(expiry_time))
         except ClientError as e:
@@ -54,13 +58,43 @@ def sync_obtain_table_lock(lock_table_name):
                 if backoff > 60:
                     raise FailedToGetLockException()
                 else:
-                    LOGGER.info("Failed to obtain lock. Retrying after %s seconds")
+                    LOGGER.info("Failed to obtain lock. Retrying after %s seconds", backoff)
                     time.sleep(backoff)
                     backoff += (backoff * 1.5)
             # If other error, then raise it
             else:
                 raise e
-    return lock_obtained
+    return expiry_time
+
+
+def renew_table_lock(lock_table_name, expiry_time):
+    """
+    Extend a lock on the CIDR table held by the caller. The lock is only extended while it still carries the
+    expiry time the caller wrote, no other holder can have written the same one
+
+    Args:
+        lock_table_name: table name used for DynamoDB locks on CIDR table
+        expiry_time: current expiry time of the caller's lock
+
+    Returns: new expiry time of the lock, raises LockLostException when the lock is no longer held
+    """
+    ddb_table = aws_clients.get_table(lock_table_name)
+    new_expiry_time = max(int(time.time()) + LOCK_TTL_SECONDS, expiry_time + 1)
+    try:
+        response = ddb_table.update_item(
+            Key={'cidr_block': LOCKED_KEY},
+            UpdateExpression='SET lock_expiration = :new_expiry',
+            ConditionExpression=Attr('lock_expiration').eq(expiry_time),
+            ExpressionAttributeValues={':new_expiry': new_expiry_time},
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            raise LockLostException()
+        raise e
+    capacity.record(response, write=True)
+    LOGGER.info('Lock renewed.  Expiry time %s', str(new_expiry_time))
+    return new_expiry_time
 
 
 def clear_table_lock(lock_table_name):
@@ -73,15 +107,16 @@ def clear_table_lock(lock_table_name):
     Returns: bool (lock cleared)
     """
     LOGGER.info("Attempting to clear CIDR table lock")
-    # Initialize boto client
-    ddb_resource = boto3.resource('dynamodb')
-    ddb_table = ddb_resource.Table(lock_table_name)
+    # Get shared DynamoDB table
+    ddb_table = aws_clients.get_table(lock_table_name)
     try:
-        ddb_table.delete_item(
+        response = ddb_table.delete_item(
             Key={
                 'cidr_block': LOCKED_KEY
-            }
+            },
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
         )
+        capacity.record(response, write=True)
         LOGGER.info("Successfully CIDR table lock")
     except ClientError as e:
         LOGGER.info("Failed to clear CIDR lock: %s", str(e))
@@ -100,3 +135,16 @@ class FailedToGetLockException(Exception):
     def __init__(self, message="Failed to obtain lock."):
         self.message = message
         super().__init__(self.message)
+
+
+class LockLostException(Exception):
+    """
+    Exception raised when a lock expired and was deleted or taken by another request before it was renewed
+
+    Attributes:
+        message -- Description of the error
+    """
+
+    def __init__(self, message="CIDR table lock was lost."):
+        self.message = message
+        super().__init__(self.message)
@@ -6,46 +6,168 @@ import os
 import ipaddress
 import time
 import json
+import base64
+import hashlib
 import logging
 import traceback
 from urllib.parse import unquote
-import boto3
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeSerializer
 from botocore.exceptions import ClientError
-from utils import cidr_lock
+from utils import cidr_lock, capacity, aws_clients, cidr_allocator, cidr_ranges, parallel_enum, job_store, \
+    http_encoding
+from utils.logging_utils import summarize_list
 
 # Initialize Logger
 LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Read configurable subnet prefix sizes
 SUBNET_PREFIX_LOW = int(os.environ.get('SUBNET_PREFIX_LOW', 16))
 SUBNET_PREFIX_HIGH = int(os.environ.get('SUBNET_PREFIX_HIGH', 27))
+# Placement policy of reserved CIDRs, one of cidr_allocator.POLICIES
+ALLOCATION_POLICY = os.environ.get('ALLOCATION_POLICY', cidr_allocator.FIRST_FIT).lower()
+# Key prefix of the next-fit cursor items. Cursor items have no region attr and are excluded from CIDR scans
+CURSOR_KEY_PREFIX = 'CURSOR'
+# Listing formats of GET /cidrs, CIDR strings or runs of consecutive CIDRs
+LISTING_FORMATS = ('cidrs', 'runs')
+# Key prefix of the allocation version items, counting the writes to the CIDRs of each region
+VERSION_KEY_PREFIX = 'VERSION'
+# GSI of the CIDR table on account_alias
+ACCOUNT_INDEX_NAME = os.environ.get('ACCOUNT_INDEX_NAME', 'account_alias-index')
+# Default and maximum number of CIDRs in a page of an account listing
+ACCOUNT_PAGE_LIMIT = int(os.environ.get('ACCOUNT_PAGE_LIMIT', 100))
+ACCOUNT_PAGE_MAX_LIMIT = int(os.environ.get('ACCOUNT_PAGE_MAX_LIMIT', 1000))
+# Seconds a reserved CIDR stays locked without being assigned, before the sweeper releases it
+RESERVATION_LEASE_SECONDS = int(os.environ.get('RESERVATION_LEASE_SECONDS', 86400))
+# DynamoDB table the released CIDRs are archived to
+ARCHIVE_DDB_TABLE_NAME = os.environ.get('ALLOCATED_CIDR_ARCHIVE_DDB_TABLE_NAME', 'AllocatedCidrArchive')
+# Key prefix of the idempotency marker items. Marker items have no region attr and are excluded from CIDR scans
+IDEMPOTENCY_KEY_PREFIX = 'IDEMPOTENCY'
+# Seconds an idempotency key is remembered, the marker items expire through the table TTL on lock_expiration
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+# Maximum length of an idempotency key
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Sparse GSI of the locked CIDRs of each region, sorted by first address
+REGION_INDEX_NAME = os.environ.get('REGION_INDEX_NAME', 'region_key-index')
+# Overlap check of reserve_cidr before its write, neighbors queries the CIDRs around the candidate, off disables it
+RESERVE_OVERLAP_CHECK = os.environ.get('RESERVE_OVERLAP_CHECK', 'neighbors').lower()
+# Maximum number of CIDR sizes of a single dry run reserve request
+DRY_RUN_MAX_SIZES = int(os.environ.get('DRY_RUN_MAX_SIZES', 100))
+# Maximum number of CIDRs in a single overlap check request
+OVERLAP_CHECK_MAX_CIDRS = int(os.environ.get('OVERLAP_CHECK_MAX_CIDRS', 5000))
 
+# Param store path of the region params
+REGION_PARAM_PATH = '/vpcx/aws/regions'
 
-def retrieve_region_cidr(region, cloud_provider):
+# Seconds a region parameter is cached by a container. 0 disables the cache
+REGION_PARAM_CACHE_TTL = int(os.environ.get('REGION_PARAM_CACHE_TTL', 60))
+
+# Cached region parameters, keyed by region
+_REGION_PARAM_CACHE = {}
+
+
+def retrieve_region_param(region):
     """
-    Retrieve CIDR blocks in param store
+    Retrieve the region param from param store. Params are cached for REGION_PARAM_CACHE_TTL seconds.
 
     Args:
-        region: Region for which the root CIDR list needs to be retrieved
-        cloud_provider: cloud provider
+        region: Region for which the param needs to be retrieved
 
-    Returns: list of top-level blocks allocated to a region
+    Returns: parsed region param value
+    """
+    return retrieve_versioned_region_param(region)['value']
+
+
+def retrieve_region_param_version(region):
+    """
+    Retrieve the param store version of the region param, from the same cache as its value
+
+    Args:
+        region: Region for which the param version needs to be retrieved
+
+    Returns: param version, incremented by param store on every write of the param
+    """
+    return retrieve_versioned_region_param(region)['version']
+
+
+def retrieve_versioned_region_param(region):
     """
-    # Initialize boto client
-    ssm_client = boto3.client('ssm')
+    Retrieve the region param and its version from param store, cached for REGION_PARAM_CACHE_TTL seconds
+
+    Args:
+        region: Region for which the param needs to be retrieved
+
+    Returns: dict of the parsed param value and the param version
+    """
+    # Serve from cache if the cached param has not expired
+    cached = _REGION_PARAM_CACHE.get(region)
+    if cached and cached['expiry'] > time.time():
+        return cached
+    # Get shared SSM client
+    ssm_client = aws_clients.get_client('ssm')
     # Get region param
     try:
         response = ssm_client.get_parameter(
-            Name='/vpcx/aws/regions/{}'.format(region),
+            Name='{}/{}'.format(REGION_PARAM_PATH, region),
         )
         LOGGER.info('Retrieved region param: %s', response['Parameter'])
     except ssm_client.exceptions.ParameterNotFound:
         LOGGER.info("Region not found in parameter store.")
         raise MissingRegionError()
     # Get param value
-    param_value = json.loads(response['Parameter']['Value'])
+    versioned = {
+        'expiry': time.time() + REGION_PARAM_CACHE_TTL,
+        'value': json.loads(response['Parameter']['Value']),
+        'version': response['Parameter'].get('Version', 0)
+    }
+    if REGION_PARAM_CACHE_TTL > 0:
+        _REGION_PARAM_CACHE[region] = versioned
+    return versioned
+
+
+def clear_region_param_cache():
+    """
+    Drop all cached region params
+
+    Returns: None
+    """
+    _REGION_PARAM_CACHE.clear()
+
+
+def retrieve_all_region_params():
+    """
+    Retrieve the params of all regions from param store, in bulk
+
+    Returns: dict of region to parsed region param value
+    """
+    # Get shared SSM client
+    ssm_client = aws_clients.get_client('ssm')
+    region_params = {}
+    kwargs = {'Path': REGION_PARAM_PATH, 'Recursive': False, 'MaxResults': 10}
+    while True:
+        response = ssm_client.get_parameters_by_path(**kwargs)
+        for parameter in response['Parameters']:
+            region = parameter['Name'].rsplit('/', 1)[-1]
+            region_params[region] = json.loads(parameter['Value'])
+        if not response.get('NextToken'):
+            break
+        kwargs['NextToken'] = response['NextToken']
+    LOGGER.info("Retrieved params of %s regions.", len(region_params))
+    return region_params
+
+
+def retrieve_region_cidr(region, cloud_provider):
+    """
+    Retrieve CIDR blocks in param store
+
+    Args:
+        region: Region for which the root CIDR list needs to be retrieved
+        cloud_provider: cloud provider
+
+    Returns: list of top-level blocks allocated to a region
+    """
+    param_value = retrieve_region_param(region)
     # Check cloud provider
     if cloud_provider.upper() not in param_value.get('master-cidr', {}):
         raise InvalidCloudProviderError()
@@ -68,11 +190,10 @@ def retrieve_used_cidrs(region, is_locked, is_assigned, cloud_provider, ddb_tabl
 
     Returns: list of CIDRs in use for a region
     """
-    LOGGER.info("Details for used cidr table scan are: DDB Table {}, region {} , cloud provider {}"
-                .format(ddb_table, region, cloud_provider))
+    LOGGER.info("Details for used cidr table scan are: DDB Table %s, region %s, cloud provider %s",
+                ddb_table, region, cloud_provider)
     # Scan the DynamoDB CIDR table
-    ddb_resource = boto3.resource('dynamodb')
-    ddb_table = ddb_resource.Table(ddb_table)
+    ddb_table = aws_clients.get_table(ddb_table)
     # If locked is True, then you are looking for all locked CIDRs (assigned can be variable)
     if is_locked:
         filter_expression = Attr("cloud").eq(cloud_provider.upper()) & Attr("region").eq(region.upper()) & \
@@ -84,25 +205,152 @@ def retrieve_used_cidrs(region, is_locked, is_assigned, cloud_provider, ddb_tabl
         filter_expression = Attr("cloud").eq(cloud_provider.upper()) & Attr("region").eq(region.upper()) & \
                             Attr("locked").eq(not is_locked)
     projection_expression = 'cidr_block'
+    capacity.check_read_budget()
     resp = ddb_table.scan(
         FilterExpression=filter_expression,
-        ProjectionExpression=projection_expression
+        ProjectionExpression=projection_expression,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
     )
+    capacity.record(resp)
     cidr_list = [item['cidr_block'] for item in resp['Items']]
     while 'LastEvaluatedKey' in resp:
+        # Stop paging before the next page would exceed the read budget
+        capacity.check_read_budget()
         resp = ddb_table.scan(ExclusiveStartKey=resp['LastEvaluatedKey'],
                               FilterExpression=filter_expression,
-                              ProjectionExpression=projection_expression
+                              ProjectionExpression=projection_expression,
+                              ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
                               )
+        capacity.record(resp)
         cidr_list.extend([item['cidr_block'] for item in resp['Items']])
-    LOGGER.info('Used CIDRs: %s', str(cidr_list))
+    LOGGER.info('Used CIDRs: %s', summarize_list(cidr_list))
     # If table lock in CIDR list, remove it
     if cidr_lock.LOCKED_KEY in cidr_list:
         cidr_list.remove(cidr_lock.LOCKED_KEY)
     return cidr_list
 
 
-def find_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix):
+def retrieve_allocations(cloud_provider, ddb_table, region=None):
+    """
+    Retrieve all CIDR allocations of a cloud provider from DDB, with their owner and flags
+
+    Args:
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+        region: Optional region to restrict the scan to
+
+    Returns: list of allocation items
+    """
+    LOGGER.info("Retrieving allocations: DDB Table %s, cloud provider %s, region %s", ddb_table, cloud_provider,
+                region)
+    # Scan the DynamoDB CIDR table
+    ddb_table = aws_clients.get_table(ddb_table)
+    filter_expression = Attr("cloud").eq(cloud_provider.upper())
+    if region:
+        filter_expression = filter_expression & Attr("region").eq(region.upper())
+    scan_kwargs = {
+        'FilterExpression': filter_expression,
+        'ProjectionExpression': 'cidr_block, account_alias, #region, cloud, locked, assigned',
+        'ExpressionAttributeNames': {'#region': 'region'},
+        'ReturnConsumedCapacity': capacity.RETURN_CONSUMED_CAPACITY
+    }
+    capacity.check_read_budget()
+    resp = ddb_table.scan(**scan_kwargs)
+    capacity.record(resp)
+    allocations = list(resp['Items'])
+    while 'LastEvaluatedKey' in resp:
+        # Stop paging before the next page would exceed the read budget
+        capacity.check_read_budget()
+        resp = ddb_table.scan(ExclusiveStartKey=resp['LastEvaluatedKey'], **scan_kwargs)
+        capacity.record(resp)
+        allocations.extend(resp['Items'])
+    LOGGER.info('Retrieved %s allocations.', len(allocations))
+    return allocations
+
+
+def retrieve_account_allocations(account_alias, ddb_table, cloud_provider=None, region=None, limit=None,
+                                 exclusive_start_key=None):
+    """
+    Retrieve one page of the allocations of an account, with a Query on the account GSI
+
+    Args:
+        account_alias: account alias
+        ddb_table: DynamoDB table used to store CIDR blocks
+        cloud_provider: Optional cloud provider to restrict the page to
+        region: Optional region to restrict the page to
+        limit: Optional number of items evaluated by the Query
+        exclusive_start_key: LastEvaluatedKey of the previous page
+
+    Returns: (list of allocation items, LastEvaluatedKey or None on the last page)
+    """
+    LOGGER.info("Retrieving allocations of account %s: cloud provider %s, region %s", account_alias, cloud_provider,
+                region)
+    ddb_table = aws_clients.get_table(ddb_table)
+    query_kwargs = {
+        'IndexName': ACCOUNT_INDEX_NAME,
+        'KeyConditionExpression': Key('account_alias').eq(account_alias.upper()),
+        'ReturnConsumedCapacity': capacity.RETURN_CONSUMED_CAPACITY
+    }
+    filter_expression = None
+    if cloud_provider:
+        filter_expression = Attr('cloud').eq(cloud_provider.upper())
+    if region:
+        region_filter = Attr('region').eq(region.upper())
+        filter_expression = region_filter if filter_expression is None else filter_expression & region_filter
+    if filter_expression is not None:
+        query_kwargs['FilterExpression'] = filter_expression
+    if limit:
+        query_kwargs['Limit'] = limit
+    if exclusive_start_key:
+        query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    capacity.check_read_budget()
+    resp = ddb_table.query(**query_kwargs)
+    capacity.record(resp)
+    return resp['Items'], resp.get('LastEvaluatedKey')
+
+
+def retrieve_account_cidrs(account_alias, cloud_provider, region, ddb_table):
+    """
+    Retrieve all CIDRs of an account in a region, paging through the account GSI
+
+    Args:
+        account_alias: account alias
+        cloud_provider: cloud provider
+        region: region
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: list of CIDR blocks
+    """
+    items, last_key = retrieve_account_allocations(account_alias, ddb_table, cloud_provider, region)
+    cidr_list = [item['cidr_block'] for item in items]
+    while last_key:
+        items, last_key = retrieve_account_allocations(account_alias, ddb_table, cloud_provider, region,
+                                                       exclusive_start_key=last_key)
+        cidr_list.extend(item['cidr_block'] for item in items)
+    LOGGER.info('CIDRs of account %s in %s: %s', account_alias, region, summarize_list(cidr_list))
+    return cidr_list
+
+
+def encode_next_token(last_evaluated_key):
+    """Opaque paging token of a LastEvaluatedKey, None on the last page"""
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+
+def decode_next_token(next_token):
+    """LastEvaluatedKey of a paging token"""
+    try:
+        last_evaluated_key = json.loads(base64.urlsafe_b64decode(unquote(next_token).encode()))
+    except ValueError:
+        raise InputValidationError('Invalid next token.')
+    if not isinstance(last_evaluated_key, dict):
+        raise InputValidationError('Invalid next token.')
+    return last_evaluated_key
+
+
+def find_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix, policy=cidr_allocator.FIRST_FIT,
+                        cursor=None):
     """
     Find an available CIDR of a given size
     
@@ -110,16 +358,160 @@ def find_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix):
         jnj_root_cidr_list: top-level CIDRs allocated to region
         allocated_cidr_list: CIDRs currently in use in region
         subnet_prefix: requested CIDR size
+        policy: placement policy, one of cidr_allocator.POLICIES
+        cursor: next-fit cursor of the region and size, see retrieve_allocation_cursor
 
     Returns: locked CIDR
     """
-    available_cidr_list = list_all_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix)
-    if available_cidr_list:
-        return ipaddress.IPv4Network(available_cidr_list[0])
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    available_cidr = cidr_allocator.place(policy, jnj_root_cidr_list, used, subnet_prefix, cursor)
+    if available_cidr is not None:
+        return available_cidr
     # No found subnets of size
     raise NoValidSubnetError()
 
 
+def cursor_key(region, cloud_provider, subnet_prefix):
+    """Key of the next-fit cursor item of a region and CIDR size"""
+    return '{}#{}#{}#{}'.format(CURSOR_KEY_PREFIX, cloud_provider.upper(), region.upper(), int(subnet_prefix))
+
+
+def retrieve_allocation_cursor(region, cloud_provider, subnet_prefix, ddb_table):
+    """
+    Retrieve the next-fit cursor of a region and CIDR size
+
+    Args:
+        region: CIDR region
+        cloud_provider: cloud provider
+        subnet_prefix: requested CIDR size
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: cursor address, or None if no CIDR of the size was placed yet
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    resp = ddb_table.get_item(
+        Key={'cidr_block': cursor_key(region, cloud_provider, subnet_prefix)},
+        ConsistentRead=True,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp)
+    item = resp.get('Item')
+    return int(item['cursor']) if item else None
+
+
+def save_allocation_cursor(region, cloud_provider, subnet_prefix, cursor, ddb_table):
+    """
+    Save the next-fit cursor of a region and CIDR size
+
+    Args:
+        region: CIDR region
+        cloud_provider: cloud provider
+        subnet_prefix: requested CIDR size
+        cursor: address following the last placed CIDR
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: None
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    resp = ddb_table.put_item(
+        Item={
+            'cidr_block': cursor_key(region, cloud_provider, subnet_prefix),
+            'cursor': cursor
+        },
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp, write=True)
+
+
+def version_key(region, cloud_provider):
+    """Key of the allocation version item of a region"""
+    return '{}#{}#{}'.format(VERSION_KEY_PREFIX, cloud_provider.upper(), region.upper())
+
+
+def retrieve_allocation_version(region, cloud_provider, ddb_table):
+    """
+    Retrieve the allocation version of a region, a single consistent read
+
+    Args:
+        region: CIDR region
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: allocation version, 0 if no CIDR of the region was written since versions were introduced
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    resp = ddb_table.get_item(
+        Key={'cidr_block': version_key(region, cloud_provider)},
+        ConsistentRead=True,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp)
+    item = resp.get('Item')
+    return int(item['version']) if item else 0
+
+
+def bump_allocation_version(region, cloud_provider, ddb_table):
+    """
+    Increment the allocation version of a region, after a write to its CIDRs. Listings read the version
+    before reading the CIDRs, so a listing is never tagged with a version newer than its data.
+
+    The write has already committed when the version is bumped, so a failed bump is logged and not raised.
+    Until the next write to the region bumps the version, clients holding the previous ETag keep their listing.
+
+    Args:
+        region: CIDR region
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: True if the version was bumped
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    try:
+        resp = ddb_table.update_item(
+            Key={'cidr_block': version_key(region, cloud_provider)},
+            UpdateExpression='ADD version :one',
+            ExpressionAttributeValues={':one': 1},
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+        )
+    except ClientError as e:
+        LOGGER.error("Failed to bump the allocation version of %s %s: %s.", cloud_provider, region, str(e))
+        return False
+    capacity.record(resp, write=True)
+    return True
+
+
+def listing_etag(region, cloud_provider, request_params, ddb_table):
+    """
+    Entity tag of a CIDR listing, from the allocation version of the region, the version of its root CIDR
+    param and the listing params, format and content encoding
+
+    Args:
+        region: region
+        cloud_provider: cloud provider
+        request_params: params of the GET /cidrs request
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: quoted entity tag
+    """
+    listing = '|'.join(str(request_params.get(name)) for name in ('size', 'locked', 'assigned', 'format', 'gzip'))
+    return '"{}.{}.{}"'.format(retrieve_allocation_version(region, cloud_provider, ddb_table),
+                               retrieve_region_param_version(region),
+                               hashlib.sha1(listing.encode('utf-8')).hexdigest()[:8])
+
+
+def etag_matches(etag, if_none_match):
+    """
+    Check the entity tag of a listing against the If-None-Match tags of a request
+
+    Args:
+        etag: entity tag of the listing
+        if_none_match: list of entity tags of the request, or None without If-None-Match header
+
+    Returns: bool (not modified)
+    """
+    return bool(if_none_match) and ('*' in if_none_match or etag in if_none_match)
+
+
 def list_all_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix):
     """
     Find all CIDRs of specified size from the provided top level CIDR list in the region
@@ -129,41 +521,98 @@ def list_all_available_cidr(jnj_root_cidr_list, allocated_cidr_list, subnet_pref
         allocated_cidr_list: CIDRs currently in use in region
         subnet_prefix: requested CIDR size
 
-    Returns: locked CIDR
+    Returns: list of available CIDRs, in root list and address order
     """
-    # Initialize result array
-    available_cidr_list = []
-    # Iterate through root level CIDRs
-    for cidr in jnj_root_cidr_list:
-        # Cast top-level CIDR string to network objet
-        cidr = ipaddress.IPv4Network(cidr)
-        # If top-level CIDR is smaller than requested CIDR, skip this top-level CIDR
-        if int(cidr.prefixlen) > int(subnet_prefix):
-            continue
-        # Iterate through already allocated CIDRs
-        allocated_cidr_in_master_list = [ipaddress.IPv4Network(cidr_block) for cidr_block in allocated_cidr_list if
-                                         ipaddress.IPv4Network(cidr_block).overlaps(cidr)]
-        # Divide the top-level CIDR into a CIDRs of the requested size
-        cidr_subnets = list(cidr.subnets(new_prefix=int(subnet_prefix)))
-        # Iterate through theoretical subnets and search for overlap
-        for subnet in cidr_subnets:
-            # Search for overlap with already allocated CIDRs
-            subnet_conflict_flag = False
-            for allocated_cidr in allocated_cidr_in_master_list:
-                if subnet.overlaps(allocated_cidr):
-                    subnet_conflict_flag = True
-                    break
-            # Found a conflict
-            if subnet_conflict_flag:
-                continue
-            # This subnet has no conflicts, append to list of available subnets
-            else:
-                available_cidr_list.append(subnet.with_prefixlen)
-    # Return results
-    return available_cidr_list
+    # Walk the free ranges of each root, split across worker processes for large roots
+    return parallel_enum.enumerate_available(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix)
+
+
+def list_available_cidr_runs(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix):
+    """
+    Find all CIDRs of specified size in the region, as runs of consecutive CIDRs
+
+    Args:
+        jnj_root_cidr_list: top-level CIDRs allocated to region
+        allocated_cidr_list: CIDRs currently in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: list of (first address, prefix length, number of CIDRs), in root list and address order
+    """
+    # One run per free range, the CIDRs are never enumerated
+    return parallel_enum.available_runs(jnj_root_cidr_list, allocated_cidr_list, subnet_prefix)
+
+
+def region_key(region, cloud_provider):
+    """Sort-key partition of the CIDRs of a region in the region GSI"""
+    return '{}#{}'.format(cloud_provider.upper(), region.upper())
+
+
+def range_attributes(cidr_block, region, cloud_provider):
+    """
+    Numeric range attributes of a CIDR item, indexed by the region GSI
+
+    Args:
+        cidr_block: CIDR block
+        region: region
+        cloud_provider: cloud provider
+
+    Returns: dict of region_key, net_start and net_end
+    """
+    net_start, net_end = cidr_ranges.to_range(cidr_block)
+    return {
+        'region_key': region_key(region, cloud_provider),
+        'net_start': net_start,
+        'net_end': net_end
+    }
+
+
+def find_overlapping_neighbor(cidr_block, region, cloud_provider, ddb_table):
+    """
+    Find a locked CIDR overlapping a candidate, reading only its predecessor and successor in the region GSI.
+    Locked CIDRs never overlap each other, so only the locked CIDR starting last before the candidate can contain
+    it, and only the first locked CIDR starting inside the candidate needs to be read. Unlocked items are
+    filtered out and the query continues past them.
+
+    Args:
+        cidr_block: candidate CIDR block
+        region: region
+        cloud_provider: cloud provider
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: overlapping CIDR block, or None
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    net_start, net_end = cidr_ranges.to_range(cidr_block)
+    partition = Key('region_key').eq(region_key(region, cloud_provider))
+    # Predecessor, the CIDR starting last at or before the candidate
+    key_conditions = [(Key('net_start').lte(net_start), False)]
+    # Successor, the first CIDR starting inside the candidate
+    if net_end > net_start:
+        key_conditions.append((Key('net_start').between(net_start + 1, net_end), True))
+    for key_condition, scan_forward in key_conditions:
+        query_kwargs = {
+            'IndexName': REGION_INDEX_NAME,
+            'KeyConditionExpression': partition & key_condition,
+            'FilterExpression': Attr('locked').eq(True),
+            'ScanIndexForward': scan_forward,
+            'Limit': 1,
+            'ReturnConsumedCapacity': capacity.RETURN_CONSUMED_CAPACITY
+        }
+        while True:
+            resp = ddb_table.query(**query_kwargs)
+            capacity.record(resp)
+            if resp['Items'] or 'LastEvaluatedKey' not in resp:
+                break
+            # The evaluated item is not locked, read the next one
+            query_kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+        for item in resp['Items']:
+            if int(item['net_end']) >= net_start and int(item['net_start']) <= net_end:
+                return item['cidr_block']
+    return None
 
 
-def reserve_cidr(available_cidr, region, account_alias, cloud_provider, ddb_table):
+def reserve_cidr(available_cidr, region, account_alias, cloud_provider, ddb_table, idempotency_key=None,
+                 check_neighbors=True):
     """
     Reserve a CIDR, add Entry to DynamoDB
 
@@ -173,29 +622,48 @@ def reserve_cidr(available_cidr, region, account_alias, cloud_provider, ddb_tabl
         account_alias: Alias that will be associated with CIDR, value inserted into DDB
         cloud_provider: Value for cloud provider, inserted into DynamoDB
         ddb_table: DynamoDB table used to store CIDR blocks
+        idempotency_key: Optional idempotency key of the request, stored with the reservation
+        check_neighbors: Check the candidate's neighbors in the region GSI. Callers which picked the candidate
+                         from a scan of the region under the table lock skip the two queries
 
     Returns: new object status
     """
     LOGGER.info("Reserving CIDR %s", available_cidr)
-    # Initialize boto client
-    ddb_resource = boto3.resource('dynamodb')
-    ddb_table = ddb_resource.Table(ddb_table)
+    # Check the candidate's neighbors before the write
+    if RESERVE_OVERLAP_CHECK == 'neighbors' and check_neighbors:
+        neighbor = find_overlapping_neighbor(available_cidr, region, cloud_provider, ddb_table)
+        if neighbor is not None:
+            LOGGER.error('CIDR %s overlaps %s.', available_cidr, neighbor)
+            return {
+                'statusCode': 400,
+                'body': 'CIDR block already exists.' if neighbor == str(available_cidr)
+                else 'CIDR block overlaps {}.'.format(neighbor)
+            }
+    item = dict({
+        'cidr_block': str(available_cidr),  # Required param
+        'account_alias': account_alias.upper(),  # Required param
+        'lock_date': time.ctime(),
+        'lease_expiration': int(time.time()) + RESERVATION_LEASE_SECONDS,
+        'assigned': False,
+        'locked': True,
+        'region': region.upper(),  # Required param
+        'cloud': cloud_provider.upper()
+    }, **range_attributes(available_cidr, region, cloud_provider))
+    if idempotency_key:
+        return reserve_cidr_with_idempotency_key(item, idempotency_key, ddb_table)
+    # Get shared DynamoDB table
+    table = aws_clients.get_table(ddb_table)
     try:
-        response = ddb_table.put_item(
-            Item={
-                'cidr_block': str(available_cidr),  # Required param
-                'account_alias': account_alias.upper(),  # Required param
-                'lock_date': time.ctime(),
-                'assigned': False,
-                'locked': True,
-                'region': region.upper(),  # Required param
-                'cloud': cloud_provider.upper()
-            },
-            ConditionExpression=(Attr("cidr_block").not_exists() | Attr("locked").eq(False))
+        response = table.put_item(
+            Item=item,
+            ConditionExpression=(Attr("cidr_block").not_exists() | Attr("locked").eq(False)),
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
         )
+        capacity.record(response, write=True)
         LOGGER.info('CIDR reserve response: %s', response)
         # Evaluate results
         if response['ResponseMetadata']['HTTPStatusCode'] in [200, 201]:
+            bump_allocation_version(region, cloud_provider, ddb_table)
             return {
                 'statusCode': 200,
                 'body': '{}'.format(available_cidr)
@@ -215,6 +683,300 @@ def reserve_cidr(available_cidr, region, account_alias, cloud_provider, ddb_tabl
             raise e
 
 
+def idempotency_marker_key(account_alias, idempotency_key):
+    """Key of the idempotency marker item of a request, idempotency keys are scoped by account"""
+    return '{}#{}#{}'.format(IDEMPOTENCY_KEY_PREFIX, account_alias.upper(), idempotency_key)
+
+
+def retrieve_idempotent_reservation(idempotency_key, account_alias, subnet_prefix, region, cloud_provider,
+                                    ddb_table):
+    """
+    Retrieve the CIDR reserved by an earlier request with the same idempotency key. The CIDR is only replayed
+    while it is still reserved by that request; once it was released, the marker is deleted and the key is unused.
+
+    Args:
+        idempotency_key: idempotency key of the request
+        account_alias: Alias of the request
+        subnet_prefix: requested CIDR size
+        region: Region of the request
+        cloud_provider: cloud provider of the request
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: response of the earlier request, or None if the key was not used yet
+    """
+    resp = aws_clients.get_table(ddb_table).get_item(
+        Key={'cidr_block': idempotency_marker_key(account_alias, idempotency_key)},
+        ConsistentRead=True,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp)
+    marker = resp.get('Item')
+    # Expired markers may not have been deleted by the table TTL yet
+    if not marker or int(marker.get('lock_expiration', 0)) <= time.time():
+        return None
+    if int(marker['subnet_prefix']) != int(subnet_prefix) or marker['request_region'] != region.upper() or \
+            marker['request_cloud'] != cloud_provider.upper():
+        LOGGER.error('Idempotency key %s was used for a different request.', idempotency_key)
+        return {
+            'statusCode': 409,
+            'body': 'Idempotency key was used with different request parameters.'
+        }
+    # The reservation may have been released, and the CIDR reserved again, since the marker was written
+    resp = aws_clients.get_table(ddb_table).get_item(
+        Key={'cidr_block': marker['reserved_cidr']},
+        ConsistentRead=True,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp)
+    item = resp.get('Item')
+    if not item or not item.get('locked') or item.get('account_alias') != account_alias.upper() or \
+            item.get('lock_date') != marker.get('lock_date'):
+        LOGGER.info('CIDR %s of idempotency key %s was released, the key is unused.', marker['reserved_cidr'],
+                    idempotency_key)
+        delete_idempotency_marker(marker, ddb_table)
+        return None
+    LOGGER.info('Returning CIDR %s reserved with idempotency key %s.', marker['reserved_cidr'], idempotency_key)
+    return {
+        'statusCode': 200,
+        'headers': {'Idempotent-Replayed': 'true'},
+        'body': marker['reserved_cidr']
+    }
+
+
+def delete_idempotency_marker(marker, ddb_table):
+    """
+    Delete the idempotency marker of a released reservation, unless another request replaced it since it was read
+
+    Args:
+        marker: idempotency marker item
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: None
+    """
+    try:
+        resp = aws_clients.get_table(ddb_table).delete_item(
+            Key={'cidr_block': marker['cidr_block']},
+            ConditionExpression=Attr('reserved_cidr').eq(marker['reserved_cidr']) &
+                                Attr('lock_date').eq(marker.get('lock_date')),
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+        )
+        capacity.record(resp, write=True)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise e
+        LOGGER.info('Idempotency marker %s was replaced, keeping it.', marker['cidr_block'])
+
+
+def reserve_cidr_with_idempotency_key(item, idempotency_key, ddb_table):
+    """
+    Write a reservation and its idempotency marker in one transaction, conditional on the key being unused
+
+    Args:
+        item: CIDR item of the reservation
+        idempotency_key: idempotency key of the request
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: new object status
+    """
+    serializer = TypeSerializer()
+    network = ipaddress.IPv4Network(item['cidr_block'])
+    marker = {
+        'cidr_block': idempotency_marker_key(item['account_alias'], idempotency_key),
+        'reserved_cidr': item['cidr_block'],
+        'subnet_prefix': network.prefixlen,
+        'request_region': item['region'],
+        'request_cloud': item['cloud'],
+        'lock_date': item['lock_date'],
+        'lock_expiration': int(time.time()) + IDEMPOTENCY_TTL
+    }
+    ddb_client = aws_clients.get_client('dynamodb')
+    try:
+        response = ddb_client.transact_write_items(
+            TransactItems=[
+                {
+                    'Put': {
+                        'TableName': ddb_table,
+                        'Item': {name: serializer.serialize(value) for name, value in item.items()},
+                        'ConditionExpression': 'attribute_not_exists(cidr_block) OR locked = :false_val',
+                        'ExpressionAttributeValues': {':false_val': {'BOOL': False}}
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': ddb_table,
+                        'Item': {name: serializer.serialize(value) for name, value in marker.items()},
+                        'ConditionExpression': 'attribute_not_exists(cidr_block) OR lock_expiration <= :now_val',
+                        'ExpressionAttributeValues': {':now_val': {'N': str(int(time.time()))}}
+                    }
+                }
+            ],
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise e
+        reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+        LOGGER.error('Idempotent reserve of %s cancelled: %s', item['cidr_block'], reasons)
+        # Another request with the same key reserved a CIDR first
+        if len(reasons) > 1 and reasons[1] == 'ConditionalCheckFailed':
+            replayed = retrieve_idempotent_reservation(idempotency_key, item['account_alias'], network.prefixlen,
+                                                       item['region'], item['cloud'], ddb_table)
+            if replayed is not None:
+                return replayed
+        return {
+            'statusCode': 400,
+            'body': 'CIDR block already exists.'
+        }
+    capacity.record(response, write=True)
+    LOGGER.info('CIDR reserve response: %s', response)
+    bump_allocation_version(item['region'], item['cloud'], ddb_table)
+    return {
+        'statusCode': 200,
+        'body': item['cidr_block']
+    }
+
+
+def retrieve_expired_reservations(now, ddb_table):
+    """
+    Retrieve locked, unassigned CIDRs whose lease expired
+
+    Args:
+        now: current epoch seconds
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: list of CIDR items
+    """
+    ddb_table = aws_clients.get_table(ddb_table)
+    scan_kwargs = {
+        'FilterExpression': Attr('lease_expiration').lt(now) & Attr('assigned').eq(False) & Attr('locked').eq(True),
+        'ReturnConsumedCapacity': capacity.RETURN_CONSUMED_CAPACITY
+    }
+    resp = ddb_table.scan(**scan_kwargs)
+    capacity.record(resp)
+    items = resp['Items']
+    while 'LastEvaluatedKey' in resp:
+        resp = ddb_table.scan(ExclusiveStartKey=resp['LastEvaluatedKey'], **scan_kwargs)
+        capacity.record(resp)
+        items.extend(resp['Items'])
+    LOGGER.info('Expired reservations: %s', summarize_list([item['cidr_block'] for item in items]))
+    return items
+
+
+def archive_and_delete(item, reason, condition_expression, condition_values, ddb_table, archive_table):
+    """
+    Delete a CIDR item and write it to the archive table in one transaction. Uses the thread-safe DynamoDB
+    client, so CIDRs can be released from worker threads.
+
+    Args:
+        item: CIDR item as read from the table
+        reason: release reason stored with the archived item
+        condition_expression: condition of the delete
+        condition_values: python values of the condition expression
+        ddb_table: DynamoDB table used to store CIDR blocks
+        archive_table: DynamoDB table the released CIDRs are archived to
+
+    Returns: DynamoDB response, or None if the condition failed
+    """
+    serializer = TypeSerializer()
+    released_at = int(time.time())
+    # Archived history of the CIDR, keyed by CIDR block and release time
+    archived = dict(item, released_at=released_at, released_date=time.ctime(released_at), release_reason=reason)
+    ddb_client = aws_clients.get_client('dynamodb')
+    try:
+        return ddb_client.transact_write_items(
+            TransactItems=[
+                {
+                    'Delete': {
+                        'TableName': ddb_table,
+                        'Key': {'cidr_block': serializer.serialize(str(item['cidr_block']))},
+                        'ConditionExpression': condition_expression,
+                        'ExpressionAttributeValues': {
+                            name: serializer.serialize(value) for name, value in condition_values.items()
+                        }
+                    }
+                },
+                {
+                    'Put': {
+                        'TableName': archive_table,
+                        'Item': {name: serializer.serialize(value) for name, value in archived.items()}
+                    }
+                }
+            ],
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'TransactionCanceledException':
+            LOGGER.info('Release of %s cancelled: %s', item['cidr_block'],
+                        e.response.get('CancellationReasons', e.response['Error'].get('Message')))
+            return None
+        raise e
+
+
+def release_expired_reservation(item, now, ddb_table, archive_table=ARCHIVE_DDB_TABLE_NAME):
+    """
+    Release a reservation if it is still unassigned and expired, and archive it
+
+    Args:
+        item: CIDR item of the expired reservation
+        now: current epoch seconds
+        ddb_table: DynamoDB table used to store CIDR blocks
+        archive_table: DynamoDB table the released CIDRs are archived to
+
+    Returns: DynamoDB response, or None if the CIDR was assigned or renewed since the scan
+    """
+    response = archive_and_delete(item, 'lease-expired', 'assigned = :false_val AND lease_expiration < :now_val',
+                                  {':false_val': False, ':now_val': now}, ddb_table, archive_table)
+    if response is None:
+        LOGGER.info('Reservation %s was assigned or renewed, keeping it.', item['cidr_block'])
+    return response
+
+
+def release_cidr(cidr_block, cloud_provider, region, ddb_table, archive_table=ARCHIVE_DDB_TABLE_NAME):
+    """
+    Release a CIDR, deleting it from the CIDR table and archiving its history
+
+    Args:
+        cidr_block: CIDR Block
+        cloud_provider: cloud provider
+        region: region
+        ddb_table: DynamoDB table used to store CIDR blocks
+        archive_table: DynamoDB table the released CIDRs are archived to
+
+    Returns: response dict
+    """
+    LOGGER.info("Releasing %s.", cidr_block)
+    # Read the item to archive
+    resp = aws_clients.get_table(ddb_table).get_item(
+        Key={'cidr_block': str(cidr_block)},
+        ConsistentRead=True,
+        ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
+    )
+    capacity.record(resp)
+    item = resp.get('Item')
+    # The lock and cursor items have no cloud or region
+    if not item or item.get('cloud') != cloud_provider.upper() or item.get('region') != region.upper():
+        return {
+            'statusCode': 404,
+            'body': 'CIDR not found.'
+        }
+    # Only delete the CIDR if it was not changed since it was read, so the archive holds its last state
+    response = archive_and_delete(item, 'released', 'lock_date = :lock_date AND assigned = :assigned',
+                                  {':lock_date': item.get('lock_date'), ':assigned': item.get('assigned')},
+                                  ddb_table, archive_table)
+    if response is None:
+        return {
+            'statusCode': 400,
+            'body': 'CIDR cannot be released.'
+        }
+    capacity.record(response, write=True)
+    LOGGER.info('CIDR release response: %s', response)
+    bump_allocation_version(region, cloud_provider, ddb_table)
+    return {
+        'statusCode': 200,
+        'body': 'CIDR released.'
+    }
+
+
 def update_cidr_flag(cidr_block, is_assigned, cloud_provider, region, ddb_table):
     """
     Update CIDR flag.  Only the value of assigned may be adjusted.
@@ -229,14 +991,20 @@ def update_cidr_flag(cidr_block, is_assigned, cloud_provider, region, ddb_table)
     Returns: new object status
     """
     LOGGER.info("Updating %s flags. Assigned %s.", cidr_block, is_assigned)
-    # Initialize boto client
-    ddb_resource = boto3.resource('dynamodb')
-    ddb_table = ddb_resource.Table(ddb_table)
-    # Set update expression
-    update_expression = 'set assigned=:assigned_val'
-    expression_attribute_values = {
-        ':assigned_val': is_assigned
-    }
+    # Get shared DynamoDB table
+    table = aws_clients.get_table(ddb_table)
+    # Set update expression. Assigned CIDRs have no lease, un-assigned CIDRs get a new one
+    if is_assigned:
+        update_expression = 'set assigned=:assigned_val remove lease_expiration'
+        expression_attribute_values = {
+            ':assigned_val': is_assigned
+        }
+    else:
+        update_expression = 'set assigned=:assigned_val, lease_expiration=:lease_val'
+        expression_attribute_values = {
+            ':assigned_val': is_assigned,
+            ':lease_val': int(time.time()) + RESERVATION_LEASE_SECONDS
+        }
     # Only CIDRs that are locked can have their assigned status updated
     locked_check_expression = Attr("locked").eq(True)
     # If attempting to set assigned to True, then ensure assigned is False.  This is because we want to
@@ -249,7 +1017,7 @@ def update_cidr_flag(cidr_block, is_assigned, cloud_provider, region, ddb_table)
         assigned_check_expression = (Attr("assigned").eq(False) | Attr("assigned").eq(True))
     # Update Item
     try:
-        response = ddb_table.update_item(
+        response = table.update_item(
             Key={
                 'cidr_block': str(cidr_block)
             },
@@ -260,11 +1028,14 @@ def update_cidr_flag(cidr_block, is_assigned, cloud_provider, region, ddb_table)
                                 assigned_check_expression,
             UpdateExpression=update_expression,
             ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="UPDATED_NEW"
+            ReturnValues="UPDATED_NEW",
+            ReturnConsumedCapacity=capacity.RETURN_CONSUMED_CAPACITY
         )
+        capacity.record(response, write=True)
         LOGGER.info('CIDR update response: %s', response)
         # Evaluate results
         if response['ResponseMetadata']['HTTPStatusCode'] in [200, 201]:
+            bump_allocation_version(region, cloud_provider, ddb_table)
             return {
                 'statusCode': 200,
                 'body': 'CIDR flag updated.'
@@ -296,8 +1067,8 @@ def extract_request_params(event):
     # Get path and query params
     query_string_params = event['queryStringParameters']
     path_params = event['pathParameters']
-    LOGGER.info("Path parameters: {}".format(path_params))
-    LOGGER.info("Query parameters: {}".format(query_string_params))
+    LOGGER.info("Path parameters: %s", path_params)
+    LOGGER.info("Query parameters: %s", query_string_params)
     # Extract cloud provider
     cloud_provider = path_params.get('cloud').upper()
     # Validate CIDR prefix
@@ -310,13 +1081,28 @@ def extract_request_params(event):
     # Scenario of assigned == True, locked == False is not allowed
     if assigned and not locked:
         raise InputValidationError('Invalid values input for flags.')
+    # List in a background job
+    run_async = str_to_bool(query_string_params.get('async', 'False'))
+    # Listing format
+    listing_format = query_string_params.get('format', LISTING_FORMATS[0]).lower()
+    if listing_format not in LISTING_FORMATS:
+        raise InputValidationError('Invalid format, one of {} is allowed.'.format(', '.join(LISTING_FORMATS)))
+    # Entity tags of a conditional GET, weak tags compare equal to strong ones
+    if_none_match = http_encoding.get_header(event, 'If-None-Match')
+    if if_none_match is not None:
+        if_none_match = [tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+                         for tag in if_none_match.split(',')]
     # Return results
     return {
         'region': path_params.get('region'),
         'assigned': assigned,
         'locked': locked,
         'size': subnet_prefix,
-        'cloud_provider': cloud_provider
+        'cloud_provider': cloud_provider,
+        'async': run_async,
+        'if_none_match': if_none_match,
+        'format': listing_format,
+        'gzip': http_encoding.accepts_gzip(event)
     }
 
 
@@ -330,10 +1116,10 @@ def extract_put_request_params(event):
     Returns: request_params dict
     """
     # Get path and body params
-    body = json.loads(event['body'])
+    body = json.loads(http_encoding.request_body(event))
     path_params = event['pathParameters']
-    LOGGER.info("Path parameters: {}".format(path_params))
-    LOGGER.info("Event Body: {}".format(str(body)))
+    LOGGER.info("Path parameters: %s", path_params)
+    LOGGER.info("Event Body: %s", body)
     # Get flags from request body request body
     assigned = str_to_bool(str(body.get('assigned')))
     # Return results
@@ -345,6 +1131,49 @@ def extract_put_request_params(event):
     }
 
 
+def extract_delete_request_params(event):
+    """
+    Extract and validate path params of DELETE (release cidr) request
+
+    Args:
+        event: elb-lambda event
+
+    Returns: request_params dict
+    """
+    path_params = event['pathParameters']
+    LOGGER.info("Path parameters: %s", path_params)
+    cidr_block = unquote(path_params.get('cidr'))
+    # Validate CIDR block
+    try:
+        ipaddress.IPv4Network(cidr_block)
+    except ValueError:
+        raise InputValidationError('Invalid CIDR block.')
+    # Return results
+    return {
+        'region': path_params.get('region'),
+        'cidr_block': cidr_block,
+        'cloud_provider': path_params.get('cloud').upper()
+    }
+
+
+def validate_subnet_prefix(size):
+    """
+    Validate a requested CIDR size
+
+    Args:
+        size: CIDR size, e.g. /24
+
+    Returns: subnet prefix string
+    """
+    try:
+        subnet_prefix = str(size).split("/")[1]
+        if int(subnet_prefix) < SUBNET_PREFIX_LOW or int(subnet_prefix) > SUBNET_PREFIX_HIGH:
+            raise ValueError()
+    except (IndexError, ValueError):
+        raise InputValidationError("Invalid CIDR Size.")
+    return subnet_prefix
+
+
 def extract_post_request_params(event):
     """
     Extract and validate path params and request body of POST (reserve cidr) request
@@ -355,19 +1184,39 @@ def extract_post_request_params(event):
     Returns: request_params dict
     """
     # Unpack request params
-    body = json.loads(event['body'])
+    body = json.loads(http_encoding.request_body(event))
     path_params = event['pathParameters']
-    LOGGER.info("Path split list: {}".format(path_params))
-    LOGGER.info("Event Body: {}".format(str(body)))
+    LOGGER.info("Path split list: %s", path_params)
+    LOGGER.info("Event Body: %s", body)
     # Validate CIDR prefix
-    subnet_prefix = (body.get('size', '/' + str(SUBNET_PREFIX_HIGH))).split("/")[1]
-    LOGGER.info("subnet_prefix: {}".format(str(subnet_prefix)))
-    if int(subnet_prefix) < SUBNET_PREFIX_LOW or int(subnet_prefix) > SUBNET_PREFIX_HIGH:
-        raise InputValidationError("Invalid CIDR Size.")
+    subnet_prefix = validate_subnet_prefix(body.get('size', '/' + str(SUBNET_PREFIX_HIGH)))
+    LOGGER.info("subnet_prefix: %s", subnet_prefix)
     # Missing account alias
     account_alias = body.get('account_alias', None)
     if not account_alias:
         raise InputValidationError('Missing account alias.')
+    # Place close to the account's CIDRs
+    affinity = body.get('affinity', False)
+    if not isinstance(affinity, bool):
+        affinity = str_to_bool(str(affinity))
+    # Only compute the placements, without reserving
+    dry_run = body.get('dry_run', False)
+    if not isinstance(dry_run, bool):
+        dry_run = str_to_bool(str(dry_run))
+    # Idempotency key of retried requests, from the Idempotency-Key header or the ticket number
+    idempotency_key = http_encoding.get_header(event, 'Idempotency-Key') or body.get('ticket_num')
+    if idempotency_key is not None:
+        idempotency_key = str(idempotency_key)
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise InputValidationError('Invalid idempotency key.')
+    # Sizes of a set of CIDRs placed one after the other, dry runs only
+    sizes = [subnet_prefix]
+    if 'sizes' in body:
+        if not dry_run:
+            raise InputValidationError('Multiple sizes are only supported with dry_run.')
+        if not isinstance(body['sizes'], list) or not body['sizes'] or len(body['sizes']) > DRY_RUN_MAX_SIZES:
+            raise InputValidationError('Invalid sizes, expected 1 to {} CIDR sizes.'.format(DRY_RUN_MAX_SIZES))
+        sizes = [validate_subnet_prefix(size) for size in body['sizes']]
     # Add request metadata
     request_metadata = {
         'event': event
@@ -376,12 +1225,151 @@ def extract_post_request_params(event):
     return {
         'size': subnet_prefix,
         'account_alias': account_alias,
+        'affinity': affinity,
+        'dry_run': dry_run,
+        'sizes': sizes,
+        'idempotency_key': idempotency_key,
         'region': path_params.get('region'),
         'request_metadata': request_metadata,
         'cloud_provider': path_params.get('cloud').upper()
     }
 
 
+def extract_lookup_request_params(event):
+    """
+    Extract and validate path and querystring params of GET lookup request
+
+    Args:
+        event: elb-lambda event
+
+    Returns: request_params dict
+    """
+    # Get path and query params
+    query_string_params = event.get('queryStringParameters') or {}
+    path_params = event['pathParameters']
+    LOGGER.info("Path parameters: %s", path_params)
+    LOGGER.info("Query parameters: %s", query_string_params)
+    # Validate IP address or CIDR block
+    ip = unquote(query_string_params.get('ip', ''))
+    try:
+        network = ipaddress.IPv4Network(ip, strict=False)
+    except ValueError:
+        raise InputValidationError('Invalid IP address or CIDR block.')
+    # Return results
+    return {
+        'ip': network.with_prefixlen,
+        'cloud_provider': path_params.get('cloud').upper()
+    }
+
+
+def extract_account_request_params(event):
+    """
+    Extract and validate path and querystring params of GET account CIDRs request
+
+    Args:
+        event: elb-lambda event
+
+    Returns: request_params dict
+    """
+    # Get path and query params
+    query_string_params = event.get('queryStringParameters') or {}
+    path_params = event['pathParameters']
+    LOGGER.info("Path parameters: %s", path_params)
+    LOGGER.info("Query parameters: %s", query_string_params)
+    # Missing account alias
+    account_alias = unquote(path_params.get('alias') or '')
+    if not account_alias:
+        raise InputValidationError('Missing account alias.')
+    # Validate page size
+    try:
+        limit = int(query_string_params.get('limit', ACCOUNT_PAGE_LIMIT))
+    except ValueError:
+        raise InputValidationError('Invalid limit.')
+    if limit < 1 or limit > ACCOUNT_PAGE_MAX_LIMIT:
+        raise InputValidationError('Invalid limit, at most {} are allowed.'.format(ACCOUNT_PAGE_MAX_LIMIT))
+    # Decode paging token
+    exclusive_start_key = None
+    if query_string_params.get('next_token'):
+        exclusive_start_key = decode_next_token(query_string_params['next_token'])
+    # Return results
+    return {
+        'account_alias': account_alias,
+        'limit': limit,
+        'exclusive_start_key': exclusive_start_key,
+        'cloud_provider': query_string_params.get('cloud'),
+        'region': query_string_params.get('region')
+    }
+
+
+def extract_job_request_params(event):
+    """
+    Extract and validate path and querystring params of GET listing job request
+
+    Args:
+        event: elb-lambda event
+
+    Returns: request_params dict
+    """
+    # Get path and query params
+    query_string_params = event.get('queryStringParameters') or {}
+    path_params = event['pathParameters']
+    LOGGER.info("Path parameters: %s", path_params)
+    LOGGER.info("Query parameters: %s", query_string_params)
+    # Validate job id
+    job_id = path_params.get('job_id')
+    if not job_store.is_valid_job_id(job_id):
+        raise InputValidationError('Invalid job id.')
+    # Validate result chunk
+    chunk = None
+    if query_string_params.get('chunk') is not None:
+        try:
+            chunk = int(query_string_params['chunk'])
+        except ValueError:
+            raise InputValidationError('Invalid chunk.')
+        if chunk < 0:
+            raise InputValidationError('Invalid chunk.')
+    # Return results
+    return {
+        'job_id': job_id,
+        'chunk': chunk
+    }
+
+
+def extract_overlap_request_params(event):
+    """
+    Extract and validate path params and request body of POST overlap check request
+
+    Args:
+        event: elb-lambda event
+
+    Returns: request_params dict
+    """
+    # Unpack request params
+    body = json.loads(http_encoding.request_body(event))
+    path_params = event['pathParameters']
+    LOGGER.info("Path parameters: %s", path_params)
+    # Validate CIDR list
+    cidrs = body.get('cidrs')
+    if not isinstance(cidrs, list) or not cidrs:
+        raise InputValidationError('Missing CIDR list.')
+    if len(cidrs) > OVERLAP_CHECK_MAX_CIDRS:
+        raise InputValidationError('Too many CIDRs, at most {} are allowed.'.format(OVERLAP_CHECK_MAX_CIDRS))
+    networks = []
+    for cidr in cidrs:
+        try:
+            networks.append(ipaddress.IPv4Network(str(cidr), strict=False).with_prefixlen)
+        except ValueError:
+            raise InputValidationError('Invalid CIDR block {}.'.format(cidr))
+    LOGGER.info("CIDRs to check: %s", summarize_list(networks))
+    # Return results
+    return {
+        'cidrs': networks,
+        'region': body.get('region'),
+        'fresh': body.get('fresh') is True,
+        'cloud_provider': path_params.get('cloud').upper()
+    }
+
+
 class NoValidSubnetError(Exception):
     """
     Exception raised when a valid subnet is not found.
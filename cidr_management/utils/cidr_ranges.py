@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Integer range helpers for IPv4 CIDR blocks"""
+import heapq
+import ipaddress
+
+
+def to_range(cidr):
+    """
+    Convert a CIDR block to its first and last address
+
+    Args:
+        cidr: CIDR string or IPv4Network
+
+    Returns: (start, end) integers, both inclusive
+    """
+    network = ipaddress.IPv4Network(cidr)
+    start = int(network.network_address)
+    return start, start + network.num_addresses - 1
+
+
+def merge_ranges(ranges):
+    """
+    Sort ranges and merge the ones that overlap or touch
+
+    Args:
+        ranges: iterable of (start, end) integers, both inclusive
+
+    Returns: sorted list of disjoint (start, end)
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def cidr_runs(cidr_list):
+    """
+    Compress CIDR blocks into runs of consecutive blocks of the same size
+
+    Args:
+        cidr_list: iterable of CIDR strings
+
+    Returns: list of (first address, prefix length, number of blocks), in address order
+    """
+    runs = []
+    for network in sorted(ipaddress.IPv4Network(cidr) for cidr in cidr_list):
+        start = int(network.network_address)
+        if runs and runs[-1][1] == network.prefixlen and runs[-1][3] == start:
+            address, prefix, count, _ = runs[-1]
+            runs[-1] = (address, prefix, count + 1, start + network.num_addresses)
+        else:
+            runs.append((start, network.prefixlen, 1, start + network.num_addresses))
+    return [(str(ipaddress.IPv4Address(address)), prefix, count) for address, prefix, count, _ in runs]
+
+
+def sweep_overlaps(intervals, cross_group_only=False):
+    """
+    Find all pairs of overlapping intervals with a single sort-and-sweep, in
+    O(n log n + k) for n intervals and k overlapping pairs
+
+    Args:
+        intervals: iterable of (start, end, group, payload), start and end inclusive
+        cross_group_only: only report pairs of intervals of different groups
+
+    Returns: list of (payload, payload) pairs, the earlier starting interval first
+    """
+    # Sort by start, a counter keeps the sort stable and payloads uncompared
+    events = sorted((start, end, group, index, payload)
+                    for index, (start, end, group, payload) in enumerate(intervals))
+    # Intervals which may still overlap, as a min-heap on their end, per group
+    active = {}
+    pairs = []
+    for start, end, group, index, payload in events:
+        for active_group, heap in active.items():
+            # Intervals ending before this one starts can no longer overlap anything
+            while heap and heap[0][0] < start:
+                heapq.heappop(heap)
+            if cross_group_only and active_group == group:
+                continue
+            pairs.extend((active_payload, payload) for _, _, active_payload in heap)
+        heapq.heappush(active.setdefault(group, []), (end, index, payload))
+    return pairs
+
+
+def find_overlaps(queries, references):
+    """
+    Find every overlap between two lists of CIDR blocks
+
+    Args:
+        queries: iterable of (cidr, payload)
+        references: iterable of (cidr, payload)
+
+    Returns: list of (query payload, reference payload)
+    """
+    # Tag payloads with their side so each pair can be returned query first
+    intervals = [to_range(cidr) + (0, (0, payload)) for cidr, payload in queries]
+    intervals.extend(to_range(cidr) + (1, (1, payload)) for cidr, payload in references)
+    return [(first[1], second[1]) if first[0] == 0 else (second[1], first[1])
+            for first, second in sweep_overlaps(intervals, cross_group_only=True)]
@@ -0,0 +1,65 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Binary radix trie for longest-prefix-match lookups of IPv4 CIDR blocks"""
+import ipaddress
+
+# Node layout: [child for bit 0, child for bit 1, (network, value) stored at this prefix]
+_ENTRY = 2
+
+
+class CidrTrie(object):
+    """
+    Binary trie of IPv4 networks. A lookup walks at most 32 nodes, one per prefix bit.
+    """
+
+    def __init__(self):
+        self._root = [None, None, None]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, cidr, value):
+        """
+        Insert a network and the value returned when it is the longest match
+
+        Args:
+            cidr: CIDR string or IPv4Network
+            value: value stored with the network
+
+        Returns: None
+        """
+        network = ipaddress.IPv4Network(cidr)
+        address = int(network.network_address)
+        node = self._root
+        for depth in range(network.prefixlen):
+            bit = (address >> (31 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[_ENTRY] is None:
+            self._size += 1
+        node[_ENTRY] = (network, value)
+
+    def longest_match(self, cidr):
+        """
+        Find the most specific network containing an address or a CIDR block
+
+        Args:
+            cidr: IP address or CIDR string, or IPv4Network
+
+        Returns: (IPv4Network, value) of the longest match, or None
+        """
+        network = ipaddress.IPv4Network(cidr, strict=False)
+        address = int(network.network_address)
+        node = self._root
+        match = node[_ENTRY]
+        # Only networks at least as large as the query can contain it
+        for depth in range(network.prefixlen):
+            node = node[(address >> (31 - depth)) & 1]
+            if node is None:
+                break
+            if node[_ENTRY] is not None:
+                match = node[_ENTRY]
+        return match
@@ -0,0 +1,99 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Content encoding of API requests and responses.
+
+Large listings are gzip compressed for clients sending Accept-Encoding: gzip. A Lambda proxy response can only
+carry binary data base64 encoded, and API Gateway only decodes it for the binary media types of the API, so
+the API lists */* as binary. Request bodies then reach the handlers base64 encoded as well, and are decoded
+with request_body.
+"""
+import os
+import gzip
+import json
+import base64
+
+# Response bodies below this size are not compressed
+RESPONSE_GZIP_MIN_BYTES = int(os.environ.get('RESPONSE_GZIP_MIN_BYTES', 1024))
+# gzip compression level, lower levels trade payload size for CPU
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 5))
+
+
+def get_header(event, name):
+    """
+    Return a request header, header names are case-insensitive
+
+    Args:
+        event: elb-lambda event
+        name: header name
+
+    Returns: header value, None if not sent
+    """
+    headers = event.get('headers') or {}
+    return next((value for header, value in headers.items() if header.lower() == name.lower()), None)
+
+
+def request_body(event):
+    """
+    Return the request body, decoded if API Gateway passed it base64 encoded
+
+    Args:
+        event: elb-lambda event
+
+    Returns: body string
+    """
+    body = event['body']
+    if event.get('isBase64Encoded') and body is not None:
+        body = base64.b64decode(body).decode('utf-8')
+    return body
+
+
+def accepts_gzip(event):
+    """
+    Check the Accept-Encoding header of a request for gzip with a non-zero quality
+
+    Args:
+        event: elb-lambda event
+
+    Returns: bool
+    """
+    for coding in (get_header(event, 'Accept-Encoding') or '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = params.strip()
+        try:
+            return not quality.startswith('q=') or float(quality[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def json_response(status_code, value, headers=None, compress=False):
+    """
+    Build a JSON proxy response, gzip compressed if requested and the body is large enough
+
+    Args:
+        status_code: HTTP status code
+        value: JSON serializable response value
+        headers: response headers
+        compress: the client accepts gzip
+
+    Returns: response dict
+    """
+    body = json.dumps(value)
+    headers = dict(headers or {})
+    if not compress or len(body) < RESPONSE_GZIP_MIN_BYTES:
+        return {
+            'statusCode': status_code,
+            'headers': headers,
+            'body': body
+        }
+    headers.update({'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'isBase64Encoded': True,
+        'body': base64.b64encode(gzip.compress(body.encode('utf-8'), RESPONSE_GZIP_LEVEL)).decode('ascii')
+    }
@@ -0,0 +1,129 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Object store of the asynchronous listing jobs.
+
+JOB_STORE_URI selects the store: s3://bucket/prefix stores the job objects in S3, file:///path in a local
+directory, the stand-in for local runs and tests. Each job has a status object and numbered result chunks:
+
+    {prefix}/{job_id}/status.json
+    {prefix}/{job_id}/chunk-00000.json
+"""
+import os
+import re
+import json
+import uuid
+import logging
+from urllib.parse import urlparse
+from botocore.exceptions import ClientError
+from utils import aws_clients
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Location of the job objects
+JOB_STORE_URI = os.environ.get('JOB_STORE_URI', 'file:///tmp/cidr-jobs')
+# Job ids are uuid4 hex strings, they are used in object keys
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+# Error codes of a missing object. Without s3:ListBucket, S3 answers a missing key with AccessDenied
+MISSING_OBJECT_CODES = ('NoSuchKey', '404', 'AccessDenied')
+
+
+class LocalJobStore(object):
+    """Job objects stored as files of a local directory"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def put(self, key, body):
+        """Write an object, replacing it atomically"""
+        path = os.path.join(self.path, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as job_file:
+            job_file.write(body)
+        os.replace(path + '.tmp', path)
+
+    def get(self, key):
+        """Read an object, None if it does not exist"""
+        path = os.path.join(self.path, key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as job_file:
+            return job_file.read()
+
+
+class S3JobStore(object):
+    """Job objects stored in an S3 bucket"""
+
+    def __init__(self, bucket, prefix):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def object_key(self, key):
+        """S3 key of a job object"""
+        return '{}/{}'.format(self.prefix, key) if self.prefix else key
+
+    def put(self, key, body):
+        """Write an object"""
+        aws_clients.get_client('s3').put_object(Bucket=self.bucket, Key=self.object_key(key),
+                                                Body=body.encode('utf-8'), ContentType='application/json')
+
+    def get(self, key):
+        """Read an object, None if it does not exist"""
+        try:
+            response = aws_clients.get_client('s3').get_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response['Error']['Code'] in MISSING_OBJECT_CODES:
+                return None
+            raise e
+        return response['Body'].read().decode('utf-8')
+
+
+def get_job_store(uri=None):
+    """
+    Return the job store of a URI
+
+    Args:
+        uri: s3:// or file:// URI, JOB_STORE_URI when omitted
+
+    Returns: LocalJobStore or S3JobStore
+    """
+    parsed = urlparse(uri or JOB_STORE_URI)
+    if parsed.scheme == 's3':
+        return S3JobStore(parsed.netloc, parsed.path)
+    if parsed.scheme == 'file':
+        return LocalJobStore(parsed.path)
+    raise ValueError('Unsupported job store {}.'.format(uri or JOB_STORE_URI))
+
+
+def new_job_id():
+    """Return a new job id"""
+    return uuid.uuid4().hex
+
+
+def is_valid_job_id(job_id):
+    """True if a job id is well formed, so it can not address objects outside its job"""
+    return bool(JOB_ID_PATTERN.fullmatch(job_id or ''))
+
+
+def status_key(job_id):
+    """Key of the status object of a job"""
+    return '{}/status.json'.format(job_id)
+
+
+def chunk_key(job_id, chunk):
+    """Key of a result chunk of a job"""
+    return '{}/chunk-{:05d}.json'.format(job_id, chunk)
+
+
+def put_json(store, key, value):
+    """Write an object as JSON"""
+    store.put(key, json.dumps(value))
+
+
+def get_json(store, key):
+    """Read a JSON object, None if it does not exist"""
+    body = store.get(key)
+    return json.loads(body) if body is not None else None
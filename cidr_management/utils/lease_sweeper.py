@@ -0,0 +1,65 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Release of expired, unassigned CIDR reservations in parallel batches"""
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from utils import cidr_lookups, capacity
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Worker threads releasing batches of reservations
+SWEEPER_WORKERS = int(os.environ.get('SWEEPER_WORKERS', 8))
+# Reservations released by a worker thread per batch
+SWEEPER_BATCH_SIZE = int(os.environ.get('SWEEPER_BATCH_SIZE', 25))
+
+
+def release_batch(batch, now, ddb_table):
+    """
+    Release a batch of expired reservations, one conditional delete and archive transaction each
+
+    Args:
+        batch: CIDR items
+        now: current epoch seconds
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: list of (CIDR block, DynamoDB response or None if the reservation was kept)
+    """
+    return [(item['cidr_block'], cidr_lookups.release_expired_reservation(item, now, ddb_table)) for item in batch]
+
+
+def sweep_expired_reservations(ddb_table, now=None):
+    """
+    Release all expired, unassigned reservations
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+        now: current epoch seconds, the current time when omitted
+
+    Returns: dict with the number of expired and released reservations
+    """
+    now = int(time.time()) if now is None else now
+    expired = cidr_lookups.retrieve_expired_reservations(now, ddb_table)
+    batches = [expired[index:index + SWEEPER_BATCH_SIZE] for index in range(0, len(expired), SWEEPER_BATCH_SIZE)]
+    released = []
+    regions = {(item['region'], item['cloud']) for item in expired}
+    with ThreadPoolExecutor(max_workers=SWEEPER_WORKERS) as executor:
+        for results in executor.map(lambda batch: release_batch(batch, now, ddb_table), batches):
+            for cidr_block, response in results:
+                # Capacity counters are only updated from this thread
+                if response is not None:
+                    capacity.record(response, write=True)
+                    released.append(cidr_block)
+    # One version bump per region of the expired reservations, from this thread
+    if released:
+        for region, cloud_provider in sorted(regions):
+            cidr_lookups.bump_allocation_version(region, cloud_provider, ddb_table)
+    LOGGER.info("Released %s of %s expired reservations", len(released), len(expired))
+    return {
+        'expired': len(expired),
+        'released': len(released)
+    }
@@ -0,0 +1,195 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Asynchronous listing jobs, for listings too large to compute within the API timeout or to return in one response.
+
+A job is started by GET /cidrs?async=true, which writes a pending status object and invokes the listing job
+worker function asynchronously. The worker reads the used CIDRs of the region under the table lock, releases
+the lock, then streams the listing into result chunks of JOB_CHUNK_SIZE CIDRs, so it never holds the whole
+listing in memory. GET /v1/jobs/{job_id} returns the status, and each chunk once the job has succeeded.
+
+Without LISTING_JOB_FUNCTION_NAME, e.g. in local runs, the job runs inline before the job id is returned.
+"""
+import os
+import json
+import time
+import logging
+from itertools import islice
+from utils import cidr_lookups, cidr_lock, parallel_enum, job_store, aws_clients
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# CIDRs of each result chunk
+JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', 10000))
+# Function computing the listings, the job runs inline when not set
+LISTING_JOB_FUNCTION_NAME = os.environ.get('LISTING_JOB_FUNCTION_NAME', '')
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def update_status(job_id, previous, store, **fields):
+    """
+    Replace the status object of a job
+
+    Args:
+        job_id: job id
+        previous: previous status dict of the job
+        store: job store
+        fields: fields to set, e.g. status='running'
+
+    Returns: new status dict
+    """
+    current = dict(previous, updated=int(time.time()), **fields)
+    job_store.put_json(store, job_store.status_key(job_id), current)
+    return current
+
+
+def start_job(request_params, ddb_table, store=None):
+    """
+    Start a listing job
+
+    Args:
+        request_params: params of the GET /cidrs request
+        ddb_table: DynamoDB table used to store CIDR blocks
+        store: job store, the JOB_STORE_URI store when omitted
+
+    Returns: status dict of the job
+    """
+    store = store or job_store.get_job_store()
+    job_id = job_store.new_job_id()
+    params = {name: request_params.get(name) for name in ('region', 'cloud_provider', 'size', 'locked', 'assigned')}
+    status = update_status(job_id, {'job_id': job_id, 'params': params, 'created': int(time.time())}, store,
+                           status=PENDING)
+    if LISTING_JOB_FUNCTION_NAME:
+        aws_clients.get_client('lambda').invoke(FunctionName=LISTING_JOB_FUNCTION_NAME, InvocationType='Event',
+                                                Payload=json.dumps({'job_id': job_id}).encode('utf-8'))
+        LOGGER.info("Started listing job %s: %s", job_id, params)
+        return status
+    LOGGER.info("Running listing job %s inline: %s", job_id, params)
+    return run_job(job_id, ddb_table, store)
+
+
+def iter_listing(params, ddb_table):
+    """
+    Stream the CIDRs of a listing. Only the scan of the used CIDRs holds the table lock.
+
+    Args:
+        params: job params
+        ddb_table: DynamoDB table used to store CIDR blocks
+
+    Returns: generator of CIDR strings
+    """
+    cidr_lock.sync_obtain_table_lock(ddb_table)
+    try:
+        region_cidr_list = cidr_lookups.retrieve_region_cidr(params['region'], params['cloud_provider'])
+        used_cidr_list = cidr_lookups.retrieve_used_cidrs(params['region'], params['locked'], params['assigned'],
+                                                          params['cloud_provider'].lower(), ddb_table)
+    finally:
+        # Clear CIDR lock
+        cidr_lock.clear_table_lock(ddb_table)
+    if params['locked']:
+        return iter(used_cidr_list)
+    return parallel_enum.iter_available(region_cidr_list, used_cidr_list, params['size'])
+
+
+def write_chunks(job_id, cidrs, store, chunk_size=None):
+    """
+    Write a stream of CIDRs to the result chunks of a job
+
+    Args:
+        job_id: job id
+        cidrs: iterable of CIDR strings
+        store: job store
+        chunk_size: CIDRs per chunk, JOB_CHUNK_SIZE when omitted
+
+    Returns: (number of chunks, number of CIDRs)
+    """
+    chunk_size = chunk_size or JOB_CHUNK_SIZE
+    cidrs = iter(cidrs)
+    chunks = total = 0
+    while True:
+        chunk = list(islice(cidrs, chunk_size))
+        if not chunk:
+            return chunks, total
+        job_store.put_json(store, job_store.chunk_key(job_id, chunks), chunk)
+        chunks += 1
+        total += len(chunk)
+
+
+def run_job(job_id, ddb_table, store=None):
+    """
+    Compute the listing of a job and write it to the job store
+
+    Args:
+        job_id: job id
+        ddb_table: DynamoDB table used to store CIDR blocks
+        store: job store, the JOB_STORE_URI store when omitted
+
+    Returns: final status dict of the job
+    """
+    store = store or job_store.get_job_store()
+    status = job_store.get_json(store, job_store.status_key(job_id))
+    if status is None:
+        raise JobNotFoundError('Job not found.')
+    status = update_status(job_id, status, store, status=RUNNING)
+    try:
+        chunks, total = write_chunks(job_id, iter_listing(status['params'], ddb_table), store)
+    except cidr_lookups.InvalidCloudProviderError:
+        return update_status(job_id, status, store, status=FAILED, error='Invalid cloud provider.')
+    except cidr_lookups.MissingRegionError:
+        return update_status(job_id, status, store, status=FAILED,
+                             error='No root CIDR list found for the specified region.')
+    except Exception as error:
+        update_status(job_id, status, store, status=FAILED, error=str(error))
+        raise
+    LOGGER.info("Listing job %s wrote %s CIDRs in %s chunks", job_id, total, chunks)
+    return update_status(job_id, status, store, status=SUCCEEDED, chunks=chunks, cidrs=total)
+
+
+def get_status(job_id, store=None):
+    """
+    Return the status of a job
+
+    Args:
+        job_id: job id
+        store: job store, the JOB_STORE_URI store when omitted
+
+    Returns: status dict, None if the job does not exist
+    """
+    store = store or job_store.get_job_store()
+    return job_store.get_json(store, job_store.status_key(job_id))
+
+
+def get_chunk(job_id, chunk, store=None):
+    """
+    Return a result chunk of a job
+
+    Args:
+        job_id: job id
+        chunk: chunk number
+        store: job store, the JOB_STORE_URI store when omitted
+
+    Returns: list of CIDR strings, None if the chunk does not exist
+    """
+    store = store or job_store.get_job_store()
+    return job_store.get_json(store, job_store.chunk_key(job_id, chunk))
+
+
+class JobNotFoundError(Exception):
+    """
+    Exception raised when a listing job does not exist
+
+    Attributes:
+        message: Description of this error
+    """
+
+    def __init__(self, message="Job not found."):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,66 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Size-bounded, lazily formatted log arguments"""
+import os
+import logging
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Number of list items logged at INFO. Full lists are only logged at DEBUG
+LOG_SAMPLE_SIZE = int(os.environ.get('LOG_SAMPLE_SIZE', 10))
+# Event fields logged at INFO. The full event is only logged at DEBUG
+EVENT_SUMMARY_KEYS = ('httpMethod', 'resource', 'path', 'pathParameters', 'queryStringParameters')
+
+
+def summarize_list(items):
+    """
+    Wrap a list so it is only formatted if the log record is emitted
+
+    Args:
+        items: list to log
+
+    Returns: object formatting the item count and the first LOG_SAMPLE_SIZE items, or all items at DEBUG
+    """
+    return _ListSummary(items)
+
+
+def summarize_event(event):
+    """
+    Wrap a Lambda event so it is only formatted if the log record is emitted
+
+    Args:
+        event: Lambda event
+
+    Returns: object formatting the request line of the event, or the whole event at DEBUG
+    """
+    return _EventSummary(event)
+
+
+class _ListSummary(object):
+    """Lazily formatted summary of a list"""
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def __str__(self):
+        items = self.items if self.items is not None else []
+        if LOGGER.isEnabledFor(logging.DEBUG) or len(items) <= LOG_SAMPLE_SIZE:
+            return str(list(items))
+        return '{} items, first {}: {}'.format(len(items), LOG_SAMPLE_SIZE, list(items[:LOG_SAMPLE_SIZE]))
+
+
+class _EventSummary(object):
+    """Lazily formatted summary of a Lambda event"""
+    __slots__ = ('event',)
+
+    def __init__(self, event):
+        self.event = event
+
+    def __str__(self):
+        if LOGGER.isEnabledFor(logging.DEBUG) or not isinstance(self.event, dict):
+            return str(self.event)
+        return str({key: self.event.get(key) for key in EVENT_SUMMARY_KEYS if key in self.event})
@@ -0,0 +1,216 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Enumeration of all available CIDRs of a size, split by root CIDR and aligned sub-range across a process pool.
+
+Results are merged in root list and address order, the same order as a serial walk. Small enumerations, and
+environments without process pool support, run serially. Lambda has no /dev/shm, so a process pool can not
+be created there and the enumeration falls back to a serial walk over the integer ranges.
+
+Offline report, run from the cidr_management directory:
+
+    python -m utils.parallel_enum --region us-west-2 --prefix 27 --workers 8 --output available.txt
+"""
+import os
+import sys
+import time
+import bisect
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import cidr_allocator
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Worker processes, 0 uses one per CPU and 1 always enumerates serially
+PARALLEL_ENUM_WORKERS = int(os.environ.get('PARALLEL_ENUM_WORKERS', 0))
+# Candidate CIDRs below which the enumeration runs serially
+PARALLEL_ENUM_MIN_BLOCKS = int(os.environ.get('PARALLEL_ENUM_MIN_BLOCKS', 2 ** 18))
+# Sub-ranges per worker, more sub-ranges balance the work of unevenly used roots
+CHUNKS_PER_WORKER = 4
+
+# Set once a process pool failed to start in this container
+_POOL_UNAVAILABLE = False
+
+
+def format_cidr(address, subnet_prefix):
+    """CIDR string of an integer address, the same as IPv4Network.with_prefixlen"""
+    return '{}.{}.{}.{}/{}'.format(address >> 24, (address >> 16) & 255, (address >> 8) & 255, address & 255,
+                                   subnet_prefix)
+
+
+def iter_range(task):
+    """
+    Stream the available CIDRs of one aligned sub-range
+
+    Args:
+        task: (start, end, subnet_prefix, used ranges overlapping the sub-range)
+
+    Returns: generator of CIDR strings, in address order
+    """
+    start, end, subnet_prefix, ranges = task
+    block_size = 2 ** (32 - subnet_prefix)
+    used = cidr_allocator.UsedRanges(ranges=ranges)
+    for free_start, free_end in used.free_ranges(start, end):
+        for address in range(cidr_allocator.align_up(free_start, block_size), free_end - block_size + 2, block_size):
+            yield format_cidr(address, subnet_prefix)
+
+
+def enumerate_range(task):
+    """
+    List the available CIDRs of one aligned sub-range, run by a worker process
+
+    Args:
+        task: (start, end, subnet_prefix, used ranges overlapping the sub-range)
+
+    Returns: list of CIDR strings, in address order
+    """
+    return list(iter_range(task))
+
+
+def split_tasks(root_cidr_list, used, subnet_prefix, chunks):
+    """
+    Split the roots large enough for the requested size into aligned sub-ranges
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        used: UsedRanges of the CIDRs in use in region
+        subnet_prefix: requested CIDR size
+        chunks: number of sub-ranges the largest root is split into
+
+    Returns: list of tasks for enumerate_range, in root list and address order
+    """
+    roots = cidr_allocator.root_ranges(root_cidr_list, subnet_prefix)
+    if not roots:
+        return []
+    block_size = 2 ** (32 - int(subnet_prefix))
+    largest = max(end - start + 1 for start, end in roots)
+    # Power of two sub-range size, at least one block, so sub-ranges stay aligned
+    chunk_size = max(block_size, 2 ** max(0, (largest // max(chunks, 1)).bit_length() - 1))
+    range_starts = [range_start for range_start, _ in used.ranges]
+    tasks = []
+    for root_start, root_end in roots:
+        for start in range(root_start, root_end + 1, chunk_size):
+            end = min(start + chunk_size - 1, root_end)
+            # Only ship the used ranges overlapping the sub-range to the worker
+            first = bisect.bisect_left(used.ends, start)
+            last = bisect.bisect_right(range_starts, end, lo=first)
+            tasks.append((start, end, int(subnet_prefix), used.ranges[first:last]))
+    return tasks
+
+
+def enumerate_available(root_cidr_list, allocated_cidr_list, subnet_prefix, workers=None):
+    """
+    List all available CIDRs of a size in the root CIDRs of a region
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        allocated_cidr_list: CIDRs currently in use in region
+        subnet_prefix: requested CIDR size
+        workers: worker processes, PARALLEL_ENUM_WORKERS when omitted
+
+    Returns: list of CIDR strings, in root list and address order
+    """
+    global _POOL_UNAVAILABLE
+    workers = PARALLEL_ENUM_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    candidates = sum((end - start + 1) >> (32 - int(subnet_prefix))
+                     for start, end in cidr_allocator.root_ranges(root_cidr_list, subnet_prefix))
+    if workers > 1 and not _POOL_UNAVAILABLE and candidates >= PARALLEL_ENUM_MIN_BLOCKS:
+        tasks = split_tasks(root_cidr_list, used, subnet_prefix, workers * CHUNKS_PER_WORKER)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map returns the results in task order
+                results = list(executor.map(enumerate_range, tasks, chunksize=1))
+            LOGGER.info("Enumerated %s candidate CIDRs in %s sub-ranges with %s workers", candidates, len(tasks),
+                        workers)
+            return [cidr for result in results for cidr in result]
+        except (OSError, NotImplementedError, BrokenProcessPool) as error:
+            # No process pool support, e.g. no /dev/shm in Lambda
+            LOGGER.warning("Process pool unavailable, enumerating serially: %s", str(error))
+            _POOL_UNAVAILABLE = True
+    return list(iter_available(root_cidr_list, allocated_cidr_list, subnet_prefix))
+
+
+def iter_available(root_cidr_list, allocated_cidr_list, subnet_prefix):
+    """
+    Stream all available CIDRs of a size in the root CIDRs of a region, serially, without holding the list
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        allocated_cidr_list: CIDRs currently in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: generator of CIDR strings, in root list and address order
+    """
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    for task in split_tasks(root_cidr_list, used, subnet_prefix, 1):
+        yield from iter_range(task)
+
+
+def available_runs(root_cidr_list, allocated_cidr_list, subnet_prefix):
+    """
+    List all available CIDRs of a size as runs of consecutive blocks, one per free range, without
+    enumerating the blocks
+
+    Args:
+        root_cidr_list: top-level CIDRs allocated to region
+        allocated_cidr_list: CIDRs currently in use in region
+        subnet_prefix: requested CIDR size
+
+    Returns: list of (first address, prefix length, number of blocks), in root list and address order
+    """
+    subnet_prefix = int(subnet_prefix)
+    block_size = 2 ** (32 - subnet_prefix)
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    runs = []
+    for root_start, root_end in cidr_allocator.root_ranges(root_cidr_list, subnet_prefix):
+        for free_start, free_end in used.free_ranges(root_start, root_end):
+            start = cidr_allocator.align_up(free_start, block_size)
+            count = (free_end + 1 - start) // block_size
+            if count > 0:
+                runs.append((format_cidr(start, subnet_prefix).split('/')[0], subnet_prefix, count))
+    return runs
+
+
+def main(argv=None):
+    """
+    Command line entry point, writes all available CIDRs of a region to a file
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code
+    """
+    from utils import cidr_lookups
+    parser = argparse.ArgumentParser(description='Report all available CIDRs of a size in a region.')
+    parser.add_argument('--region', required=True)
+    parser.add_argument('--cloud', default='aws')
+    parser.add_argument('--prefix', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=PARALLEL_ENUM_WORKERS)
+    parser.add_argument('--table', default=os.environ.get('ALLOCATED_CIDR_DDB_TABLE_NAME', 'AllocatedCidrTracking'))
+    parser.add_argument('--output', default='-', help='output file, - for stdout')
+    args = parser.parse_args(argv)
+    root_cidr_list = cidr_lookups.retrieve_region_cidr(args.region, args.cloud)
+    used_cidr_list = cidr_lookups.retrieve_used_cidrs(args.region, False, False, args.cloud, args.table)
+    start = time.time()
+    available = enumerate_available(root_cidr_list, used_cidr_list, args.prefix, args.workers)
+    elapsed = time.time() - start
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        output.writelines(cidr + '\n' for cidr in available)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print('Found {} available /{} CIDRs in {:.2f} seconds.'.format(len(available), args.prefix, elapsed),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
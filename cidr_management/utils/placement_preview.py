@@ -0,0 +1,85 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Dry run placement of reserve requests, from the cached allocation snapshot.
+
+Placements are computed with the same steps as the reserve endpoint, affinity, size-class slab and placement
+policy, but without the table lock and without writing. The allocations are read from the snapshot of
+allocation_cache, so a placement may be up to ALLOCATION_CACHE_TTL seconds stale, and a later reserve can land
+elsewhere if CIDRs were reserved in the meantime.
+"""
+import os
+import logging
+from utils import cidr_lookups, cidr_allocator, cidr_ranges, allocation_cache, slab_pools
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Placement sources of a dry run
+AFFINITY = 'affinity'
+SIZE_CLASS = 'size-class'
+
+
+def preview_placements(region, cloud_provider, sizes, account_alias, affinity, ddb_table, policy=None):
+    """
+    Place a set of CIDRs one after the other, as consecutive reserve requests would
+
+    Args:
+        region: region
+        cloud_provider: cloud provider
+        sizes: requested CIDR sizes, as prefix strings
+        account_alias: Alias that would be associated with the CIDRs
+        affinity: place close to the account's CIDRs
+        ddb_table: DynamoDB table used to store CIDR blocks
+        policy: placement policy, ALLOCATION_POLICY when omitted
+
+    Returns: list of dicts with the size, the CIDR or None if no block is free, and the placement source
+    """
+    policy = policy or cidr_lookups.ALLOCATION_POLICY
+    region_cidr_list = cidr_lookups.retrieve_region_cidr(region, cloud_provider)
+    size_classes = slab_pools.size_classes(cidr_lookups.retrieve_region_param(region), cloud_provider)
+    items = [item for item in allocation_cache.get_snapshot(cloud_provider, ddb_table)['items']
+             if item.get('region') == region.upper() and item.get('locked')]
+    used = cidr_allocator.UsedRanges([item['cidr_block'] for item in items])
+    # Slabs are only allocated at their size class, the general allocator treats them as used
+    slab_ranges = {prefix: [cidr_ranges.to_range(cidr) for cidr in class_cidrs]
+                   for prefix, class_cidrs in size_classes.items()}
+    general = cidr_allocator.UsedRanges(ranges=used.ranges + [
+        slab_range for ranges in slab_ranges.values() for slab_range in ranges])
+    account_cidr_list = [item['cidr_block'] for item in items if item.get('account_alias') == account_alias.upper()]
+    cursors = {}
+    placements = []
+    for subnet_prefix in sizes:
+        prefix = int(subnet_prefix)
+        network = None
+        source = None
+        if affinity:
+            other_slabs = [slab_range for other_prefix, ranges in slab_ranges.items() if other_prefix != prefix
+                           for slab_range in ranges]
+            network = cidr_allocator.affinity(region_cidr_list,
+                                              cidr_allocator.UsedRanges(ranges=used.ranges + other_slabs),
+                                              prefix, account_cidr_list)
+            source = AFFINITY
+        if network is None and prefix in size_classes:
+            # The free stack pops the lowest free block of the slabs
+            network = cidr_allocator.first_fit(size_classes[prefix], used, prefix)
+            source = SIZE_CLASS
+        if network is None:
+            if policy == cidr_allocator.NEXT_FIT and prefix not in cursors:
+                cursors[prefix] = cidr_lookups.retrieve_allocation_cursor(region, cloud_provider, prefix, ddb_table)
+            network = cidr_allocator.place(policy, region_cidr_list, general, prefix, cursors.get(prefix))
+            source = policy
+        if network is None:
+            placements.append({'size': '/{}'.format(prefix), 'cidr': None, 'placement': None})
+            continue
+        # Later CIDRs of the set are placed around the earlier ones
+        start, end = cidr_ranges.to_range(network)
+        used.add(start, end)
+        general.add(start, end)
+        account_cidr_list.append(str(network))
+        cursors[prefix] = cidr_allocator.next_cursor(network)
+        placements.append({'size': '/{}'.format(prefix), 'cidr': str(network), 'placement': source})
+    LOGGER.info("Dry run placements in %s: %s", region, placements)
+    return placements
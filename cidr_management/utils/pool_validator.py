@@ -0,0 +1,296 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Overlap validator for the root CIDRs of the region params in param store.
+
+Loads all region params in bulk and reports root CIDRs which overlap across regions, across cloud
+providers or within the same pool, in one sort-and-sweep. Run as a CLI from the cidr_management directory:
+
+    python -m utils.pool_validator check
+    python -m utils.pool_validator validate --region us-west-2 --file us-west-2.json
+    python -m utils.pool_validator put --region us-west-2 --file us-west-2.json
+
+validate and put check the proposed param against the params of all other regions, and put only writes
+the param when no overlap is found. Root CIDRs which are not valid networks are reported and left out of the
+overlap sweep. The size-class slabs of each region are checked against its root CIDRs too.
+"""
+import sys
+import json
+import logging
+import ipaddress
+import argparse
+from utils import cidr_lookups, cidr_ranges, aws_clients, slab_pools
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+
+
+def root_pools(region_params):
+    """
+    List the root CIDRs of all regions and cloud providers
+
+    Args:
+        region_params: dict of region to parsed region param value
+
+    Returns: list of (region, cloud provider, root CIDR)
+    """
+    pools = []
+    for region, param_value in sorted(region_params.items()):
+        for cloud_provider, pool in sorted(param_value.get('master-cidr', {}).items()):
+            pools.extend((region, cloud_provider.upper(), cidr) for cidr in pool.get('cidrs', []))
+    return pools
+
+
+def find_invalid_roots(region_params):
+    """
+    Find all root CIDRs of the region params which are not valid networks, e.g. with host bits set
+
+    Args:
+        region_params: dict of region to parsed region param value
+
+    Returns: list of invalid root CIDRs, each a dict with the region, cloud provider, root CIDR and reason
+    """
+    invalid_roots = []
+    for region, cloud_provider, cidr in root_pools(region_params):
+        try:
+            ipaddress.IPv4Network(cidr)
+        except (ValueError, TypeError):
+            invalid_roots.append({'region': region, 'cloud': cloud_provider, 'cidr': cidr,
+                                  'reason': 'Not a valid network.'})
+    return invalid_roots
+
+
+def valid_root_pools(region_params):
+    """
+    List the valid root CIDRs of all regions and cloud providers, skipping invalid ones with a warning
+
+    Args:
+        region_params: dict of region to parsed region param value
+
+    Returns: list of (region, cloud provider, root CIDR)
+    """
+    invalid = set()
+    for invalid_root in find_invalid_roots(region_params):
+        LOGGER.warning("Skipping root CIDR %s of %s %s: %s", invalid_root['cidr'], invalid_root['region'],
+                       invalid_root['cloud'], invalid_root['reason'])
+        invalid.add((invalid_root['region'], invalid_root['cloud'], str(invalid_root['cidr'])))
+    return [pool for pool in root_pools(region_params) if (pool[0], pool[1], str(pool[2])) not in invalid]
+
+
+def find_pool_overlaps(region_params):
+    """
+    Find all overlapping root CIDRs of the region params
+
+    Args:
+        region_params: dict of region to parsed region param value
+
+    Returns: list of conflicts, each a dict with the kind of overlap and both root CIDRs
+    """
+    intervals = [cidr_ranges.to_range(cidr) + (None, {'region': region, 'cloud': cloud_provider, 'cidr': cidr})
+                 for region, cloud_provider, cidr in valid_root_pools(region_params)]
+    conflicts = []
+    for first, second in cidr_ranges.sweep_overlaps(intervals):
+        if first['region'] != second['region']:
+            kind = 'cross-region'
+        elif first['cloud'] != second['cloud']:
+            kind = 'cross-provider'
+        else:
+            kind = 'same-pool'
+        conflicts.append({'kind': kind, 'first': first, 'second': second})
+    return conflicts
+
+
+def find_invalid_slabs(region_params):
+    """
+    Find all invalid size-class slabs of the region params
+
+    Args:
+        region_params: dict of region to parsed region param value
+
+    Returns: list of invalid slabs, each a dict with the region, cloud provider, size class, slab CIDR and reason
+    """
+    invalid_slabs = []
+    for region, param_value in sorted(region_params.items()):
+        for cloud_provider in sorted(param_value.get('size-classes', {})):
+            invalid_slabs.extend(dict(error, region=region, cloud=cloud_provider.upper())
+                                 for error in slab_pools.find_slab_errors(param_value, cloud_provider))
+    return invalid_slabs
+
+
+def validate_region_param(region, param_value, region_params=None):
+    """
+    Pre-write hook, check a proposed region param against the params of all other regions
+
+    Args:
+        region: Region of the proposed param
+        param_value: Proposed parsed region param value
+        region_params: Current params of all regions, loaded from param store when omitted
+
+    Returns: None, raises InvalidRootError when a proposed root CIDR is invalid, PoolOverlapError when the
+             proposed root CIDRs overlap, InvalidSlabError when a proposed size-class slab is invalid
+    """
+    invalid_roots = find_invalid_roots({region: param_value})
+    if invalid_roots:
+        raise InvalidRootError(invalid_roots)
+    if region_params is None:
+        region_params = cidr_lookups.retrieve_all_region_params()
+    # Replace the current param of the region by the proposed one
+    region_params = dict(region_params)
+    region_params[region] = param_value
+    # Only report conflicts the proposed param takes part in
+    conflicts = [conflict for conflict in find_pool_overlaps(region_params)
+                 if region in (conflict['first']['region'], conflict['second']['region'])]
+    if conflicts:
+        raise PoolOverlapError(conflicts)
+    invalid_slabs = find_invalid_slabs({region: param_value})
+    if invalid_slabs:
+        raise InvalidSlabError(invalid_slabs)
+
+
+def put_region_param(region, param_value):
+    """
+    Validate and write a region param to param store
+
+    Args:
+        region: Region of the param
+        param_value: Parsed region param value
+
+    Returns: None, raises InvalidRootError, PoolOverlapError or InvalidSlabError without writing when the
+             param is invalid
+    """
+    validate_region_param(region, param_value)
+    ssm_client = aws_clients.get_client('ssm')
+    ssm_client.put_parameter(
+        Name='{}/{}'.format(cidr_lookups.REGION_PARAM_PATH, region),
+        Value=json.dumps(param_value),
+        Type='String',
+        Overwrite=True
+    )
+    cidr_lookups.clear_region_param_cache()
+    LOGGER.info("Wrote param of region %s", region)
+
+
+def format_conflict(conflict):
+    """Single line description of a conflict"""
+    return '{}: {} {} {} overlaps {} {} {}'.format(
+        conflict['kind'],
+        conflict['first']['region'], conflict['first']['cloud'], conflict['first']['cidr'],
+        conflict['second']['region'], conflict['second']['cloud'], conflict['second']['cidr'])
+
+
+def format_invalid_root(invalid_root):
+    """Single line description of an invalid root CIDR"""
+    return 'invalid-root: {} {} {} {}'.format(
+        invalid_root['region'], invalid_root['cloud'], invalid_root['cidr'], invalid_root['reason'])
+
+
+def format_invalid_slab(invalid_slab):
+    """Single line description of an invalid slab"""
+    return 'invalid-slab: {} {} size class {} slab {} {}'.format(
+        invalid_slab['region'], invalid_slab['cloud'], invalid_slab['size_class'], invalid_slab['cidr'],
+        invalid_slab['reason'])
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code, 1 when invalid root CIDRs, overlaps or invalid slabs are found
+    """
+    parser = argparse.ArgumentParser(description='Validate the root CIDRs of the region params.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('check', help='Report overlaps between the params of all regions')
+    for command in ('validate', 'put'):
+        command_parser = subparsers.add_parser(command, help='{} a proposed region param'.format(command.title()))
+        command_parser.add_argument('--region', required=True)
+        command_parser.add_argument('--file', required=True, help='JSON file of the proposed param value')
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'check':
+            region_params = cidr_lookups.retrieve_all_region_params()
+            invalid_roots = find_invalid_roots(region_params)
+            if invalid_roots:
+                raise InvalidRootError(invalid_roots)
+            conflicts = find_pool_overlaps(region_params)
+            if conflicts:
+                raise PoolOverlapError(conflicts)
+            invalid_slabs = find_invalid_slabs(region_params)
+            if invalid_slabs:
+                raise InvalidSlabError(invalid_slabs)
+        else:
+            with open(args.file) as param_file:
+                param_value = json.load(param_file)
+            if args.command == 'validate':
+                validate_region_param(args.region, param_value)
+            else:
+                put_region_param(args.region, param_value)
+    except InvalidRootError as error:
+        for invalid_root in error.invalid_roots:
+            print(format_invalid_root(invalid_root))
+        print(error.message)
+        return 1
+    except PoolOverlapError as error:
+        for conflict in error.conflicts:
+            print(format_conflict(conflict))
+        print(error.message)
+        return 1
+    except InvalidSlabError as error:
+        for invalid_slab in error.invalid_slabs:
+            print(format_invalid_slab(invalid_slab))
+        print(error.message)
+        return 1
+    print('No overlapping root CIDRs or invalid slabs found.')
+    return 0
+
+
+class PoolOverlapError(Exception):
+    """
+    Exception raised when root CIDRs of the region params overlap
+
+    Attributes:
+        conflicts -- List of overlapping root CIDRs
+        message -- Description of the error
+    """
+
+    def __init__(self, conflicts, message=None):
+        self.conflicts = conflicts
+        self.message = message or "Found {} overlapping root CIDRs.".format(len(conflicts))
+        super().__init__(self.message)
+
+
+class InvalidRootError(Exception):
+    """
+    Exception raised when root CIDRs of the region params are not valid networks
+
+    Attributes:
+        invalid_roots -- List of invalid root CIDRs
+        message -- Description of the error
+    """
+
+    def __init__(self, invalid_roots, message=None):
+        self.invalid_roots = invalid_roots
+        self.message = message or "Found {} invalid root CIDRs.".format(len(invalid_roots))
+        super().__init__(self.message)
+
+
+class InvalidSlabError(Exception):
+    """
+    Exception raised when size-class slabs of the region params are invalid
+
+    Attributes:
+        invalid_slabs -- List of invalid slabs
+        message -- Description of the error
+    """
+
+    def __init__(self, invalid_slabs, message=None):
+        self.invalid_slabs = invalid_slabs
+        self.message = message or "Found {} invalid size-class slabs.".format(len(invalid_slabs))
+        super().__init__(self.message)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
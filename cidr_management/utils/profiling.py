@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Opt-in profiling of Lambda requests"""
+import os
+import io
+import time
+import logging
+import functools
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Profile every request when set to True
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'False').upper() == 'TRUE'
+# Header used by allow-listed callers to profile a single request
+PROFILE_HEADER = 'x-profile-request'
+# Comma separated caller account ids, ARNs or source IPs allowed to use the profile header
+PROFILE_ALLOWED_CALLERS = frozenset(caller.strip() for caller in
+                                    os.environ.get('PROFILE_ALLOWED_CALLERS', '').split(',') if caller.strip())
+# Where profiles are written: 'log' logs the top functions, 'file' writes the raw profile
+PROFILE_OUTPUT = os.environ.get('PROFILE_OUTPUT', 'log')
+PROFILE_OUTPUT_DIR = os.environ.get('PROFILE_OUTPUT_DIR', '/tmp')
+# Number of functions logged, sorted by cumulative time
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', 25))
+
+
+def profiled(handler):
+    """
+    Decorator profiling a Lambda handler with cProfile when profiling is requested.
+    When profiling is not requested the handler is called directly.
+
+    Args:
+        handler: Lambda handler
+
+    Returns: wrapped Lambda handler
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if not profiling_requested(event):
+            return handler(event, context)
+        # Only import the profiler when it is used
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(handler, event, context)
+        finally:
+            write_profile(profiler, handler.__module__, context)
+    return wrapper
+
+
+def profiling_requested(event):
+    """
+    Check whether the request should be profiled
+
+    Args:
+        event: Lambda event
+
+    Returns: bool
+    """
+    if PROFILE_REQUESTS:
+        return True
+    if not PROFILE_ALLOWED_CALLERS or not isinstance(event, dict):
+        return False
+    # Header names are case insensitive
+    headers = event.get('headers') or {}
+    header_value = next((value for name, value in headers.items() if name.lower() == PROFILE_HEADER), None)
+    if str(header_value).upper() != 'TRUE':
+        return False
+    # Only allow-listed callers may profile requests
+    identity = (event.get('requestContext') or {}).get('identity') or {}
+    callers = {identity.get('accountId'), identity.get('userArn'), identity.get('caller'), identity.get('sourceIp')}
+    if callers & PROFILE_ALLOWED_CALLERS:
+        return True
+    LOGGER.warning("Profile header ignored for caller not in allow-list.")
+    return False
+
+
+def write_profile(profiler, name, context):
+    """
+    Log the top functions of a profile, or write the raw profile to PROFILE_OUTPUT_DIR
+
+    Args:
+        profiler: cProfile.Profile used for the request
+        name: name of the profiled handler
+        context: Lambda context
+
+    Returns: path of the raw profile, or None if it was logged
+    """
+    import pstats
+    request_id = getattr(context, 'aws_request_id', None) or str(int(time.time() * 1000))
+    if PROFILE_OUTPUT == 'file':
+        path = os.path.join(PROFILE_OUTPUT_DIR, 'profile-{}-{}.prof'.format(name, request_id))
+        profiler.dump_stats(path)
+        LOGGER.info("Request profile written to %s", path)
+        return path
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    LOGGER.info("Request profile for %s %s:\n%s", name, request_id, stream.getvalue())
+    return None
@@ -0,0 +1,173 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Size-class slabs, sub-ranges of the root CIDRs dedicated to a single CIDR size.
+
+Slabs are configured in the region param next to master-cidr:
+
+    {"master-cidr": {"AWS": {"cidrs": ["10.0.0.0/14"]}},
+     "size-classes": {"AWS": {"24": {"cidrs": ["10.0.0.0/16"]}, "22": {"cidrs": ["10.1.0.0/16"]}}}}
+
+Each container keeps a stack of the free blocks of each slab, so a CIDR of a size class is reserved with a
+pop and a conditional write. Slabs are only ever allocated at their size, so a block reserved by another
+container always collides on the table key and fails the conditional write. A slab must be a network inside
+the root CIDRs, no smaller than its size class, and must not overlap other slabs; invalid slabs are skipped.
+"""
+import os
+import time
+import ipaddress
+import logging
+from utils import cidr_lookups, cidr_allocator, cidr_ranges
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+LOGGER.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Seconds a free stack is used before it is rebuilt from a table scan, picking up released CIDRs
+SLAB_STACK_TTL = int(os.environ.get('SLAB_STACK_TTL', 300))
+
+# Free blocks of each slab, keyed by (cloud provider, region, prefix)
+_STACKS = {}
+
+
+def find_slab_errors(param_value, cloud_provider):
+    """
+    Check the size-class slabs of a cloud provider against the root CIDRs of a region param
+
+    Args:
+        param_value: parsed region param value
+        cloud_provider: cloud provider
+
+    Returns: list of invalid slabs, each a dict with the size class, the slab CIDR and the reason
+    """
+    cloud_provider = cloud_provider.upper()
+    root_ranges = []
+    for cidr in param_value.get('master-cidr', {}).get(cloud_provider, {}).get('cidrs', []):
+        try:
+            root_ranges.append(cidr_ranges.to_range(cidr))
+        except (ValueError, TypeError):
+            # Reported by pool_validator, slabs can not lie inside an invalid root CIDR
+            continue
+    errors = []
+    intervals = []
+    for size_class, slabs in sorted(param_value.get('size-classes', {}).get(cloud_provider, {}).items()):
+        prefix = size_class.lstrip('/')
+        for cidr in slabs.get('cidrs', []):
+            error = {'size_class': size_class, 'cidr': cidr}
+            try:
+                network = ipaddress.IPv4Network(cidr)
+            except ValueError:
+                errors.append(dict(error, reason='Not a valid network.'))
+                continue
+            start, end = cidr_ranges.to_range(network)
+            if not prefix.isdigit() or not network.prefixlen <= int(prefix) <= 32:
+                errors.append(dict(error, reason='Smaller than its size class /{}.'.format(prefix)))
+            elif not any(root_start <= start and end <= root_end for root_start, root_end in root_ranges):
+                errors.append(dict(error, reason='Outside the root CIDRs.'))
+            else:
+                intervals.append((start, end, None, error))
+    # Of two overlapping slabs, the later starting one is invalid
+    for first, second in cidr_ranges.sweep_overlaps(intervals):
+        if 'reason' not in second:
+            second['reason'] = 'Overlaps slab {}.'.format(first['cidr'])
+            errors.append(second)
+    return errors
+
+
+def size_classes(param_value, cloud_provider):
+    """
+    Read the size-class slabs of a cloud provider from a region param, skipping invalid slabs
+
+    Args:
+        param_value: parsed region param value
+        cloud_provider: cloud provider
+
+    Returns: dict of prefix to list of slab CIDRs
+    """
+    invalid = set()
+    for error in find_slab_errors(param_value, cloud_provider):
+        LOGGER.warning("Skipping slab %s of size class %s: %s", error['cidr'], error['size_class'], error['reason'])
+        invalid.add((error['size_class'], error['cidr']))
+    classes = param_value.get('size-classes', {}).get(cloud_provider.upper(), {})
+    slabs = {}
+    for size_class, slab in classes.items():
+        cidrs = [cidr for cidr in slab.get('cidrs', []) if (size_class, cidr) not in invalid]
+        if cidrs:
+            slabs[int(size_class.lstrip('/'))] = cidrs
+    return slabs
+
+
+def stack_key(cloud_provider, region, subnet_prefix):
+    """Key of the free stack of a size class"""
+    return cloud_provider.upper(), region.upper(), int(subnet_prefix)
+
+
+def has_free_stack(key):
+    """True if the free stack of a size class was built and has not expired"""
+    stack = _STACKS.get(key)
+    return bool(stack) and stack['expiry'] > time.time()
+
+
+def build_free_stack(key, slab_cidr_list, allocated_cidr_list):
+    """
+    Build the free stack of a size class from the CIDRs in use
+
+    Args:
+        key: stack key of the size class
+        slab_cidr_list: slab CIDRs of the size class
+        allocated_cidr_list: CIDRs currently in use in region
+
+    Returns: number of free blocks
+    """
+    subnet_prefix = key[2]
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    free = []
+    for slab_cidr in slab_cidr_list:
+        for block in ipaddress.IPv4Network(slab_cidr).subnets(new_prefix=subnet_prefix):
+            if not used.overlaps(*cidr_ranges.to_range(block)):
+                free.append(block)
+    # Pop the lowest blocks first
+    free.reverse()
+    _STACKS[key] = {
+        'expiry': time.time() + SLAB_STACK_TTL,
+        'free': free
+    }
+    LOGGER.info("Built free stack of size class %s with %s blocks", key, len(free))
+    return len(free)
+
+
+def reserve_from_stack(key, account_alias, ddb_table, idempotency_key=None):
+    """
+    Pop free blocks of a size class until one is reserved
+
+    Args:
+        key: stack key of the size class
+        account_alias: Alias that will be associated with CIDR
+        ddb_table: DynamoDB table used to store CIDR blocks
+        idempotency_key: Optional idempotency key of the request
+
+    Returns: reserve response, or None when the slab ran out
+    """
+    cloud_provider, region, _ = key
+    free = _STACKS.get(key, {}).get('free', [])
+    while free:
+        block = free.pop()
+        response = cidr_lookups.reserve_cidr(block, region, account_alias, cloud_provider, ddb_table,
+                                             idempotency_key=idempotency_key)
+        # Only a block reserved by another container moves on to the next block
+        if response['statusCode'] != 400:
+            return response
+        # Reserved by another container since the stack was built
+        LOGGER.info("Slab CIDR %s already reserved, popping the next block", block)
+    LOGGER.info("Size class %s ran out of free blocks", key)
+    return None
+
+
+def clear_cache():
+    """
+    Drop all free stacks
+
+    Returns: None
+    """
+    _STACKS.clear()
@@ -0,0 +1,259 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Export of the whole CIDR table to a snapshot file, for audits and offline capacity planning.
+
+The table is read with a parallel scan, one thread per segment, and the items are streamed to the file
+through a bounded queue, so memory use does not grow with the table size. Two formats are supported:
+
+    jsonl   gzip compressed JSON lines, one allocation item per line with all its attributes
+    binary  packed 8 byte records of the network address (uint32), prefix length, flags and region id (uint16).
+            The first record of each region defines its id and is followed by the region key. Owners and dates
+            are not exported
+
+Snapshots are read back with read_snapshot, or loaded into the placement engine with load_used_ranges.
+Run from the cidr_management directory:
+
+    python -m utils.snapshot_export export --output allocations.jsonl.gz --segments 8
+    python -m utils.snapshot_export export --format binary --output allocations.bin
+    python -m utils.snapshot_export summary --file allocations.bin
+"""
+import os
+import sys
+import json
+import gzip
+import queue
+import struct
+import logging
+import argparse
+import threading
+import ipaddress
+from decimal import Decimal
+from boto3.dynamodb.types import TypeDeserializer
+from utils import cidr_lookups, cidr_allocator, cidr_ranges, parallel_enum, capacity, aws_clients
+
+# Initialize Logger
+LOGGER = logging.getLogger()
+
+# Parallel scan segments, one thread each
+EXPORT_SEGMENTS = int(os.environ.get('EXPORT_SEGMENTS', 4))
+# Scan pages buffered between the scan threads and the writer
+EXPORT_QUEUE_PAGES = 16
+
+# Snapshot formats
+JSONL = 'jsonl'
+BINARY = 'binary'
+FORMATS = (JSONL, BINARY)
+
+# Binary snapshot header and record: network address, prefix length, flags, region id
+BINARY_MAGIC = b'CIDRSNP1'
+RECORD = struct.Struct('>IBBH')
+# Prefix length of the records defining a region id, the flags hold the length of the region key that follows
+REGION_RECORD_PREFIX = 255
+FLAG_LOCKED = 1
+FLAG_ASSIGNED = 2
+
+
+def scan_segment(ddb_table, segment, total_segments, pages):
+    """
+    Scan one segment of the table, putting each page of items on the queue. Uses the thread-safe DynamoDB
+    client, so segments can be scanned from worker threads.
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+        segment: segment number
+        total_segments: number of segments
+        pages: queue receiving (items, response), then (None, exception) on failure and (None, None) when done
+
+    Returns: None
+    """
+    deserializer = TypeDeserializer()
+    ddb_client = aws_clients.get_client('dynamodb')
+    scan_kwargs = {
+        'TableName': ddb_table,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        # The lock, cursor and marker items have no region or cloud
+        'FilterExpression': 'attribute_exists(#region) AND attribute_exists(cloud)',
+        'ExpressionAttributeNames': {'#region': 'region'},
+        'ReturnConsumedCapacity': capacity.RETURN_CONSUMED_CAPACITY
+    }
+    try:
+        while True:
+            resp = ddb_client.scan(**scan_kwargs)
+            items = [{name: deserializer.deserialize(value) for name, value in item.items()}
+                     for item in resp['Items']]
+            pages.put((items, resp))
+            if 'LastEvaluatedKey' not in resp:
+                break
+            scan_kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+        pages.put((None, None))
+    except Exception as error:
+        pages.put((None, error))
+
+
+def scan_items(ddb_table, segments=None):
+    """
+    Stream all allocation items of the table with a parallel scan
+
+    Args:
+        ddb_table: DynamoDB table used to store CIDR blocks
+        segments: parallel scan segments, EXPORT_SEGMENTS when omitted
+
+    Returns: generator of items, in no particular order
+    """
+    segments = segments or EXPORT_SEGMENTS
+    pages = queue.Queue(maxsize=EXPORT_QUEUE_PAGES)
+    threads = [threading.Thread(target=scan_segment, args=(ddb_table, segment, segments, pages), daemon=True)
+               for segment in range(segments)]
+    for thread in threads:
+        thread.start()
+    running = segments
+    while running:
+        items, resp = pages.get()
+        if items is None:
+            if resp is not None:
+                raise resp
+            running -= 1
+            continue
+        # Capacity counters are only updated from this thread
+        capacity.record(resp)
+        for item in items:
+            yield item
+
+
+def json_default(value):
+    """Serialize the Decimal numbers and sets of DynamoDB items"""
+    if isinstance(value, Decimal):
+        return int(value) if value == int(value) else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+def write_snapshot(items, path, snapshot_format=JSONL):
+    """
+    Write items to a snapshot file
+
+    Args:
+        items: iterable of allocation items
+        path: snapshot file
+        snapshot_format: one of FORMATS
+
+    Returns: number of written items
+    """
+    count = 0
+    if snapshot_format == JSONL:
+        with gzip.open(path, 'wt') as snapshot:
+            for item in items:
+                snapshot.write(json.dumps(item, default=json_default, sort_keys=True) + '\n')
+                count += 1
+        return count
+    region_ids = {}
+    with open(path, 'wb') as snapshot:
+        snapshot.write(BINARY_MAGIC)
+        for item in items:
+            key = cidr_lookups.region_key(item['region'], item['cloud'])
+            if key not in region_ids:
+                region_ids[key] = len(region_ids)
+                encoded = key.encode('utf-8')
+                snapshot.write(RECORD.pack(0, REGION_RECORD_PREFIX, len(encoded), region_ids[key]) + encoded)
+            network = ipaddress.IPv4Network(item['cidr_block'])
+            flags = (FLAG_LOCKED if item.get('locked') else 0) | (FLAG_ASSIGNED if item.get('assigned') else 0)
+            snapshot.write(RECORD.pack(int(network.network_address), network.prefixlen, flags, region_ids[key]))
+            count += 1
+    return count
+
+
+def read_snapshot(path):
+    """
+    Stream the items of a snapshot file of either format
+
+    Args:
+        path: snapshot file
+
+    Returns: generator of items, with at least cidr_block, region, cloud, locked and assigned
+    """
+    with open(path, 'rb') as snapshot:
+        magic = snapshot.read(len(BINARY_MAGIC))
+    if magic != BINARY_MAGIC:
+        with gzip.open(path, 'rt') as snapshot:
+            for line in snapshot:
+                yield json.loads(line)
+        return
+    regions = {}
+    with open(path, 'rb') as snapshot:
+        snapshot.seek(len(BINARY_MAGIC))
+        while True:
+            record = snapshot.read(RECORD.size)
+            if len(record) < RECORD.size:
+                break
+            address, prefix, flags, region_id = RECORD.unpack(record)
+            if prefix == REGION_RECORD_PREFIX:
+                regions[region_id] = snapshot.read(flags).decode('utf-8').split('#', 1)
+                continue
+            cloud_provider, region = regions[region_id]
+            yield {
+                'cidr_block': parallel_enum.format_cidr(address, prefix),
+                'region': region,
+                'cloud': cloud_provider,
+                'locked': bool(flags & FLAG_LOCKED),
+                'assigned': bool(flags & FLAG_ASSIGNED)
+            }
+
+
+def load_used_ranges(path, region, cloud_provider='AWS'):
+    """
+    Load the locked CIDRs of a region from a snapshot into the placement engine
+
+    Args:
+        path: snapshot file
+        region: region
+        cloud_provider: cloud provider
+
+    Returns: cidr_allocator.UsedRanges
+    """
+    region = region.upper()
+    cloud_provider = cloud_provider.upper()
+    return cidr_allocator.UsedRanges(ranges=[
+        cidr_ranges.to_range(item['cidr_block']) for item in read_snapshot(path)
+        if item.get('locked') and item['region'] == region and item['cloud'] == cloud_provider])
+
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Args:
+        argv: command line arguments, sys.argv when omitted
+
+    Returns: exit code
+    """
+    parser = argparse.ArgumentParser(description='Export the CIDR table to a snapshot file.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Export the CIDR table')
+    export_parser.add_argument('--output', required=True, help='snapshot file')
+    export_parser.add_argument('--format', choices=FORMATS, default=JSONL)
+    export_parser.add_argument('--segments', type=int, default=EXPORT_SEGMENTS)
+    export_parser.add_argument('--table',
+                               default=os.environ.get('ALLOCATED_CIDR_DDB_TABLE_NAME', 'AllocatedCidrTracking'))
+    summary_parser = subparsers.add_parser('summary', help='Count the CIDRs of each region of a snapshot')
+    summary_parser.add_argument('--file', required=True, help='snapshot file')
+    args = parser.parse_args(argv)
+    if args.command == 'export':
+        count = write_snapshot(scan_items(args.table, args.segments), args.output, args.format)
+        print('Exported {} CIDRs to {}.'.format(count, args.output))
+        return 0
+    regions = {}
+    for item in read_snapshot(args.file):
+        counts = regions.setdefault((item['cloud'], item['region']), [0, 0])
+        counts[0] += 1
+        counts[1] += ipaddress.IPv4Network(item['cidr_block']).num_addresses
+    for (cloud_provider, region), (cidrs, addresses) in sorted(regions.items()):
+        print('{} {}: {} CIDRs, {} addresses'.format(cloud_provider, region, cidrs, addresses))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
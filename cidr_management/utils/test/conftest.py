@@ -0,0 +1,15 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Drop the container caches of clients and region params around each test, so no mock leaks to the next"""
+    from utils import aws_clients, cidr_lookups
+    aws_clients.clear_cache()
+    cidr_lookups.clear_region_param_cache()
+    yield
+    aws_clients.clear_cache()
+    cidr_lookups.clear_region_param_cache()
@@ -0,0 +1,48 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from unittest.mock import patch, MagicMock
+from boto3.dynamodb.conditions import ConditionExpressionBuilder
+
+
+@patch('boto3.resource')
+def test_backfill_range_attributes(mock_ddb_resource):
+    # Import
+    from utils import backfill_ranges
+    # Setup mocks, two pages of items lacking range attributes
+    mock_table = MagicMock()
+    mock_table.scan.side_effect = [
+        {'Items': [{'cidr_block': '10.0.0.0/24', 'region': 'US-WEST-2', 'cloud': 'AWS'}],
+         'LastEvaluatedKey': {'cidr_block': '10.0.0.0/24'}},
+        {'Items': [{'cidr_block': '10.0.1.0/24', 'region': 'US-WEST-2', 'cloud': 'AWS'}]}
+    ]
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke
+    result = backfill_ranges.backfill_range_attributes('mock')
+    # Evaluate results
+    assert result == 2
+    # Only locked items are backfilled
+    expression = ConditionExpressionBuilder().build_expression(mock_table.scan.call_args[1]['FilterExpression'])
+    assert 'locked' in expression.attribute_name_placeholders.values()
+    assert True in expression.attribute_value_placeholders.values()
+    assert mock_table.scan.call_args_list[1][1]['ExclusiveStartKey'] == {'cidr_block': '10.0.0.0/24'}
+    values = mock_table.update_item.call_args_list[1][1]['ExpressionAttributeValues']
+    assert values == {':region_key': 'AWS#US-WEST-2', ':net_start': 167772416, ':net_end': 167772671}
+
+
+@patch('boto3.resource')
+def test_backfill_lease_expirations(mock_ddb_resource):
+    # Import
+    from utils import backfill_ranges, cidr_lookups
+    # Setup mocks, a reservation without a lease
+    mock_table = MagicMock()
+    mock_table.scan.return_value = {'Items': [{'cidr_block': '10.0.0.0/24'}]}
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke
+    result = backfill_ranges.backfill_lease_expirations('mock', now=1000)
+    # Evaluate results, the lease runs from now
+    assert result == 1
+    values = mock_table.update_item.call_args[1]['ExpressionAttributeValues']
+    assert values == {':lease_expiration': 1000 + cidr_lookups.RESERVATION_LEASE_SECONDS}
+    expression = ConditionExpressionBuilder().build_expression(mock_table.scan.call_args[1]['FilterExpression'])
+    assert {'locked', 'assigned', 'lease_expiration'} <= set(expression.attribute_name_placeholders.values())
@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
+
+REGION_PARAMS = {
+    'us-west-2': {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16']}}},
+    'us-east-1': {'master-cidr': {'AWS': {'cidrs': ['10.1.0.0/16']}}}
+}
+
+
+def entry(cidr_block, line, region='US-WEST-2', account_alias='ITX-001'):
+    return {'cidr_block': cidr_block, 'account_alias': account_alias, 'region': region, 'cloud': 'AWS',
+            'assigned': True, 'line': line}
+
+
+def test_parse_row_describe_vpcs():
+    # Import
+    from utils import bulk_import
+    # A describe_vpcs page with a secondary CIDR and a disassociated CIDR
+    row = {'Vpcs': [{'CidrBlock': '10.0.0.0/24', 'OwnerId': '111122223333', 'CidrBlockAssociationSet': [
+        {'CidrBlock': '10.0.0.0/24', 'CidrBlockState': {'State': 'associated'}},
+        {'CidrBlock': '10.0.8.0/24', 'CidrBlockState': {'State': 'associated'}},
+        {'CidrBlock': '10.0.9.0/24', 'CidrBlockState': {'State': 'disassociated'}}]}]}
+    entries = bulk_import.parse_row(row, 'us-west-2', 'aws')
+    assert [item['cidr_block'] for item in entries] == ['10.0.0.0/24', '10.0.8.0/24']
+    assert entries[0]['account_alias'] == '111122223333'
+    assert entries[0]['region'] == 'US-WEST-2'
+    with pytest.raises(bulk_import.ImportRowError):
+        bulk_import.parse_row({'cidr_block': '10.0.0.1/24', 'account_alias': 'itx-001'}, 'us-west-2', 'aws')
+
+
+def test_plan_import():
+    # Import
+    from utils import bulk_import
+    entries = [
+        entry('10.0.1.0/24', 1),
+        # Already in the table with the same owner
+        entry('10.0.2.0/24', 2),
+        # Overlaps an allocation of another account
+        entry('10.0.3.0/25', 3),
+        # Overlaps line 1
+        entry('10.0.0.0/23', 4),
+        # In the root CIDRs of another region
+        entry('10.1.0.0/24', 5),
+        entry('10.1.1.0/24', 6, region='US-EAST-1')
+    ]
+    allocations = [
+        {'cidr_block': '10.0.2.0/24', 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS'},
+        {'cidr_block': '10.0.3.0/24', 'account_alias': 'ITX-002', 'region': 'US-WEST-2', 'cloud': 'AWS'}
+    ]
+    accepted, rejected, existing = bulk_import.plan_import(entries, REGION_PARAMS, allocations)
+    assert [item['line'] for item in accepted] == [1, 6]
+    assert existing == 1
+    assert {row['line']: row['reason'] for row in rejected} == {
+        3: 'Overlaps allocated CIDR 10.0.3.0/24.',
+        4: 'Overlaps 10.0.1.0/24 of line 1.',
+        5: 'Outside the root CIDRs of region US-WEST-2.'
+    }
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'PutItem')
+
+
+def test_plan_import_invalid_root(caplog):
+    # Import
+    from utils import bulk_import
+    # Setup mocks, the root CIDR of us-east-1 has host bits set
+    region_params = dict(REGION_PARAMS, **{'us-east-1': {'master-cidr': {'AWS': {'cidrs': ['10.1.0.1/16']}}}})
+    entries = [entry('10.0.1.0/24', 1), entry('10.1.1.0/24', 2, region='US-EAST-1')]
+    # Invoke
+    accepted, rejected, existing = bulk_import.plan_import(entries, region_params, [])
+    # Evaluate results
+    assert [item['line'] for item in accepted] == [1]
+    assert rejected[0]['reason'] == 'Outside the root CIDRs of region US-EAST-1.'
+    assert 'Skipping root CIDR 10.1.0.1/16 of us-east-1 AWS' in caplog.text
+
+
+@patch('boto3.client')
+def test_write_batch_retries_throttled(mock_ddb_client):
+    # Import
+    from utils import bulk_import
+    # Setup mocks, the first put is throttled once, the second CIDR was reserved since the import was planned
+    mock_client = MagicMock()
+    mock_client.put_item.side_effect = [client_error('ProvisionedThroughputExceededException'), {},
+                                        client_error('ConditionalCheckFailedException')]
+    mock_ddb_client.return_value = mock_client
+    items = [bulk_import.build_item(entry('10.0.1.0/24', 1)), bulk_import.build_item(entry('10.0.2.0/24', 2))]
+    with patch.object(bulk_import, 'IMPORT_RETRY_DELAY', 0):
+        responses, unprocessed, conflicts = bulk_import.write_batch(items, 'mock')
+    assert len(responses) == 1
+    assert unprocessed == []
+    assert [item['cidr_block'] for item in conflicts] == ['10.0.2.0/24']
+    request = mock_client.put_item.call_args_list[1][1]
+    assert request['Item']['cidr_block'] == {'S': '10.0.1.0/24'}
+    assert request['ConditionExpression'] == 'attribute_not_exists(cidr_block)'
+
+
+@patch('boto3.client')
+def test_write_entries_checkpoint(mock_ddb_client, tmp_path):
+    # Import
+    from utils import bulk_import
+    mock_ddb_client.return_value.put_item.return_value = {}
+    checkpoint = str(tmp_path / 'import.checkpoint')
+    entries = [entry('10.0.{}.0/24'.format(index), index + 1) for index in range(60)]
+    written, failed, conflicts = bulk_import.write_entries(entries, 'mock', workers=4, checkpoint_path=checkpoint)
+    assert (written, failed, conflicts) == (60, 0, [])
+    assert mock_ddb_client.return_value.put_item.call_count == 60
+    assert bulk_import.load_checkpoint(checkpoint) == 60
+
+
+@patch('utils.cidr_lookups.bump_allocation_version')
+@patch('utils.cidr_lock.clear_table_lock')
+@patch('utils.cidr_lock.sync_obtain_table_lock')
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('boto3.client')
+def test_run_import_rejects_conflicts(mock_ddb_client, mock_allocations, mock_region_params, mock_obtain_lock,
+                                      mock_clear_lock, mock_bump, tmp_path):
+    # Import
+    from utils import bulk_import
+    mock_allocations.return_value = []
+    mock_region_params.return_value = REGION_PARAMS
+    mock_obtain_lock.return_value = int(time.time()) + 60
+    # The second CIDR is written to the table between the scan and the put
+    mock_ddb_client.return_value.put_item.side_effect = [{}, client_error('ConditionalCheckFailedException')]
+    source = tmp_path / 'cidrs.csv'
+    source.write_text('cidr_block,account_alias,region\n10.0.1.0/24,itx-001,us-west-2\n10.0.2.0/24,itx-001,\n')
+    summary = bulk_import.run_import(str(source), 'mock', 'us-west-2',
+                                     checkpoint_path=str(tmp_path / 'cidrs.checkpoint'), workers=1)
+    assert (summary['written'], summary['failed']) == (1, 0)
+    assert summary['rejected'] == [{'line': 3, 'cidr_block': '10.0.2.0/24',
+                                    'reason': 'Written to the table since the import was planned.'}]
+    # The table lock is held from the scan to the writes
+    mock_obtain_lock.assert_called_once_with('mock')
+    mock_clear_lock.assert_called_once_with('mock')
+
+
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+@patch('utils.cidr_lookups.retrieve_allocations')
+def test_run_import_resumes(mock_allocations, mock_region_params, tmp_path):
+    # Import
+    from utils import bulk_import
+    mock_allocations.return_value = []
+    mock_region_params.return_value = REGION_PARAMS
+    source = tmp_path / 'cidrs.csv'
+    source.write_text('cidr_block,account_alias,region\n10.0.1.0/24,itx-001,us-west-2\n10.0.2.0/24,itx-001,\n'
+                      '10.0.3.0/24,,us-west-2\n')
+    checkpoint = tmp_path / 'cidrs.checkpoint'
+    checkpoint.write_text(json.dumps({'line': 2}))
+    summary = bulk_import.run_import(str(source), 'mock', 'us-west-2', checkpoint_path=str(checkpoint),
+                                     dry_run=True)
+    assert summary['resumed_after_line'] == 2
+    assert summary['accepted'] == 1
+    assert summary['rejected'] == [{'line': 4, 'reason': 'Missing account alias.'}]
+
+
+@patch('utils.cidr_lock.renew_table_lock')
+@patch('boto3.client')
+def test_write_entries_renews_lock(mock_ddb_client, mock_renew_lock):
+    # Import
+    from utils import bulk_import
+    mock_ddb_client.return_value.put_item.return_value = {}
+    mock_renew_lock.side_effect = lambda ddb_table, expiry: expiry + 60
+    entries = [entry('10.0.{}.0/24'.format(index), index + 1) for index in range(60)]
+    # Invoke, the lock expires within the renew margin
+    expiry = int(time.time()) + 10
+    bulk_import.write_entries(entries, 'mock', workers=1, lock_expiry=expiry)
+    # Evaluate results, renewed once before writing, then kept ahead of the margin
+    assert mock_renew_lock.call_args_list[0][0] == ('mock', expiry)
+    assert mock_renew_lock.call_count == 1
+
+
+@patch('utils.cidr_lookups.bump_allocation_version')
+@patch('utils.cidr_lock.clear_table_lock')
+@patch('utils.cidr_lock.renew_table_lock')
+@patch('utils.cidr_lock.sync_obtain_table_lock')
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+@patch('utils.cidr_lookups.retrieve_allocations')
+@patch('boto3.client')
+def test_run_import_lock_lost(mock_ddb_client, mock_allocations, mock_region_params, mock_obtain_lock,
+                              mock_renew_lock, mock_clear_lock, mock_bump, tmp_path):
+    # Import
+    from utils import bulk_import, cidr_lock
+    mock_allocations.return_value = []
+    mock_region_params.return_value = REGION_PARAMS
+    # Planning outlasted the lock, which expired and was taken by another request
+    mock_obtain_lock.return_value = int(time.time()) - 1
+    mock_renew_lock.side_effect = cidr_lock.LockLostException()
+    source = tmp_path / 'cidrs.csv'
+    source.write_text('cidr_block,account_alias,region\n10.0.1.0/24,itx-001,us-west-2\n')
+    # Invoke
+    with pytest.raises(cidr_lock.LockLostException):
+        bulk_import.run_import(str(source), 'mock', 'us-west-2', workers=1)
+    # Evaluate results, nothing is written and the lock of the other request is kept
+    mock_ddb_client.return_value.put_item.assert_not_called()
+    mock_clear_lock.assert_not_called()
@@ -0,0 +1,76 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import pytest
+from unittest.mock import patch
+import boto3
+
+
+class MockBoto3PagedTable(object):
+    """Used to mock paginated boto3 DDB scans which return consumed capacity"""
+
+    def __init__(self, pages):
+        self.exceptions = boto3.client('dynamodb', 'us-west-2').exceptions
+        self.pages = pages
+        self.scan_calls = 0
+
+    def scan(self, **kwargs):
+        assert kwargs['ReturnConsumedCapacity'] == 'TOTAL'
+        response = {
+            'Items': [{'cidr_block': self.pages[self.scan_calls]}],
+            'ConsumedCapacity': {'TableName': 'mock', 'CapacityUnits': 4.0}
+        }
+        self.scan_calls += 1
+        if self.scan_calls < len(self.pages):
+            response['LastEvaluatedKey'] = {'cidr_block': self.pages[self.scan_calls - 1]}
+        return response
+
+
+def test_record_and_report():
+    # Import
+    from utils import capacity
+    # Invoke
+    capacity.reset()
+    capacity.record({'ConsumedCapacity': {'TableName': 'mock', 'CapacityUnits': 2.5}})
+    capacity.record({'ConsumedCapacity': {'TableName': 'mock', 'CapacityUnits': 1.0}}, write=True)
+    capacity.record({'ConsumedCapacity': [{'TableName': 'mock', 'ReadCapacityUnits': 0.5,
+                                           'WriteCapacityUnits': 2.0}]})
+    capacity.record({'ResponseMetadata': {'HTTPStatusCode': 200}})
+    # Evaluate results
+    assert capacity.report() == {'read_capacity_units': 3.0, 'write_capacity_units': 3.0}
+    capacity.reset()
+    assert capacity.report() == {'read_capacity_units': 0.0, 'write_capacity_units': 0.0}
+
+
+@patch('boto3.resource')
+def test_retrieve_used_cidrs_within_budget(mock_ddb_resource):
+    # Import
+    from utils import cidr_lookups, capacity
+    # Setup mocks
+    mock_table = MockBoto3PagedTable(['10.1.1.0/24', '10.1.2.0/24', '10.1.3.0/24'])
+    mock_ddb_resource().Table.return_value = mock_table
+    capacity.reset()
+    # Invoke method
+    with patch.object(capacity, 'READ_CAPACITY_BUDGET', 20.0):
+        result = cidr_lookups.retrieve_used_cidrs("us-west-2", False, False, 'aws', 'MockDDBTable')
+    # Evaluate results
+    assert result == ['10.1.1.0/24', '10.1.2.0/24', '10.1.3.0/24']
+    assert capacity.report()['read_capacity_units'] == 12.0
+
+
+@patch('boto3.resource')
+def test_retrieve_used_cidrs_over_budget(mock_ddb_resource):
+    # Import
+    from utils import cidr_lookups, capacity
+    # Setup mocks
+    mock_table = MockBoto3PagedTable(['10.1.1.0/24', '10.1.2.0/24', '10.1.3.0/24'])
+    mock_ddb_resource().Table.return_value = mock_table
+    capacity.reset()
+    # Invoke method
+    with patch.object(capacity, 'READ_CAPACITY_BUDGET', 10.0):
+        with pytest.raises(capacity.ReadBudgetExceededError) as e:
+            cidr_lookups.retrieve_used_cidrs("us-west-2", False, False, 'aws', 'MockDDBTable')
+    # Evaluate results, the third page is never read
+    assert mock_table.scan_calls == 2
+    assert capacity.budget_exceeded_response(e.value)['statusCode'] == 503
+    assert capacity.budget_exceeded_response(e.value)['headers']['Retry-After'] == str(e.value.retry_after)
@@ -0,0 +1,54 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import pytest
+
+REGION_PARAMS = {
+    'us-west-2': {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/20']}},
+                  'size-classes': {'AWS': {'24': {'cidrs': ['10.0.0.0/22']}}}},
+    'us-east-1': {'master-cidr': {'AWS': {'cidrs': ['10.1.0.0/16']}}}
+}
+
+
+def test_parse_forecast():
+    # Import
+    from utils import capacity_planner
+    assert capacity_planner.parse_forecast('200x/24, 40×/20') == [(200, 24), (40, 20)]
+    with pytest.raises(ValueError):
+        capacity_planner.parse_forecast('200/24')
+
+
+def test_plan_reports_exhaustion(tmp_path):
+    # Import
+    from utils import capacity_planner, snapshot_export
+    snapshot = str(tmp_path / 'snapshot')
+    snapshot_export.write_snapshot([
+        {'cidr_block': '10.0.0.0/24', 'region': 'US-WEST-2', 'cloud': 'AWS', 'locked': True, 'assigned': True},
+        {'cidr_block': '10.0.4.0/22', 'region': 'US-WEST-2', 'cloud': 'AWS', 'locked': True, 'assigned': True}
+    ], snapshot, snapshot_export.BINARY)
+    region_ranges = capacity_planner.load_region_ranges(snapshot)
+    # Four /24 and one /22 per period
+    results = capacity_planner.plan(REGION_PARAMS, region_ranges, [(4, 24), (1, 22)], 4, workers=1)
+    assert [result['region'] for result in results] == ['us-east-1', 'us-west-2']
+    east, west = results
+    assert east['first_reject'] is None
+    assert east['placed'] == 20
+    # us-west-2 has 3 free /24 in its slab and 2 free /22 outside it, /24 requests then fall back to the /22s
+    assert west['exhausted'] == {24: 2, 22: 2}
+    assert west['first_reject'] == 2
+    assert west['utilization'] == 1.0
+
+
+def test_main_json(tmp_path, capsys):
+    # Import
+    from utils import capacity_planner, snapshot_export
+    snapshot = str(tmp_path / 'snapshot.jsonl.gz')
+    snapshot_export.write_snapshot([], snapshot)
+    params = tmp_path / 'params.json'
+    params.write_text(json.dumps(REGION_PARAMS))
+    assert capacity_planner.main(['--snapshot', snapshot, '--params', str(params), '--forecast', '1x/16',
+                                  '--periods', '2', '--workers', '1', '--json']) == 1
+    results = json.loads(capsys.readouterr().out)
+    assert results[0]['exhausted'] == {'16': 2}
+    assert results[1]['exhausted'] == {'16': 1}
@@ -0,0 +1,96 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import ipaddress
+import random
+
+
+def test_first_fit_agrees_with_list_all_available_cidr():
+    # Import
+    from utils import cidr_allocator, cidr_lookups
+    # Setup mocks
+    generator = random.Random(11)
+    root_cidr_list = ['10.1.0.0/20', '10.0.0.0/18', '10.2.0.0/24']
+    for _ in range(20):
+        allocated_cidr_list = [ipaddress.IPv4Network((generator.choice([167772160, 167837696]) +
+                                                      generator.randrange(0, 2 ** 14), generator.randint(20, 28)),
+                                                     strict=False).with_prefixlen for _ in range(60)]
+        used = cidr_allocator.UsedRanges(allocated_cidr_list)
+        for prefix in (18, 20, 22, 24, 26):
+            # Invoke
+            result = cidr_allocator.first_fit(root_cidr_list, used, prefix)
+            # Evaluate results
+            expected = cidr_lookups.list_all_available_cidr(root_cidr_list, allocated_cidr_list, prefix)
+            assert result == (ipaddress.IPv4Network(expected[0]) if expected else None)
+
+
+def test_next_fit_resumes_and_wraps():
+    # Import
+    from utils import cidr_allocator
+    # Setup mocks
+    root_cidr_list = ['10.0.0.0/22', '10.1.0.0/23']
+    allocated_cidr_list = ['10.0.0.0/24', '10.0.2.0/24', '10.1.0.0/24']
+    used = cidr_allocator.UsedRanges(allocated_cidr_list)
+    cursor = int(ipaddress.IPv4Address('10.0.2.0'))
+    # Invoke and evaluate results
+    placed = []
+    for _ in range(3):
+        network = cidr_allocator.next_fit(root_cidr_list, used, 24, cursor)
+        placed.append(network.with_prefixlen)
+        used = cidr_allocator.UsedRanges(allocated_cidr_list + placed)
+        cursor = cidr_allocator.next_cursor(network)
+    assert placed == ['10.0.3.0/24', '10.1.1.0/24', '10.0.1.0/24']
+    assert cidr_allocator.next_fit(root_cidr_list, used, 24, cursor) is None
+    # A cursor outside the root CIDRs starts over from the first root
+    assert cidr_allocator.next_fit(root_cidr_list, cidr_allocator.UsedRanges([]), 24, 0) == \
+        ipaddress.IPv4Network('10.0.0.0/24')
+
+
+def test_best_fit_and_buddy_keep_large_blocks_whole():
+    # Import
+    from utils import cidr_allocator
+    # Setup mocks, a free /24 and a free /26 gap below a mostly used /16
+    root_cidr_list = ['10.0.0.0/16']
+    used = cidr_allocator.UsedRanges(['10.0.0.0/24', '10.0.2.0/23', '10.0.4.0/26', '10.0.4.128/25', '10.0.5.0/24',
+                                      '10.0.6.0/23', '10.0.8.0/21', '10.0.16.0/20', '10.0.32.0/19', '10.0.64.0/18'])
+    # Invoke and evaluate results
+    assert cidr_allocator.place('first-fit', root_cidr_list, used, 27) == ipaddress.IPv4Network('10.0.1.0/27')
+    assert cidr_allocator.place('best-fit', root_cidr_list, used, 27) == ipaddress.IPv4Network('10.0.4.64/27')
+    assert cidr_allocator.place('buddy', root_cidr_list, used, 27) == ipaddress.IPv4Network('10.0.4.64/27')
+    # The free /17 stays whole, the second half of the /16 is the largest free block
+    assert cidr_allocator.place('best-fit', root_cidr_list, used, 24) == ipaddress.IPv4Network('10.0.1.0/24')
+    assert cidr_allocator.place('buddy', root_cidr_list, used, 17) == ipaddress.IPv4Network('10.0.128.0/17')
+    assert cidr_allocator.place('buddy', root_cidr_list, used, 16) is None
+    # Fragmentation is the share of free addresses outside the /17
+    assert cidr_allocator.fragmentation(root_cidr_list, used) == 1 - 2 ** 15 / (2 ** 15 + 256 + 64)
+    assert cidr_allocator.fragmentation(root_cidr_list, cidr_allocator.UsedRanges([])) == 0
+
+
+def test_affinity_places_next_to_account_cidrs():
+    # Import
+    from utils import cidr_allocator
+    # Setup mocks
+    root_cidr_list = ['10.0.0.0/16']
+    used = cidr_allocator.UsedRanges(['10.0.0.0/24', '10.0.4.0/24', '10.0.6.0/24', '10.0.7.0/25'])
+    # Invoke and evaluate results
+    # The buddy of the account's /24
+    assert cidr_allocator.affinity(root_cidr_list, used, 24, ['10.0.4.0/24']) == ipaddress.IPv4Network('10.0.5.0/24')
+    # The smallest supernet wins across the account's CIDRs
+    assert cidr_allocator.affinity(root_cidr_list, used, 25, ['10.0.4.0/24', '10.0.7.0/25']) == \
+        ipaddress.IPv4Network('10.0.7.128/25')
+    # No free block within the searched levels
+    assert cidr_allocator.affinity(root_cidr_list, used, 24, ['10.0.6.0/24'], max_levels=1) is None
+    assert cidr_allocator.affinity(root_cidr_list, used, 24, []) is None
+
+
+def test_used_ranges_add_merges():
+    # Import
+    from utils import cidr_allocator
+    used = cidr_allocator.UsedRanges(ranges=[(0, 9), (20, 29), (40, 49)])
+    used.add(10, 19)
+    assert used.ranges == [(0, 29), (40, 49)]
+    used.add(35, 60)
+    assert used.ranges == [(0, 29), (35, 60)]
+    used.add(100, 100)
+    assert used.ranges == [(0, 29), (35, 60), (100, 100)]
+    assert used.ends == [29, 60, 100]
@@ -2,7 +2,9 @@
 # SPDX-License-Identifier: MIT-0
 
 import boto3
+import pytest
 from unittest.mock import patch
+from botocore.exceptions import ClientError
 
 
 class MockBoto3Table(object):
@@ -17,6 +19,14 @@ class MockBoto3Table(object):
     def delete_item(self, **kwargs):
         return None
 
+    def update_item(self, **kwargs):
+        # The lock carries the expiry time 100
+        if kwargs['ConditionExpression'].get_expression()['values'][1] != 100:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Failed'}},
+                              'UpdateItem')
+        self.renewed = kwargs['ExpressionAttributeValues'][':new_expiry']
+        return {}
+
 
 @patch('boto3.resource')
 def test_lock_cidr(mock_ddb_resource):
@@ -40,3 +50,17 @@ def test_clear_lock(mock_ddb_resource):
     result = cidr_lock.clear_table_lock("mock")
     # Evaluate results
     assert result
+
+
+@patch('boto3.resource')
+def test_renew_lock(mock_ddb_resource):
+    # Import
+    from utils import cidr_lock
+    # Setup mocks
+    mock_table = MockBoto3Table()
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke and evaluate results
+    assert cidr_lock.renew_table_lock("mock", 100) == mock_table.renewed > 100
+    # A lock with another expiry time belongs to another request
+    with pytest.raises(cidr_lock.LockLostException):
+        cidr_lock.renew_table_lock("mock", 99)
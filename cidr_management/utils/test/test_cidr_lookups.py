@@ -5,7 +5,7 @@ import ipaddress
 import json
 import os
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import boto3
 
 BASE_PATH = os.path.dirname(os.path.realpath(__file__))
@@ -27,6 +27,9 @@ class MockBoto3Table(object):
     def update_item(self, **kwargs):
         return {'ResponseMetadata': {'HTTPStatusCode': 200}}
 
+    def query(self, **kwargs):
+        return {'Items': []}
+
     def scan(self, **kwargs):
         response = dict()
         response['Items'] = \
@@ -66,6 +69,119 @@ def test_reserve_cidr(mock_ddb_resource):
     assert result['body'] == '10.0.1.0/24'
 
 
+class MockBoto3RegionIndex(MockBoto3Table):
+    """Used to mock the region GSI, holding 10.0.0.0/24 and 10.0.2.0/23, and 10.0.4.0/24 which is not locked"""
+
+    ITEMS = [{'cidr_block': '10.0.0.0/24', 'net_start': 167772160, 'net_end': 167772415, 'locked': True},
+             {'cidr_block': '10.0.2.0/23', 'net_start': 167772672, 'net_end': 167773183, 'locked': True},
+             {'cidr_block': '10.0.4.0/24', 'net_start': 167773184, 'net_end': 167773439, 'locked': False}]
+
+    def query(self, **kwargs):
+        # Evaluate the net_start key condition of the query against the mock items
+        condition = kwargs['KeyConditionExpression'].get_expression()['values'][1]
+        bounds = condition.get_expression()['values'][1:]
+        if condition.expression_operator == '<=':
+            items = [item for item in self.ITEMS if item['net_start'] <= bounds[0]]
+        else:
+            items = [item for item in self.ITEMS if bounds[0] <= item['net_start'] <= bounds[1]]
+        items.sort(key=lambda item: item['net_start'], reverse=not kwargs['ScanIndexForward'])
+        # Evaluate Limit items after the start key, then the locked filter
+        if 'ExclusiveStartKey' in kwargs:
+            items = items[items.index(kwargs['ExclusiveStartKey']) + 1:]
+        page = items[:kwargs['Limit']]
+        resp = {'Items': [item for item in page if item['locked']]}
+        if len(items) > kwargs['Limit']:
+            resp['LastEvaluatedKey'] = page[-1]
+        return resp
+
+    def put_item(self, **kwargs):
+        self.put = kwargs['Item']
+        return super().put_item(**kwargs)
+
+
+@patch('boto3.resource')
+def test_reserve_cidr_neighbor_overlap(mock_ddb_resource):
+    # Import
+    from utils import cidr_lookups
+    # Setup mocks
+    mock_table = MockBoto3RegionIndex()
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke and evaluate results
+    assert cidr_lookups.reserve_cidr('10.0.3.0/24', 'us-west-2', 'itx-001', 'aws', 'mock')['body'] == \
+        'CIDR block overlaps 10.0.2.0/23.'
+    assert cidr_lookups.reserve_cidr('10.0.0.0/22', 'us-west-2', 'itx-001', 'aws', 'mock')['body'] == \
+        'CIDR block overlaps 10.0.0.0/24.'
+    # The unlocked 10.0.4.0/24 is skipped, the predecessor 10.0.2.0/23 is read past it
+    assert cidr_lookups.reserve_cidr('10.0.4.0/23', 'us-west-2', 'itx-001', 'aws', 'mock')['statusCode'] == 200
+    assert cidr_lookups.reserve_cidr('10.0.3.128/25', 'us-west-2', 'itx-001', 'aws', 'mock')['body'] == \
+        'CIDR block overlaps 10.0.2.0/23.'
+    assert cidr_lookups.reserve_cidr('10.0.1.0/24', 'us-west-2', 'itx-001', 'aws', 'mock')['statusCode'] == 200
+    assert mock_table.put['region_key'] == 'AWS#US-WEST-2'
+    assert (mock_table.put['net_start'], mock_table.put['net_end']) == (167772416, 167772671)
+    # Without the neighbor check only the conditional write guards the reserve
+    assert cidr_lookups.reserve_cidr('10.0.3.0/24', 'us-west-2', 'itx-001', 'aws', 'mock',
+                                     check_neighbors=False)['statusCode'] == 200
+
+
+@patch('boto3.client')
+@patch('boto3.resource')
+def test_reserve_cidr_idempotency_key(mock_ddb_resource, mock_ddb_client):
+    # Import
+    from utils import cidr_lookups
+    from botocore.exceptions import ClientError
+    # Setup mocks
+    mock_ddb_resource().Table.return_value = MockBoto3Table()
+    mock_client = mock_ddb_client.return_value
+    mock_client.transact_write_items.return_value = {}
+    # Invoke method, the reservation and its marker are written in one transaction
+    result = cidr_lookups.reserve_cidr('10.0.1.0/24', 'us-west-2', 'itx-001', 'aws', 'mock', idempotency_key='A9321')
+    # Evaluate results
+    assert result == {'statusCode': 200, 'body': '10.0.1.0/24'}
+    reservation, marker = mock_client.transact_write_items.call_args[1]['TransactItems']
+    assert reservation['Put']['Item']['cidr_block'] == {'S': '10.0.1.0/24'}
+    assert marker['Put']['Item']['cidr_block'] == {'S': 'IDEMPOTENCY#ITX-001#A9321'}
+    assert marker['Put']['Item']['reserved_cidr'] == {'S': '10.0.1.0/24'}
+    assert 'region' not in marker['Put']['Item']
+    # A CIDR taken by another request fails the reservation condition
+    mock_client.transact_write_items.side_effect = ClientError(
+        {'Error': {'Code': 'TransactionCanceledException'},
+         'CancellationReasons': [{'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]}, 'TransactWriteItems')
+    result = cidr_lookups.reserve_cidr('10.0.1.0/24', 'us-west-2', 'itx-001', 'aws', 'mock', idempotency_key='A9321')
+    assert result == {'statusCode': 400, 'body': 'CIDR block already exists.'}
+
+
+@patch('boto3.resource')
+def test_idempotent_retry_after_release(mock_ddb_resource):
+    # Import
+    import time
+    from unittest.mock import MagicMock
+    from utils import cidr_lookups
+    # Setup mocks, the reservation of the key was released and the CIDR reserved again by another account
+    marker = {'cidr_block': 'IDEMPOTENCY#ITX-001#A9321', 'reserved_cidr': '10.0.1.0/24', 'subnet_prefix': 24,
+              'request_region': 'US-WEST-2', 'request_cloud': 'AWS', 'lock_date': 'Mon Oct 19 10:00:00 2026',
+              'lock_expiration': int(time.time()) + 60}
+    items = {marker['cidr_block']: marker,
+             '10.0.1.0/24': {'cidr_block': '10.0.1.0/24', 'account_alias': 'ITX-002', 'locked': True,
+                             'lock_date': 'Mon Oct 19 10:05:00 2026'}}
+    mock_table = MagicMock()
+    mock_table.get_item.side_effect = lambda **kwargs: {'Item': items.get(kwargs['Key']['cidr_block'])}
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke
+    result = cidr_lookups.retrieve_idempotent_reservation('A9321', 'itx-001', 24, 'us-west-2', 'aws', 'mock')
+    # Evaluate results, the key is unused and its stale marker deleted
+    assert result is None
+    assert mock_table.delete_item.call_args[1]['Key'] == {'cidr_block': 'IDEMPOTENCY#ITX-001#A9321'}
+    # Released and not reserved again
+    del items['10.0.1.0/24']
+    assert cidr_lookups.retrieve_idempotent_reservation('A9321', 'itx-001', 24, 'us-west-2', 'aws', 'mock') is None
+    # Still reserved by the request of the key
+    items['10.0.1.0/24'] = {'cidr_block': '10.0.1.0/24', 'account_alias': 'ITX-001', 'locked': True,
+                            'lock_date': 'Mon Oct 19 10:00:00 2026'}
+    result = cidr_lookups.retrieve_idempotent_reservation('A9321', 'itx-001', 24, 'us-west-2', 'aws', 'mock')
+    assert result['statusCode'] == 200
+    assert result['body'] == '10.0.1.0/24'
+
+
 @patch('boto3.resource')
 def test_update_cidr_flag_locked(mock_ddb_resource):
     # Import
@@ -159,6 +275,27 @@ def test_extract_post_request_params_error():
     assert e.value.args[0] == 'Missing account alias.'
 
 
+def test_extract_post_request_params_dry_run_sizes():
+    # Import
+    from utils import cidr_lookups
+    from utils.cidr_lookups import InputValidationError
+    # Setup mocks
+    event = {'pathParameters': {'cloud': 'aws', 'region': 'us-west-2'},
+             'body': json.dumps({'account_alias': 'itx-001', 'dry_run': True, 'sizes': ['/24', '/20']})}
+    # Invoke
+    params = cidr_lookups.extract_post_request_params(event)
+    # Evaluate results
+    assert params['dry_run'] is True
+    assert params['sizes'] == ['24', '20']
+    # Multiple sizes are only placed by dry runs
+    event['body'] = json.dumps({'account_alias': 'itx-001', 'sizes': ['/24']})
+    with pytest.raises(InputValidationError):
+        cidr_lookups.extract_post_request_params(event)
+    event['body'] = json.dumps({'account_alias': 'itx-001', 'dry_run': True, 'sizes': ['/8']})
+    with pytest.raises(InputValidationError):
+        cidr_lookups.extract_post_request_params(event)
+
+
 @patch('boto3.client')
 def test_retrieve_region_cidr(mock_boto_client):
     # Import
@@ -189,6 +326,68 @@ def test_retrieve_alt_region_cidr(mock_boto_client):
     assert result == ["192.171.0.0/16"]
 
 
+@patch('boto3.client')
+@patch('boto3.resource')
+def test_listing_etag(mock_ddb_resource, mock_boto_client):
+    # Import
+    from utils import cidr_lookups
+    # Setup mocks
+    mock_table = mock_ddb_resource().Table.return_value
+    mock_table.get_item.return_value = {'Item': {'cidr_block': 'VERSION#AWS#US-WEST-2', 'version': 7}}
+    mock_boto_client().get_parameter.return_value = {'Parameter': {'Value': '{}', 'Version': 3}}
+    params = {'size': '24', 'locked': False, 'assigned': False}
+    # Invoke
+    etag = cidr_lookups.listing_etag('us-west-2', 'aws', params, 'MockDDBTable')
+    # Evaluate results
+    assert etag.startswith('"7.3.')
+    assert mock_table.get_item.call_args[1]['Key'] == {'cidr_block': 'VERSION#AWS#US-WEST-2'}
+    assert mock_table.get_item.call_args[1]['ConsistentRead']
+    # Listings of other params have other tags
+    assert cidr_lookups.listing_etag('us-west-2', 'aws', dict(params, size='25'), 'MockDDBTable') != etag
+    assert cidr_lookups.etag_matches(etag, ['"other"', etag])
+    assert cidr_lookups.etag_matches(etag, ['*'])
+    assert not cidr_lookups.etag_matches(etag, None)
+    # A write to the region bumps its version
+    assert cidr_lookups.bump_allocation_version('us-west-2', 'aws', 'MockDDBTable')
+    assert mock_table.update_item.call_args[1]['UpdateExpression'] == 'ADD version :one'
+
+
+@patch('boto3.resource')
+def test_reserve_cidr_version_bump_fails(mock_ddb_resource):
+    # Import
+    from utils import cidr_lookups
+    from botocore.exceptions import ClientError
+    # Setup mocks, the reservation is written but the version bump is throttled
+    mock_table = MockBoto3Table()
+    mock_table.update_item = MagicMock(side_effect=ClientError(
+        {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Throttled'}}, 'UpdateItem'))
+    mock_ddb_resource().Table.return_value = mock_table
+    # Invoke and evaluate results, the committed reservation is still returned
+    assert not cidr_lookups.bump_allocation_version('us-west-2', 'aws', 'MockDDBTable')
+    result = cidr_lookups.reserve_cidr('10.0.1.0/24', 'us-west-2', 'itx-001', 'aws', 'MockDDBTable')
+    assert result == {'statusCode': 200, 'body': '10.0.1.0/24'}
+
+
+def test_extract_request_params_if_none_match():
+    # Import
+    from utils import cidr_lookups
+    # Setup mocks
+    event = {
+        'pathParameters': {'cloud': 'aws', 'region': 'us-west-2'},
+        'queryStringParameters': {'size': '/24'},
+        'headers': {'if-none-match': '"1.2.abc", W/"1.3.abc"', 'Accept-Encoding': 'gzip, deflate'}
+    }
+    # Invoke
+    params = cidr_lookups.extract_request_params(event)
+    # Evaluate results
+    assert params['if_none_match'] == ['"1.2.abc"', '"1.3.abc"']
+    assert params['gzip']
+    assert params['format'] == 'cidrs'
+    event['queryStringParameters']['format'] = 'xml'
+    with pytest.raises(cidr_lookups.InputValidationError):
+        cidr_lookups.extract_request_params(event)
+
+
 def test_valid_available_cidr_data():
     # Import
     from utils import cidr_lookups
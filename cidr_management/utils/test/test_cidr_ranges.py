@@ -0,0 +1,66 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import ipaddress
+import random
+
+
+def test_to_range_and_merge():
+    # Import
+    from utils import cidr_ranges
+    # Invoke and evaluate results
+    assert cidr_ranges.to_range('10.0.0.0/24') == (167772160, 167772415)
+    ranges = [cidr_ranges.to_range(cidr) for cidr in ['10.0.1.0/24', '10.0.0.0/24', '10.0.0.128/25', '10.0.3.0/24']]
+    assert cidr_ranges.merge_ranges(ranges) == [(167772160, 167772671), (167772928, 167773183)]
+
+
+def test_cidr_runs():
+    # Import
+    from utils import cidr_ranges
+    # Invoke and evaluate results
+    cidr_list = ['10.0.1.0/24', '10.0.0.0/24', '10.0.2.0/25', '10.0.2.128/25', '10.0.4.0/24', '10.0.3.0/24']
+    assert cidr_ranges.cidr_runs(cidr_list) == [('10.0.0.0', 24, 2), ('10.0.2.0', 25, 2), ('10.0.3.0', 24, 2)]
+    assert cidr_ranges.cidr_runs([]) == []
+
+
+def test_find_overlaps():
+    # Import
+    from utils import cidr_ranges
+    # Setup mocks
+    queries = [('10.0.0.0/16', 'q1'), ('192.168.0.0/24', 'q2'), ('10.1.2.0/24', 'q3')]
+    references = [('10.0.5.0/24', 'r1'), ('10.1.0.0/16', 'r2'), ('172.16.0.0/12', 'r3')]
+    # Invoke
+    result = cidr_ranges.find_overlaps(queries, references)
+    # Evaluate results
+    assert sorted(result) == [('q1', 'r1'), ('q3', 'r2')]
+
+
+def test_find_overlaps_agrees_with_pairwise_check():
+    # Import
+    from utils import cidr_ranges
+    # Setup mocks
+    generator = random.Random(7)
+
+    def random_networks(count):
+        return [ipaddress.IPv4Network((generator.randrange(0, 2 ** 32), generator.randint(8, 28)), strict=False)
+                for _ in range(count)]
+    queries = [(network, index) for index, network in enumerate(random_networks(150))]
+    references = [(network, index) for index, network in enumerate(random_networks(150))]
+    # Invoke
+    result = cidr_ranges.find_overlaps(queries, references)
+    # Evaluate results
+    expected = [(query_index, reference_index) for query, query_index in queries
+                for reference, reference_index in references if query.overlaps(reference)]
+    assert sorted(result) == sorted(expected)
+
+
+def test_sweep_overlaps_within_group():
+    # Import
+    from utils import cidr_ranges
+    # Setup mocks
+    intervals = [cidr_ranges.to_range(cidr) + ('us-east-1', cidr) for cidr in ['10.0.0.0/16', '10.0.1.0/24']]
+    intervals.append(cidr_ranges.to_range('10.0.200.0/24') + ('us-west-2', '10.0.200.0/24'))
+    # Invoke and evaluate results
+    assert sorted(cidr_ranges.sweep_overlaps(intervals)) == [('10.0.0.0/16', '10.0.1.0/24'),
+                                                             ('10.0.0.0/16', '10.0.200.0/24')]
+    assert cidr_ranges.sweep_overlaps(intervals, cross_group_only=True) == [('10.0.0.0/16', '10.0.200.0/24')]
@@ -0,0 +1,40 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import ipaddress
+
+
+def test_longest_match():
+    # Import
+    from utils.cidr_trie import CidrTrie
+    # Setup mocks
+    trie = CidrTrie()
+    trie.insert('10.0.0.0/16', 'root')
+    trie.insert('10.0.1.0/24', 'vpc-1')
+    trie.insert('10.0.1.128/27', 'vpc-2')
+    # Invoke and evaluate results
+    assert len(trie) == 3
+    assert trie.longest_match('10.0.1.130')[1] == 'vpc-2'
+    assert trie.longest_match('10.0.1.5')[1] == 'vpc-1'
+    assert trie.longest_match('10.0.200.1')[1] == 'root'
+    assert trie.longest_match('10.0.1.128/27')[0] == ipaddress.IPv4Network('10.0.1.128/27')
+    assert trie.longest_match('10.0.1.0/25')[1] == 'vpc-1'
+    assert trie.longest_match('10.0.0.0/8') is None
+    assert trie.longest_match('192.168.0.1') is None
+
+
+def test_longest_match_agrees_with_linear_search():
+    # Import
+    from utils.cidr_trie import CidrTrie
+    # Setup mocks
+    networks = [ipaddress.IPv4Network('172.16.0.0/12')] + \
+        list(ipaddress.IPv4Network('172.16.0.0/16').subnets(new_prefix=20)) + \
+        list(ipaddress.IPv4Network('172.16.32.0/20').subnets(new_prefix=27))[::3]
+    trie = CidrTrie()
+    for network in networks:
+        trie.insert(network, network)
+    # Invoke and evaluate results
+    for address in range(int(ipaddress.IPv4Address('172.16.30.0')), int(ipaddress.IPv4Address('172.16.50.0')), 37):
+        address = ipaddress.IPv4Address(address)
+        expected = max((network for network in networks if address in network), key=lambda n: n.prefixlen)
+        assert trie.longest_match(str(address))[1] == expected
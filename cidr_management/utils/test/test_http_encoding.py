@@ -0,0 +1,54 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for request and response content encoding"""
+import os
+import sys
+import gzip
+import json
+import base64
+from unittest.mock import patch
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+
+def test_accepts_gzip():
+    # Import
+    from utils import http_encoding
+    # Evaluate results
+    assert http_encoding.accepts_gzip({'headers': {'accept-encoding': 'br, gzip;q=0.8'}})
+    assert http_encoding.accepts_gzip({'headers': {'Accept-Encoding': '*'}})
+    assert not http_encoding.accepts_gzip({'headers': {'Accept-Encoding': 'gzip;q=0'}})
+    assert not http_encoding.accepts_gzip({'headers': {'Accept-Encoding': 'identity'}})
+    assert not http_encoding.accepts_gzip({'headers': None})
+
+
+def test_json_response():
+    # Import
+    from utils import http_encoding
+    # Setup mocks
+    value = {'cidrs': ['10.0.{}.0/24'.format(index) for index in range(256)]}
+    # Invoke
+    plain = http_encoding.json_response(200, value, {'ETag': '"1"'})
+    compressed = http_encoding.json_response(200, value, {'ETag': '"1"'}, compress=True)
+    # Evaluate results
+    assert plain == {'statusCode': 200, 'headers': {'ETag': '"1"'}, 'body': json.dumps(value)}
+    assert compressed['isBase64Encoded']
+    assert compressed['headers'] == {'ETag': '"1"', 'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+    assert json.loads(gzip.decompress(base64.b64decode(compressed['body']))) == value
+    assert len(compressed['body']) < len(plain['body']) / 4
+    # Small bodies are not compressed
+    assert 'isBase64Encoded' not in http_encoding.json_response(200, {'cidrs': []}, compress=True)
+
+
+def test_request_body():
+    # Import
+    from utils import http_encoding
+    # Evaluate results
+    body = '{"size": "/24"}'
+    assert http_encoding.request_body({'body': body}) == body
+    assert http_encoding.request_body({'body': base64.b64encode(body.encode()).decode(),
+                                       'isBase64Encoded': True}) == body
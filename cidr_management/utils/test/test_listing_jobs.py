@@ -0,0 +1,130 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+"""Unit tests for the async listing jobs and their job store"""
+import os
+import json
+from unittest import mock
+from unittest.mock import patch, MagicMock
+import pytest
+import sys
+
+BASE_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(BASE_PATH, '..'))
+sys.path.append(os.path.join(BASE_PATH, '../..'))
+
+
+@pytest.fixture(autouse=True)
+def mock_table_lock():
+    with mock.patch('utils.cidr_lock.sync_obtain_table_lock') as mock_obtain, \
+            mock.patch('utils.cidr_lock.clear_table_lock') as mock_clear:
+        yield mock_obtain, mock_clear
+
+
+JOB_PARAMS = {'region': 'us-west-2', 'cloud_provider': 'AWS', 'size': '26', 'locked': False, 'assigned': False}
+
+
+def test_local_job_store(tmp_path):
+    # Import
+    from utils import job_store
+    # Invoke
+    store = job_store.get_job_store('file://' + str(tmp_path))
+    job_store.put_json(store, job_store.chunk_key('abc', 3), ['10.0.0.0/24'])
+    # Evaluate results
+    assert job_store.get_json(store, 'abc/chunk-00003.json') == ['10.0.0.0/24']
+    assert job_store.get_json(store, job_store.status_key('abc')) is None
+    assert job_store.is_valid_job_id(job_store.new_job_id())
+    assert not job_store.is_valid_job_id('../abc')
+    assert not job_store.is_valid_job_id(job_store.new_job_id() + '\n')
+
+
+@patch('boto3.client')
+def test_s3_job_store(mock_client):
+    # Import
+    from utils import job_store
+    # Setup mocks
+    mock_client.return_value.get_object.return_value = {'Body': MagicMock(read=lambda: b'{"status": "pending"}')}
+    store = job_store.get_job_store('s3://jobs-bucket/jobs')
+    # Invoke
+    job_store.put_json(store, 'abc/status.json', {'status': 'pending'})
+    result = job_store.get_json(store, 'abc/status.json')
+    # Evaluate results
+    assert result == {'status': 'pending'}
+    assert mock_client.return_value.put_object.call_args[1]['Key'] == 'jobs/abc/status.json'
+    assert mock_client.return_value.get_object.call_args[1] == {'Bucket': 'jobs-bucket', 'Key': 'jobs/abc/status.json'}
+    with pytest.raises(ValueError):
+        job_store.get_job_store('ftp://jobs')
+
+
+@pytest.mark.parametrize('code', ['NoSuchKey', '404', 'AccessDenied'])
+@patch('boto3.client')
+def test_s3_job_store_missing_object(mock_client, code):
+    # Import
+    from botocore.exceptions import ClientError
+    from utils import job_store
+    # Setup mocks
+    mock_client.return_value.get_object.side_effect = ClientError({'Error': {'Code': code}}, 'GetObject')
+    store = job_store.get_job_store('s3://jobs-bucket/jobs')
+    # Invoke and evaluate results
+    assert job_store.get_json(store, 'abc/status.json') is None
+    mock_client.return_value.get_object.side_effect = ClientError({'Error': {'Code': 'SlowDown'}}, 'GetObject')
+    with pytest.raises(ClientError):
+        job_store.get_json(store, 'abc/status.json')
+
+
+@patch('utils.cidr_lookups.retrieve_used_cidrs')
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_run_job_writes_chunks(mock_retrieve_region_cidr, mock_retrieve_used_cidrs, mock_table_lock, tmp_path):
+    # Import
+    from utils import listing_jobs, job_store
+    # Setup mocks
+    mock_retrieve_region_cidr.return_value = ['10.0.0.0/24']
+    mock_retrieve_used_cidrs.return_value = ['10.0.0.64/26']
+    store = job_store.get_job_store('file://' + str(tmp_path))
+    with patch('utils.listing_jobs.LISTING_JOB_FUNCTION_NAME', ''), patch('utils.listing_jobs.JOB_CHUNK_SIZE', 2):
+        # Invoke
+        status = listing_jobs.start_job(JOB_PARAMS, 'mock', store)
+    # Evaluate results
+    assert status['status'] == listing_jobs.SUCCEEDED
+    assert (status['chunks'], status['cidrs']) == (2, 3)
+    assert listing_jobs.get_chunk(status['job_id'], 0, store) == ['10.0.0.0/26', '10.0.0.128/26']
+    assert listing_jobs.get_chunk(status['job_id'], 1, store) == ['10.0.0.192/26']
+    assert listing_jobs.get_status(status['job_id'], store) == status
+    # The lock is released before the listing is written
+    assert mock_table_lock[1].called
+
+
+@patch('boto3.client')
+def test_start_job_invokes_worker(mock_client, tmp_path):
+    # Import
+    from utils import listing_jobs, job_store
+    # Setup mocks
+    store = job_store.get_job_store('file://' + str(tmp_path))
+    with patch('utils.listing_jobs.LISTING_JOB_FUNCTION_NAME', 'ListingJobWorker'):
+        # Invoke
+        status = listing_jobs.start_job(JOB_PARAMS, 'mock', store)
+    # Evaluate results
+    assert status['status'] == listing_jobs.PENDING
+    invoke_kwargs = mock_client.return_value.invoke.call_args[1]
+    assert invoke_kwargs['InvocationType'] == 'Event'
+    assert json.loads(invoke_kwargs['Payload']) == {'job_id': status['job_id']}
+    assert listing_jobs.get_status(status['job_id'], store)['params'] == JOB_PARAMS
+
+
+@patch('utils.cidr_lookups.retrieve_region_cidr')
+def test_run_job_records_failure(mock_retrieve_region_cidr, mock_table_lock, tmp_path):
+    # Import
+    from utils import listing_jobs, job_store, cidr_lookups
+    # Setup mocks
+    mock_retrieve_region_cidr.side_effect = cidr_lookups.MissingRegionError
+    store = job_store.get_job_store('file://' + str(tmp_path))
+    job_store.put_json(store, job_store.status_key('abc'), {'job_id': 'abc', 'params': JOB_PARAMS})
+    # Invoke
+    status = listing_jobs.run_job('abc', 'mock', store)
+    # Evaluate results
+    assert status['status'] == listing_jobs.FAILED
+    assert status['error'] == 'No root CIDR list found for the specified region.'
+    assert mock_table_lock[1].called
+    with pytest.raises(listing_jobs.JobNotFoundError):
+        listing_jobs.run_job('missing', 'mock', store)
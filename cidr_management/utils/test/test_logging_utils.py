@@ -0,0 +1,61 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import logging
+from unittest.mock import patch
+
+
+def test_summarize_list_is_bounded():
+    # Import
+    from utils import logging_utils
+    # Setup mocks
+    cidr_list = ['10.0.{}.0/24'.format(i) for i in range(100)]
+    # Invoke
+    with patch.object(logging_utils, 'LOG_SAMPLE_SIZE', 2), \
+            patch.object(logging_utils.LOGGER, 'isEnabledFor', return_value=False):
+        summary = str(logging_utils.summarize_list(cidr_list))
+    # Evaluate results
+    assert summary == "100 items, first 2: ['10.0.0.0/24', '10.0.1.0/24']"
+
+
+def test_summarize_list_full_dump_at_debug():
+    # Import
+    from utils import logging_utils
+    # Setup mocks
+    cidr_list = ['10.0.{}.0/24'.format(i) for i in range(100)]
+    # Invoke
+    with patch.object(logging_utils, 'LOG_SAMPLE_SIZE', 2), \
+            patch.object(logging_utils.LOGGER, 'isEnabledFor', return_value=True):
+        summary = str(logging_utils.summarize_list(cidr_list))
+    # Evaluate results
+    assert summary == str(cidr_list)
+
+
+def test_summarize_event_drops_headers_and_body():
+    # Import
+    from utils import logging_utils
+    # Setup mocks
+    event = {
+        'httpMethod': 'GET',
+        'pathParameters': {'cloud': 'aws', 'region': 'us-west-2'},
+        'headers': {'accept': '*/*'},
+        'body': '{}'
+    }
+    # Invoke
+    with patch.object(logging_utils.LOGGER, 'isEnabledFor', return_value=False):
+        summary = str(logging_utils.summarize_event(event))
+    # Evaluate results
+    assert summary == "{'httpMethod': 'GET', 'pathParameters': {'cloud': 'aws', 'region': 'us-west-2'}}"
+    assert str(logging_utils.summarize_event(None)) == 'None'
+
+
+def test_summary_not_formatted_when_level_disabled():
+    # Import
+    from utils import logging_utils
+    # Setup mocks
+    logger = logging.getLogger('test_summary_not_formatted')
+    logger.setLevel(logging.WARNING)
+    # Invoke and evaluate results
+    with patch.object(logging_utils._ListSummary, '__str__') as mock_str:
+        logger.info('Used CIDRs: %s', logging_utils.summarize_list(['10.0.0.0/24']))
+        assert not mock_str.called
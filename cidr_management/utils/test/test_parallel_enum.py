@@ -0,0 +1,79 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import ipaddress
+import random
+from unittest.mock import patch
+
+
+def test_enumerate_available_matches_subnet_walk():
+    # Import
+    from utils import parallel_enum
+    # Setup mocks
+    generator = random.Random(5)
+    root_cidr_list = ['10.1.0.0/20', '10.0.0.0/18', '192.168.0.0/24']
+    allocated_cidr_list = [ipaddress.IPv4Network((167772160 + generator.randrange(0, 2 ** 17),
+                                                  generator.randint(20, 28)), strict=False).with_prefixlen
+                           for _ in range(80)]
+    for prefix in (18, 22, 26):
+        # Invoke
+        result = parallel_enum.enumerate_available(root_cidr_list, allocated_cidr_list, prefix, workers=1)
+        # Evaluate results
+        allocated = [ipaddress.IPv4Network(cidr) for cidr in allocated_cidr_list]
+        expected = [subnet.with_prefixlen for root in root_cidr_list if ipaddress.IPv4Network(root).prefixlen <= prefix
+                    for subnet in ipaddress.IPv4Network(root).subnets(new_prefix=prefix)
+                    if not any(subnet.overlaps(cidr) for cidr in allocated)]
+        assert result == expected
+
+
+def test_enumerate_available_in_parallel():
+    # Import
+    from utils import parallel_enum
+    # Setup mocks
+    root_cidr_list = ['10.0.0.0/14', '172.16.0.0/16']
+    allocated_cidr_list = ['10.0.0.0/16', '10.2.3.0/24', '10.3.255.224/27', '172.16.128.0/17']
+    serial = parallel_enum.enumerate_available(root_cidr_list, allocated_cidr_list, 24, workers=1)
+    # Invoke
+    with patch('utils.parallel_enum.PARALLEL_ENUM_MIN_BLOCKS', 0):
+        result = parallel_enum.enumerate_available(root_cidr_list, allocated_cidr_list, 24, workers=2)
+    # Evaluate results
+    assert result == serial
+    assert len(result) == 1024 - 256 - 2 + 128
+
+
+def test_enumerate_available_falls_back_to_serial():
+    # Import
+    from utils import parallel_enum
+    # Setup mocks
+    with patch('utils.parallel_enum.ProcessPoolExecutor', side_effect=OSError('No /dev/shm')), \
+            patch('utils.parallel_enum.PARALLEL_ENUM_MIN_BLOCKS', 0), \
+            patch('utils.parallel_enum._POOL_UNAVAILABLE', False):
+        # Invoke
+        result = parallel_enum.enumerate_available(['10.0.0.0/22'], ['10.0.1.0/24'], 24, workers=4)
+        # Evaluate results
+        assert result == ['10.0.0.0/24', '10.0.2.0/24', '10.0.3.0/24']
+        assert parallel_enum._POOL_UNAVAILABLE
+
+
+def test_iter_available_streams_serial_order():
+    # Import
+    from utils import parallel_enum
+    # Invoke
+    result = parallel_enum.iter_available(['10.0.0.0/22', '10.1.0.0/23'], ['10.0.1.0/24'], 24)
+    # Evaluate results
+    assert not isinstance(result, list)
+    assert list(result) == ['10.0.0.0/24', '10.0.2.0/24', '10.0.3.0/24', '10.1.0.0/24', '10.1.1.0/24']
+
+
+def test_available_runs_match_enumeration():
+    # Import
+    from utils import parallel_enum, cidr_ranges
+    # Setup mocks
+    root_cidr_list = ['10.0.0.0/20', '172.16.0.0/22']
+    allocated_cidr_list = ['10.0.1.0/24', '10.0.4.16/28', '172.16.2.0/23']
+    # Invoke
+    runs = parallel_enum.available_runs(root_cidr_list, allocated_cidr_list, 26)
+    # Evaluate results
+    assert runs[:3] == [('10.0.0.0', 26, 4), ('10.0.2.0', 26, 8), ('10.0.4.64', 26, 47)]
+    assert cidr_ranges.cidr_runs(parallel_enum.enumerate_available(root_cidr_list, allocated_cidr_list, 26,
+                                                                   workers=1)) == runs
@@ -0,0 +1,126 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+MOCK_REGION_PARAMS = {
+    'us-west-2': {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16', '10.1.0.0/16']}}},
+    'us-east-1': {'master-cidr': {'AWS': {'cidrs': ['10.2.0.0/16']}, 'AZURE': {'cidrs': ['10.3.0.0/16']}}}
+}
+
+
+def test_find_pool_overlaps():
+    # Import
+    from utils import pool_validator
+    # Setup mocks
+    region_params = dict(MOCK_REGION_PARAMS)
+    region_params['eu-west-1'] = {'master-cidr': {'AWS': {'cidrs': ['10.1.128.0/17', '172.16.0.0/12']}}}
+    region_params['us-east-1'] = {'master-cidr': {'AWS': {'cidrs': ['10.2.0.0/16', '10.2.4.0/24']},
+                                                  'AZURE': {'cidrs': ['10.2.0.0/20']}}}
+    # Invoke
+    conflicts = pool_validator.find_pool_overlaps(region_params)
+    # Evaluate results
+    kinds = sorted((conflict['kind'],) + tuple(sorted((conflict['first']['cidr'], conflict['second']['cidr'])))
+                   for conflict in conflicts)
+    assert kinds == [
+        ('cross-provider', '10.2.0.0/16', '10.2.0.0/20'),
+        ('cross-provider', '10.2.0.0/20', '10.2.4.0/24'),
+        ('cross-region', '10.1.0.0/16', '10.1.128.0/17'),
+        ('same-pool', '10.2.0.0/16', '10.2.4.0/24')
+    ]
+    assert pool_validator.find_pool_overlaps(MOCK_REGION_PARAMS) == []
+
+
+def test_validate_region_param():
+    # Import
+    from utils import pool_validator
+    # Invoke and evaluate results
+    pool_validator.validate_region_param(
+        'us-west-2', {'master-cidr': {'AWS': {'cidrs': ['10.4.0.0/16']}}}, MOCK_REGION_PARAMS)
+    with pytest.raises(pool_validator.PoolOverlapError) as error:
+        pool_validator.validate_region_param(
+            'eu-west-1', {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/8']}}}, MOCK_REGION_PARAMS)
+    assert len(error.value.conflicts) == 4
+
+
+def test_validate_region_param_slabs():
+    # Import
+    from utils import pool_validator
+    # Setup mocks, slabs which are invalid, outside the roots, smaller than their class and overlapping
+    param_value = {'master-cidr': {'AWS': {'cidrs': ['10.4.0.0/16']}},
+                   'size-classes': {'AWS': {'24': {'cidrs': ['10.4.0.0/20', '10.4.1.0/24', '10.5.0.0/20']},
+                                            '20': {'cidrs': ['10.4.128.0/24', '10.4.300.0/22']}}}}
+    # Invoke
+    with pytest.raises(pool_validator.InvalidSlabError) as error:
+        pool_validator.validate_region_param('eu-west-1', param_value, MOCK_REGION_PARAMS)
+    # Evaluate results
+    assert sorted((slab['size_class'], slab['cidr'], slab['reason']) for slab in error.value.invalid_slabs) == [
+        ('20', '10.4.128.0/24', 'Smaller than its size class /20.'),
+        ('20', '10.4.300.0/22', 'Not a valid network.'),
+        ('24', '10.4.1.0/24', 'Overlaps slab 10.4.0.0/20.'),
+        ('24', '10.5.0.0/20', 'Outside the root CIDRs.')
+    ]
+    assert pool_validator.format_invalid_slab(error.value.invalid_slabs[0]).startswith('invalid-slab: eu-west-1 AWS')
+
+
+def test_invalid_root_cidrs():
+    # Import
+    from utils import pool_validator
+    # Setup mocks, a root CIDR with host bits set next to an overlapping valid one
+    region_params = dict(MOCK_REGION_PARAMS, **{'eu-west-1': {'master-cidr': {'AWS': {
+        'cidrs': ['10.0.0.1/16', '10.1.0.0/24']}}}})
+    # Invoke and evaluate results, the invalid root is reported and left out of the sweep
+    assert pool_validator.find_invalid_roots(region_params) == [
+        {'region': 'eu-west-1', 'cloud': 'AWS', 'cidr': '10.0.0.1/16', 'reason': 'Not a valid network.'}]
+    assert [sorted((conflict['first']['cidr'], conflict['second']['cidr']))
+            for conflict in pool_validator.find_pool_overlaps(region_params)] == [['10.1.0.0/16', '10.1.0.0/24']]
+    with pytest.raises(pool_validator.InvalidRootError) as error:
+        pool_validator.validate_region_param('eu-west-1', region_params['eu-west-1'], MOCK_REGION_PARAMS)
+    assert pool_validator.format_invalid_root(error.value.invalid_roots[0]) == \
+        'invalid-root: eu-west-1 AWS 10.0.0.1/16 Not a valid network.'
+
+
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+def test_main_check_invalid_root(mock_retrieve_all_region_params, capsys):
+    # Import
+    from utils import pool_validator
+    # Setup mocks
+    mock_retrieve_all_region_params.return_value = dict(
+        MOCK_REGION_PARAMS, **{'eu-west-1': {'master-cidr': {'AWS': {'cidrs': ['10.9.0.1/16']}},
+                                             'size-classes': {'AWS': {'24': {'cidrs': ['10.9.0.0/20']}}}}})
+    # Invoke and evaluate results
+    assert pool_validator.main(['check']) == 1
+    assert 'invalid-root: eu-west-1 AWS 10.9.0.1/16 Not a valid network.' in capsys.readouterr().out
+
+
+@patch('boto3.client')
+def test_put_region_param(mock_boto_client):
+    # Import
+    from utils import pool_validator
+    # Setup mocks
+    mock_ssm = MagicMock()
+    mock_ssm.get_parameters_by_path.return_value = {'Parameters': [
+        {'Name': '/vpcx/aws/regions/{}'.format(region), 'Value': json.dumps(value)}
+        for region, value in MOCK_REGION_PARAMS.items()]}
+    mock_boto_client.return_value = mock_ssm
+    # Invoke
+    with pytest.raises(pool_validator.PoolOverlapError):
+        pool_validator.put_region_param('eu-west-1', {'master-cidr': {'AWS': {'cidrs': ['10.2.0.0/24']}}})
+    pool_validator.put_region_param('eu-west-1', {'master-cidr': {'AWS': {'cidrs': ['10.5.0.0/16']}}})
+    # Evaluate results
+    mock_ssm.put_parameter.assert_called_once()
+    assert mock_ssm.put_parameter.call_args[1]['Name'] == '/vpcx/aws/regions/eu-west-1'
+
+
+@patch('utils.cidr_lookups.retrieve_all_region_params')
+def test_main_check(mock_retrieve_all_region_params, capsys):
+    # Import
+    from utils import pool_validator
+    # Setup mocks
+    mock_retrieve_all_region_params.return_value = dict(
+        MOCK_REGION_PARAMS, **{'eu-west-1': {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/24']}}}})
+    # Invoke and evaluate results
+    assert pool_validator.main(['check']) == 1
+    assert 'cross-region: eu-west-1 AWS 10.0.0.0/24 overlaps us-west-2 AWS 10.0.0.0/16' in capsys.readouterr().out
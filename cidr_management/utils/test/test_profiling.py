@@ -0,0 +1,65 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+from unittest.mock import patch
+
+
+def mock_event(caller, header_value='true'):
+    return {
+        'headers': {'X-Profile-Request': header_value},
+        'requestContext': {'identity': {'accountId': caller, 'sourceIp': '10.0.0.1'}}
+    }
+
+
+def test_profiling_disabled_by_default():
+    # Import
+    from utils import profiling
+    # Invoke and evaluate results
+    with patch.object(profiling, 'PROFILE_ALLOWED_CALLERS', frozenset()):
+        assert not profiling.profiling_requested(mock_event('123456789012'))
+        assert not profiling.profiling_requested(None)
+
+
+def test_profiling_requested_by_allowed_caller():
+    # Import
+    from utils import profiling
+    # Invoke and evaluate results
+    with patch.object(profiling, 'PROFILE_ALLOWED_CALLERS', frozenset(['123456789012'])):
+        assert profiling.profiling_requested(mock_event('123456789012'))
+        assert not profiling.profiling_requested(mock_event('999999999999'))
+        assert not profiling.profiling_requested(mock_event('123456789012', header_value='false'))
+
+
+def test_profiled_handler_logs_profile():
+    # Import
+    from utils import profiling
+    # Setup mocks
+    @profiling.profiled
+    def handler(event, context):
+        return {'statusCode': 200}
+    # Invoke
+    with patch.object(profiling, 'PROFILE_REQUESTS', True), \
+            patch.object(profiling, 'PROFILE_OUTPUT', 'log'), \
+            patch.object(profiling.LOGGER, 'info') as mock_log:
+        result = handler(None, None)
+    # Evaluate results
+    assert result == {'statusCode': 200}
+    assert 'function calls' in mock_log.call_args[0][3]
+
+
+def test_profiled_handler_writes_raw_profile(tmp_path):
+    # Import
+    from utils import profiling
+    # Setup mocks
+    @profiling.profiled
+    def handler(event, context):
+        return {'statusCode': 200}
+    # Invoke
+    with patch.object(profiling, 'PROFILE_REQUESTS', True), \
+            patch.object(profiling, 'PROFILE_OUTPUT', 'file'), \
+            patch.object(profiling, 'PROFILE_OUTPUT_DIR', str(tmp_path)):
+        result = handler(None, None)
+    # Evaluate results
+    assert result == {'statusCode': 200}
+    assert len(os.listdir(str(tmp_path))) == 1
@@ -0,0 +1,15 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+
+def test_size_classes_skips_invalid_slabs(caplog):
+    # Import
+    from utils import slab_pools
+    # Setup mocks, the /22 slab overlaps the /24 slab and the 10.1.0.0/16 slab is outside the roots
+    param_value = {'master-cidr': {'AWS': {'cidrs': ['10.0.0.0/16']}},
+                   'size-classes': {'AWS': {'24': {'cidrs': ['10.0.0.0/20', '10.1.0.0/16']},
+                                            '22': {'cidrs': ['10.0.4.0/22', '10.0.16.0/20']}}}}
+    # Invoke and evaluate results
+    assert slab_pools.size_classes(param_value, 'aws') == {24: ['10.0.0.0/20'], 22: ['10.0.16.0/20']}
+    assert 'Skipping slab 10.0.4.0/22 of size class 22: Overlaps slab 10.0.0.0/20.' in caplog.text
+    assert slab_pools.size_classes({}, 'aws') == {}
@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+ITEMS = [
+    {'cidr_block': '10.0.0.0/24', 'account_alias': 'ITX-001', 'region': 'US-WEST-2', 'cloud': 'AWS',
+     'locked': True, 'assigned': True, 'net_start': Decimal(167772160)},
+    {'cidr_block': '10.0.1.0/27', 'account_alias': 'ITX-002', 'region': 'US-WEST-2', 'cloud': 'AWS',
+     'locked': True, 'assigned': False},
+    {'cidr_block': '10.1.0.0/16', 'account_alias': 'ITX-003', 'region': 'US-EAST-1', 'cloud': 'AWS',
+     'locked': True, 'assigned': True}
+]
+
+
+@pytest.mark.parametrize('snapshot_format', ['jsonl', 'binary'])
+def test_snapshot_round_trip(snapshot_format, tmp_path):
+    # Import
+    from utils import snapshot_export
+    path = str(tmp_path / 'snapshot')
+    # Invoke
+    assert snapshot_export.write_snapshot(iter(ITEMS), path, snapshot_format) == 3
+    items = list(snapshot_export.read_snapshot(path))
+    # Evaluate results
+    assert [(item['cidr_block'], item['region'], item['cloud'], item['locked'], item['assigned'])
+            for item in items] == [(item['cidr_block'], item['region'], item['cloud'], item['locked'],
+                                    item['assigned']) for item in ITEMS]
+    used = snapshot_export.load_used_ranges(path, 'us-west-2')
+    assert used.ranges == [(167772160, 167772416 + 31)]
+
+
+def test_binary_snapshot_size(tmp_path):
+    # Import
+    from utils import snapshot_export
+    path = tmp_path / 'snapshot'
+    snapshot_export.write_snapshot(ITEMS, str(path), 'binary')
+    # Header, two region records with their keys and three CIDR records
+    assert path.stat().st_size == 8 + 2 * 8 + len('AWS#US-WEST-2') + len('AWS#US-EAST-1') + 3 * 8
+
+
+@patch('boto3.client')
+def test_scan_items_parallel(mock_ddb_client):
+    # Import
+    from utils import snapshot_export
+    # Setup mocks, segment 0 has two pages and segment 1 one page
+    pages = {
+        (0, None): {'Items': [{'cidr_block': {'S': '10.0.0.0/24'}}], 'LastEvaluatedKey': {'cidr_block': {'S': 'a'}}},
+        (0, 'a'): {'Items': [{'cidr_block': {'S': '10.0.1.0/24'}}]},
+        (1, None): {'Items': [{'cidr_block': {'S': '10.1.0.0/16'}, 'locked': {'BOOL': True}}]}
+    }
+    mock_client = MagicMock()
+    mock_client.scan.side_effect = lambda **kwargs: pages[
+        (kwargs['Segment'], kwargs.get('ExclusiveStartKey', {}).get('cidr_block', {}).get('S'))]
+    mock_ddb_client.return_value = mock_client
+    # Invoke
+    items = list(snapshot_export.scan_items('mock', segments=2))
+    # Evaluate results
+    assert sorted(item['cidr_block'] for item in items) == ['10.0.0.0/24', '10.0.1.0/24', '10.1.0.0/16']
+    assert {call[1]['TotalSegments'] for call in mock_client.scan.call_args_list} == {2}
+
+
+@patch('boto3.client')
+def test_scan_items_error(mock_ddb_client):
+    # Import
+    from utils import snapshot_export
+    mock_ddb_client.return_value.scan.side_effect = Exception('scan failed')
+    with pytest.raises(Exception, match='scan failed'):
+        list(snapshot_export.scan_items('mock', segments=2))